@@ -1,47 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime
+import hashlib
 
-from ...db.database import get_db
-from ...db import crud
+from ...db.database import get_async_db
+from ...db import async_crud
 from ...schemas import camera, image, defect
-from ...services import image_service
+from ...services import heatmap_service, image_service
+from ...utils.responses import etag_matches
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[camera.Camera])
-def read_cameras(
+async def read_cameras(
     skip: int = 0, 
     limit: int = 100, 
     group_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a list of all cameras."""
     if group_id is not None:
-        cameras = crud.get_cameras_by_group(db, group_id=group_id)
+        cameras = await async_crud.get_cameras_by_group(db, group_id=group_id)
     else:
-        cameras = crud.get_cameras(db, skip=skip, limit=limit)
+        cameras = await async_crud.get_cameras(db, skip=skip, limit=limit)
     return cameras
 
 
+@router.get("/snapshot", response_model=camera.CameraSnapshot)
+async def read_camera_snapshot(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the latest status of every camera in one response.
+    The response carries an ETag; polls with a matching If-None-Match get a 304.
+    """
+    rows = await async_crud.get_camera_snapshot(db)
+    
+    entries = []
+    for row in rows:
+        entry = camera.CameraSnapshotEntry(
+            serial_number=row.serial_number,
+            group_id=row.group_id,
+            has_defects=row.defect_count > 0,
+            defect_count=row.defect_count
+        )
+        if row.image_id is not None:
+            entry.latest_image_id = row.image_id
+            entry.latest_image_url = image_service.get_image_url_by_id(row.image_id)
+            entry.latest_trigger_id = row.trigger_id
+            entry.timestamp = row.timestamp
+            entry.passed = row.defect_count == 0
+        entries.append(entry)
+    
+    # The version only changes when a camera gets a new image or its defect count changes
+    version_source = "|".join(
+        f"{e.serial_number}:{e.latest_image_id}:{e.defect_count}" for e in entries
+    )
+    version = hashlib.sha1(version_source.encode()).hexdigest()
+    etag = f'"{version}"'
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return camera.CameraSnapshot(version=version, cameras=entries)
+
+
 @router.get("/{serial_number}", response_model=camera.Camera)
-def read_camera(serial_number: str, db: Session = Depends(get_db)):
+async def read_camera(serial_number: str, db: AsyncSession = Depends(get_async_db)):
     """Get details for a specific camera."""
-    db_camera = crud.get_camera(db, serial_number=serial_number)
+    db_camera = await async_crud.get_camera(db, serial_number=serial_number)
     if db_camera is None:
         raise HTTPException(status_code=404, detail="Camera not found")
     return db_camera
 
 
 @router.get("/{serial_number}/latest", response_model=camera.CameraLatestStatus)
-def read_camera_latest_status(serial_number: str, db: Session = Depends(get_db)):
+async def read_camera_latest_status(serial_number: str, db: AsyncSession = Depends(get_async_db)):
     """Get the latest status for a specific camera, including its most recent image and defect count."""
-    db_camera = crud.get_camera(db, serial_number=serial_number)
+    db_camera = await async_crud.get_camera(db, serial_number=serial_number)
     if db_camera is None:
         raise HTTPException(status_code=404, detail="Camera not found")
     
-    latest_image = crud.get_camera_latest_image(db, camera_id=serial_number)
+    latest_image = await async_crud.get_camera_latest_image(db, camera_id=serial_number)
     
     # Initialize the response
     result = camera.CameraLatestStatus(
@@ -55,13 +96,63 @@ def read_camera_latest_status(serial_number: str, db: Session = Depends(get_db))
         result.latest_image_id = latest_image.id
         result.latest_image_url = image_service.get_image_url(latest_image)
         
-        # Get defects for the image
-        defects = crud.get_defects_by_image(db, image_id=latest_image.id)
-        result.has_defects = len(defects) > 0
-        result.defect_count = len(defects)
+        # Count defects for the image
+        defect_count = await async_crud.count_defects_by_image(db, image_id=latest_image.id)
+        result.has_defects = defect_count > 0
+        result.defect_count = defect_count
         
-        # Get timestamp from trigger
+        # Get timestamp from trigger (eager loaded)
         if latest_image.trigger:
             result.timestamp = latest_image.trigger.timestamp
     
-    return result
\ No newline at end of file
+    return result
+
+
+@router.get("/{serial_number}/heatmap")
+async def read_camera_heatmap(
+    serial_number: str,
+    start: Optional[datetime] = Query(None, description="Window start (trigger time); defaults to heatmap.default_window_hours before end"),
+    end: Optional[datetime] = Query(None, description="Window end (trigger time); defaults to now"),
+    format: str = Query("png", description="png (transparent overlay), json or npy"),
+    width: int = Query(512, ge=16, le=4096, description="PNG width in pixels"),
+    height: int = Query(512, ge=16, le=4096, description="PNG height in pixels"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get where defects cluster on a camera's images, as a histogram of defect centers
+    in normalized image coordinates (row = y, column = x).
+
+    Windows are answered from the hourly histograms kept by the heatmap worker, so the
+    cost depends on the number of hours, not on the number of defects.
+    """
+    if format not in heatmap_service.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown heatmap format '{format}'")
+
+    db_camera = await async_crud.get_camera(db, serial_number=serial_number)
+    if db_camera is None:
+        raise HTTPException(status_code=404, detail="Camera not found")
+
+    start, end = heatmap_service.default_window(start, end)
+    grid_size = heatmap_service.GRID_SIZE
+    rows = await async_crud.get_heatmap_histograms(db, serial_number, grid_size, start, end)
+    histogram, defect_count = heatmap_service.combine(rows, grid_size)
+
+    if format == "json":
+        return {
+            "serial_number": serial_number,
+            "grid_size": grid_size,
+            "start": start,
+            "end": end,
+            "defect_count": defect_count,
+            "counts": histogram.tolist()
+        }
+
+    headers = {"X-Defect-Count": str(defect_count), "X-Heatmap-Grid": str(grid_size)}
+    if format == "npy":
+        return Response(content=heatmap_service.to_npy(histogram), media_type="application/octet-stream", headers=headers)
+
+    try:
+        content = heatmap_service.render_png(histogram, width, height)
+    except heatmap_service.HeatmapError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    return Response(content=content, media_type="image/png", headers=headers)
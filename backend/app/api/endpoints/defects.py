@@ -1,70 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict
+from datetime import datetime
 
-from ...db.database import get_db
-from ...db import crud, models
+from ...db.database import get_db, get_async_db
+from ...db import crud, async_crud, models
+from ...db.journal import disposition_journal
 from ...schemas import defect
-from ...services import image_service
+from ...services import image_service, overlay_service
+from ...utils.config import load_config
+from ...utils.responses import trusted_json_response
 
 router = APIRouter()
 
+# Load configuration
+config = load_config()
+USE_ROLLUP = config.get('statistics', {}).get('use_rollup', False)
+
 
 @router.get("/image/{image_id}", response_model=List[defect.DefectNormalized])
-def read_defects_by_image(
+async def read_defects_by_image(
     image_id: int, 
-    db: Session = Depends(get_db)
+    request: Request,
+    format: Optional[str] = Query(None, description="json, columnar, msgpack or f32; defaults to the Accept header"),
+    include_suppressed: bool = Query(True, description="Include defects suppressed as repeats of earlier parts"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all defects for a specific image with normalized coordinates for frontend rendering."""
-    db_image = crud.get_image(db, image_id=image_id)
+    """
+    Get all defects for a specific image with normalized coordinates for frontend rendering.
+
+    The default is one JSON object per defect. Overlay clients can ask for a compact
+    representation with ?format= or an Accept media type (see overlay_service.MEDIA_TYPES).
+    """
+    try:
+        fmt = overlay_service.negotiate_format(format, request.headers.get("accept"))
+    except overlay_service.UnsupportedFormatError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    db_image = await async_crud.get_image(db, image_id=image_id)
     if db_image is None:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    db_defects = crud.get_defects_by_image(db, image_id=image_id)
+    db_defects = await async_crud.get_defect_overlay_rows(db, image_id=image_id, include_suppressed=include_suppressed)
     
     # Convert to normalized coordinates for the frontend
-    normalized_defects = []
-    for db_defect in db_defects:
-        # Calculate normalized coordinates
-        img_width = db_image.width or 5120  # Fallback to 5120 if width is None
-        img_height = db_image.height or 5120  # Fallback to 5120 if height is None
-        
-        # Center coordinates
-        x_center = (db_defect.x + db_defect.width / 2) / img_width
-        y_center = (db_defect.y + db_defect.height / 2) / img_height
-        
-        # Width and height
-        width_norm = db_defect.width / img_width
-        height_norm = db_defect.height / img_height
-        
-        # Create the normalized defect object
-        normalized_defect = defect.DefectNormalized(
-            id=db_defect.id,
-            image_id=db_defect.image_id,
-            normalized={
-                "x_center": x_center,
-                "y_center": y_center,
-                "width": width_norm,
-                "height": height_norm
-            },
-            x=db_defect.x,
-            y=db_defect.y,
-            width=db_defect.width,
-            height=db_defect.height,
-            confidence=db_defect.confidence,
-            type=db_defect.type,
-            disposition=db_defect.disposition
-        )
-        
-        normalized_defects.append(normalized_defect)
+    img_width = db_image.width or image_service.DEFAULT_IMAGE_SIZE
+    img_height = db_image.height or image_service.DEFAULT_IMAGE_SIZE
+
+    if fmt != "json":
+        columns = overlay_service.defect_columns(db_defects, img_width, img_height)
+        content = overlay_service.encode_overlay(fmt, image_id, img_width, img_height, columns)
+        return Response(content=content, media_type=overlay_service.MEDIA_TYPES[fmt])
+
+    normalized_defects = [
+        image_service.defect_to_normalized_dict(db_defect, img_width, img_height)
+        for db_defect in db_defects
+    ]
     
-    return normalized_defects
+    # Rows come straight from typed columns, so skip re-validating them against the response model
+    return trusted_json_response(normalized_defects)
 
 
 @router.get("/{defect_id}", response_model=defect.Defect)
-def read_defect(defect_id: int, db: Session = Depends(get_db)):
+async def read_defect(defect_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get details for a specific defect."""
-    db_defect = crud.get_defect(db, defect_id=defect_id)
+    db_defect = await async_crud.get_defect(db, defect_id=defect_id)
     if db_defect is None:
         raise HTTPException(status_code=404, detail="Defect not found")
     return db_defect
@@ -77,75 +78,100 @@ def update_defect_disposition(
     db: Session = Depends(get_db)
 ):
     """Update the disposition for a specific defect."""
-    db_defect = crud.get_defect(db, defect_id=defect_id)
-    if db_defect is None:
-        raise HTTPException(status_code=404, detail="Defect not found")
+    if disposition_journal.enabled:
+        db_defect = crud.get_defect(db, defect_id=defect_id)
+        if db_defect is None:
+            raise HTTPException(status_code=404, detail="Defect not found")
+        
+        # Acknowledged once the journal entry is on disk; the flusher writes it to Postgres
+        disposition_journal.append([{
+            "defect_id": defect_id,
+            "disposition": defect_update.disposition,
+            "notes": defect_update.notes
+        }])
+        db.expunge(db_defect)
+        return disposition_journal.apply_pending(db_defect)
     
-    # Save the disposition to the defect
+    # Disposition, timestamp and notes (in the 'metadata' column) are saved in one commit
     updated_defect = crud.update_defect_disposition(
         db, 
         defect_id=defect_id, 
-        disposition=defect_update.disposition
+        disposition=defect_update.disposition,
+        notes=defect_update.notes
     )
-    
-    # If there are notes, store them in the _metadata field (mapped to 'metadata' column)
-    if defect_update.notes and updated_defect:
-        if not updated_defect._metadata:
-            updated_defect._metadata = {}
-        
-        updated_defect._metadata["disposition_notes"] = defect_update.notes
-        db.commit()
-        db.refresh(updated_defect)
+    if updated_defect is None:
+        raise HTTPException(status_code=404, detail="Defect not found")
     
     return updated_defect
 
 
-@router.get("/statistics/summary", response_model=defect.DefectStatistics)
-def get_defect_statistics(db: Session = Depends(get_db)):
-    """Get summary statistics for defects."""
-    # Count total defects
-    total_defects = db.query(models.Defect).count()
+@router.post("/dispositions", response_model=defect.DefectDispositionBatchResult)
+def update_defect_dispositions(
+    batch: defect.DefectDispositionBatch,
+    db: Session = Depends(get_db)
+):
+    """
+    Update the disposition of many defects at once, e.g. a whole part.
     
-    # Count defects by type
-    defects_by_type = {}
-    defect_types = db.query(models.Defect.type, models.Defect.id.label("count")).group_by(models.Defect.type).all()
-    for defect_type in defect_types:
-        if defect_type.type:
-            count = db.query(models.Defect).filter(models.Defect.type == defect_type.type).count()
-            defects_by_type[defect_type.type] = count
+    All entries are applied in one transaction with a single UPDATE; the result lists
+    every requested defect as "updated" or "not_found". With the disposition journal
+    enabled entries are acknowledged as "queued" once journaled (unknown ids still as
+    "not_found").
+    """
+    if disposition_journal.enabled:
+        # Only journal defects that exist; the flusher would drop the others silently
+        existing = crud.get_existing_defect_ids(db, list({item.defect_id for item in batch.items}))
+        entries = disposition_journal.append(item.model_dump() for item in batch.items if item.defect_id in existing)
+        latest = {entry["defect_id"]: entry for entry in entries}
+        
+        results = []
+        for defect_id in dict.fromkeys(item.defect_id for item in batch.items):
+            entry = latest.get(defect_id)
+            if entry is None:
+                results.append(defect.DefectDispositionResult(defect_id=defect_id, status="not_found"))
+            else:
+                results.append(defect.DefectDispositionResult(
+                    defect_id=defect_id,
+                    status="queued",
+                    disposition=entry["disposition"],
+                    dispositioned_at=entry["dispositioned_at"]
+                ))
+        return defect.DefectDispositionBatchResult(updated=0, queued=len(latest), results=results)
     
-    # Count defects by disposition
-    defects_by_disposition = {}
-    defect_dispositions = db.query(models.Defect.disposition, models.Defect.id.label("count")).group_by(models.Defect.disposition).all()
-    for disposition in defect_dispositions:
-        if disposition.disposition:
-            count = db.query(models.Defect).filter(models.Defect.disposition == disposition.disposition).count()
-            defects_by_disposition[disposition.disposition] = count
+    rows = crud.update_defect_dispositions(db, [item.model_dump() for item in batch.items])
+    updated = {row.id: row for row in rows}
     
-    # Count defects by camera
-    defects_by_camera = {}
-    camera_defects = (
-        db.query(
-            models.Image.camera_id,
-            models.Defect.id.label("count")
-        )
-        .join(models.Defect, models.Defect.image_id == models.Image.id)
-        .group_by(models.Image.camera_id)
-        .all()
-    )
-    for camera_defect in camera_defects:
-        if camera_defect.camera_id:
-            count = (
-                db.query(models.Defect)
-                .join(models.Image, models.Defect.image_id == models.Image.id)
-                .filter(models.Image.camera_id == camera_defect.camera_id)
-                .count()
-            )
-            defects_by_camera[camera_defect.camera_id] = count
+    results = []
+    for defect_id in dict.fromkeys(item.defect_id for item in batch.items):
+        row = updated.get(defect_id)
+        if row is None:
+            results.append(defect.DefectDispositionResult(defect_id=defect_id, status="not_found"))
+        else:
+            results.append(defect.DefectDispositionResult(
+                defect_id=defect_id,
+                status="updated",
+                disposition=row.disposition,
+                dispositioned_at=row.dispositioned_at
+            ))
+    
+    return defect.DefectDispositionBatchResult(updated=len(updated), results=results)
+
+
+@router.get("/statistics/summary", response_model=defect.DefectStatistics)
+def get_defect_statistics(
+    start: Optional[datetime] = Query(None, description="Only count defects from triggers at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only count defects from triggers before this time"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get summary statistics for defects, optionally for a trigger time window.
+
+    With statistics.use_rollup, archived parts are still counted and defects of triggers
+    without a timestamp are not (see crud.get_defect_statistics_from_rollup).
+    """
+    if USE_ROLLUP:
+        statistics = crud.get_defect_statistics_from_rollup(db, start=start, end=end)
+    else:
+        statistics = crud.get_defect_statistics(db, start=start, end=end)
     
-    return defect.DefectStatistics(
-        total_defects=total_defects,
-        defects_by_type=defects_by_type,
-        defects_by_disposition=defects_by_disposition,
-        defects_by_camera=defects_by_camera
-    )
\ No newline at end of file
+    return defect.DefectStatistics(**statistics)
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+from ...services import export_service, training_export_service
+
+router = APIRouter()
+
+
+@router.get("/defects")
+def export_defects(
+    start: datetime = Query(..., description="Include defects from triggers at or after this time"),
+    end: datetime = Query(..., description="Include defects from triggers before this time"),
+    format: str = Query("csv", description="csv or parquet"),
+    compress: bool = Query(False, description="gzip the CSV, or zstd-compress the Parquet column chunks"),
+    camera_id: Optional[str] = None,
+    disposition: Optional[str] = None
+):
+    """
+    Stream defects with their image, trigger and camera for a trigger time range.
+    
+    Rows are read through a server-side cursor and written batch by batch, so memory use
+    doesn't grow with the size of the range.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    try:
+        chunks = export_service.stream_defect_export(
+            start, end, fmt=format, compress=compress, camera_id=camera_id, disposition=disposition
+        )
+    except export_service.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = export_service.export_filename(format, start, end, compress)
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if compress and format == "csv" else export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/training")
+def export_training_set(
+    start: datetime = Query(..., description="Include images from triggers at or after this time"),
+    end: datetime = Query(..., description="Include images from triggers before this time"),
+    camera_id: Optional[str] = None,
+    disposition: Optional[List[str]] = Query(
+        None, description="Only images with defects of these dispositions; each becomes a YOLO class"
+    ),
+    compress: bool = False
+):
+    """
+    Stream a YOLO training set (images/, labels/, classes.txt) as a tar archive.
+    
+    Image files are fetched in parallel through the image cache and FTP pool and written
+    as they arrive. Poll /api/exports/training/{job_id} (job id in X-Export-Job) for progress.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    progress = training_export_service.TrainingExportProgress()
+    training_export_service.register_job(progress)
+    
+    chunks = training_export_service.stream_training_set(
+        start, end, camera_id=camera_id, dispositions=disposition, compress=compress, progress=progress
+    )
+    filename = f"training_{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}.tar" + (".gz" if compress else "")
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if compress else "application/x-tar",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Job": progress.job_id
+        }
+    )
+
+
+@router.get("/training/{job_id}")
+def read_training_export_progress(job_id: str) -> Dict[str, Any]:
+    """Get the progress of a training set export started through the API."""
+    progress = training_export_service.get_job(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return progress.as_dict()
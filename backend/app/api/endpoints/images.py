@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ...db.database import get_db
-from ...db import crud
+from ...db.database import get_db, get_async_db
+from ...db import crud, async_crud
 from ...schemas import image
 from ...services import image_service
 
@@ -12,74 +13,28 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[image.Image])
-def read_images(
+async def read_images(
     skip: int = 0, 
     limit: int = 100, 
     trigger_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a list of images, optionally filtered by trigger ID."""
     if trigger_id:
-        images = crud.get_images_by_trigger(db, trigger_id=trigger_id)
+        images = await async_crud.get_images_by_trigger(db, trigger_id=trigger_id)
     else:
         # Get some recent images
-        latest_trigger = crud.get_latest_trigger(db)
+        latest_trigger = await async_crud.get_latest_trigger(db)
         if latest_trigger:
-            images = crud.get_images_by_trigger(db, trigger_id=latest_trigger.id)
+            images = await async_crud.get_images_by_trigger(db, trigger_id=latest_trigger.id)
         else:
             images = []
     
     return images
 
 
-@router.get("/latest", response_model=List[image.ImageDetail])
-def read_latest_images(db: Session = Depends(get_db)):
-    """Get the latest image for each camera."""
-    images = crud.get_latest_images(db)
-    
-    # Enhance the image objects with additional information
-    result = []
-    for img in images:
-        # Count defects
-        defects = crud.get_defects_by_image(db, image_id=img.id)
-        
-        # Create enhanced object
-        image_detail = image.ImageDetail(
-            id=img.id,
-            trigger_id=img.trigger_id,
-            width=img.width,
-            height=img.height,
-            camera_id=img.camera_id,
-            media_id=img.media_id,
-            image=img.image,
-            ether_checked=img.ether_checked,
-            defect_count=len(defects)
-        )
-        
-        # Add trigger timestamp if available
-        if img.trigger:
-            image_detail.trigger_timestamp = img.trigger.timestamp
-        
-        # Add camera group if available
-        if img.camera:
-            image_detail.camera_group = img.camera.group_id
-            
-        result.append(image_detail)
-    
-    return result
-
-
-@router.get("/{image_id}", response_model=image.ImageDetail)
-def read_image(image_id: int, db: Session = Depends(get_db)):
-    """Get details for a specific image."""
-    db_image = crud.get_image(db, image_id=image_id)
-    if db_image is None:
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    # Count defects
-    defects = crud.get_defects_by_image(db, image_id=image_id)
-    
-    # Create enhanced object
+def _build_image_detail(db_image, defect_count: int) -> image.ImageDetail:
+    """Build an ImageDetail from an image whose trigger and camera are already loaded."""
     image_detail = image.ImageDetail(
         id=db_image.id,
         trigger_id=db_image.trigger_id,
@@ -89,7 +44,7 @@ def read_image(image_id: int, db: Session = Depends(get_db)):
         media_id=db_image.media_id,
         image=db_image.image,
         ether_checked=db_image.ether_checked,
-        defect_count=len(defects)
+        defect_count=defect_count
     )
     
     # Add trigger timestamp and part if available
@@ -100,10 +55,30 @@ def read_image(image_id: int, db: Session = Depends(get_db)):
     # Add camera group if available
     if db_image.camera:
         image_detail.camera_group = db_image.camera.group_id
-        
+    
     return image_detail
 
 
+@router.get("/latest", response_model=List[image.ImageDetail])
+async def read_latest_images(db: AsyncSession = Depends(get_async_db)):
+    """Get the latest image for each camera."""
+    # Images, triggers, cameras and defect counts all come from one query
+    rows = await async_crud.get_latest_images_with_defect_counts(db)
+    
+    return [_build_image_detail(img, defect_count) for img, defect_count in rows]
+
+
+@router.get("/{image_id}", response_model=image.ImageDetail)
+async def read_image(image_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get details for a specific image."""
+    row = await async_crud.get_image_with_defect_count(db, image_id=image_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    db_image, defect_count = row
+    return _build_image_detail(db_image, defect_count)
+
+
 @router.get("/{image_id}/file")
 def read_image_file(image_id: int, db: Session = Depends(get_db)):
     """Get the actual image file for a specific image."""
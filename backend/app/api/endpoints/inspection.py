@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+
+from ...db.database import get_db
+from ...db import crud
+from ...schemas import inspection
+
+router = APIRouter()
+
+COUNTERS = ("both_fail", "machine_only", "human_only", "both_pass")
+
+
+def _matrix(**counts) -> inspection.ConfusionMatrix:
+    matrix = inspection.ConfusionMatrix(**counts)
+    total = sum(getattr(matrix, name) for name in COUNTERS)
+    if total:
+        matrix.agreement = round((matrix.both_fail + matrix.both_pass) / total, 4)
+    return matrix
+
+
+@router.get("/agreement", response_model=inspection.InspectionAgreement)
+def get_inspection_agreement(
+    start: Optional[datetime] = Query(None, description="Only scans on or after this day"),
+    end: Optional[datetime] = Query(None, description="Only scans on or before this day"),
+    camera: Optional[str] = Query(None, description="Only this camera serial number (unmatched_scans stay unfiltered)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get machine vs. human inspection confusion matrices per camera and region.
+
+    Served from the daily counters kept by the correlation job
+    (sql/inspection_correlation.sql), so the cost doesn't grow with the scan history.
+    Unmatched scans have no camera, so unmatched_scans counts those of every camera.
+    """
+    unmatched = 0
+    totals = dict.fromkeys(COUNTERS, 0)
+    matrices = []
+    for row in crud.get_inspection_agreement(db, start=start, end=end, camera_id=camera):
+        unmatched += int(row.unmatched or 0)
+        if row.camera_id is None:
+            continue
+        counts = {name: int(getattr(row, name) or 0) for name in COUNTERS}
+        if row.region_id is None:
+            for name in COUNTERS:
+                totals[name] += counts[name]
+        matrices.append(_matrix(
+            camera_id=row.camera_id,
+            region_id=row.region_id,
+            region_name=row.region_name,
+            **counts
+        ))
+
+    matrices.sort(key=lambda m: (m.camera_id, m.region_id is not None, m.region_name or ""))
+    return inspection.InspectionAgreement(unmatched_scans=unmatched, total=_matrix(**totals), matrices=matrices)
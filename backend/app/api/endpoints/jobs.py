@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ...db.database import get_db
+from ...db import crud
+from ...schemas import job
+
+router = APIRouter()
+
+COUNTERS = ("parts", "flagged_parts", "scrap_parts", "scrap_defects")
+
+
+def _job_yield(db: Session, outflow) -> job.JobYield:
+    # Only this run's hours: a job number can run again later
+    hours = crud.get_job_yield_hours(db, outflow.job_num, outflow.job_start, outflow.job_end)
+    totals = {name: sum(getattr(hour, name) for hour in hours) for name in COUNTERS}
+    result = job.JobYield(
+        job_num=outflow.job_num,
+        job_start=outflow.job_start,
+        job_end=outflow.job_end,
+        total_outflow=outflow.total_outflow,
+        hours=[job.JobYieldHour(**{"hour": hour.hour, **{name: getattr(hour, name) for name in COUNTERS}}) for hour in hours],
+        **totals
+    )
+
+    if result.parts:
+        result.yield_rate = round((result.parts - result.scrap_parts) / result.parts, 4)
+    if outflow.job_start:
+        # Outflow times are naive plant-local times (porosity.plant_timezone)
+        elapsed = ((outflow.job_end or crud.get_plant_now(db)) - outflow.job_start).total_seconds() / 3600
+        if elapsed > 0:
+            result.parts_per_hour = round(result.parts / elapsed, 1)
+    return result
+
+
+@router.get("/current/yield", response_model=job.JobYield)
+def read_current_job_yield(db: Session = Depends(get_db)):
+    """Get yield and throughput of the most recently started job."""
+    outflow = crud.get_current_job(db)
+    if outflow is None or outflow.job_num is None:
+        raise HTTPException(status_code=404, detail="No job found")
+    return _job_yield(db, outflow)
+
+
+@router.get("/{job_num}/yield", response_model=job.JobYield)
+def read_job_yield(job_num: int, db: Session = Depends(get_db)):
+    """
+    Get yield (parts, flagged and scrap parts, scrap defects, parts/hour) of a job.
+
+    Served from the per-job hourly rollup (sql/job_yield_rollup.sql), so the cost
+    depends on the job's length in hours, not on how many parts it ran.
+    """
+    outflow = crud.get_job(db, job_num)
+    if outflow is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_yield(db, outflow)
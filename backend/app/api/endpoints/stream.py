@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+
+from ...services.event_service import broadcaster
+from ...utils.config import load_config
+
+router = APIRouter()
+
+# Load configuration
+config = load_config()
+HEARTBEAT_SECONDS = float(config.get('stream', {}).get('heartbeat_seconds', 15))
+
+
+async def _event_stream(request: Request):
+    queue = broadcaster.subscribe()
+    try:
+        # Let the client know the channel is live so it can stop its fallback polling
+        yield "event: ready\ndata: {}\n\n"
+        
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                continue
+            
+            yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+@router.get("")
+async def stream_events(request: Request):
+    """
+    Server-sent event stream of new triggers.
+    Each 'new_trigger' event lists the trigger id, the cameras and the image ids that arrived.
+    """
+    return StreamingResponse(
+        _event_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
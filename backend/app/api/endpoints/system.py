@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from ...db.cache import reference_cache
+from ...db.journal import disposition_journal
+from ...db.profiler import query_profiler
+
+router = APIRouter()
+
+
+@router.get("/cache")
+def read_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss statistics for the reference data cache, per table."""
+    return {
+        "enabled": reference_cache.enabled,
+        "tables": reference_cache.stats()
+    }
+
+
+@router.get("/dispositions")
+def read_disposition_journal_stats() -> Dict[str, Any]:
+    """Get the state of the write-behind disposition journal (queued entries, checkpoint)."""
+    return disposition_journal.stats()
+
+
+@router.get("/queries")
+def read_query_profile() -> Dict[str, Any]:
+    """
+    Get the SQL profiler's per-route statement counts, DB time and suspected N+1 statements,
+    and the most recent slow queries with their plans (needs sql_profiler.enabled).
+    """
+    return query_profiler.stats()
+
+
+@router.delete("/queries")
+def reset_query_profile() -> Dict[str, Any]:
+    """Clear the SQL profiler's route totals and slow query log."""
+    query_profiler.reset()
+    return query_profiler.stats()
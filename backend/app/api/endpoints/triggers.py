@@ -0,0 +1,145 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from collections import defaultdict
+
+from ...db.database import get_async_db
+from ...db import async_crud
+from ...schemas import trigger
+from ...services import image_service, analysis_service
+from ...utils.pagination import encode_cursor, decode_cursor, InvalidCursorError
+
+router = APIRouter()
+
+
+@router.get("/", response_model=trigger.TriggerPage)
+async def read_triggers(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    camera_id: Optional[str] = None,
+    part: Optional[str] = None,
+    belt: Optional[str] = None,
+    has_defects: Optional[bool] = None,
+    disposition: Optional[str] = Query(
+        None, description="A disposition value, 'pending' or 'dispositioned'"
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Browse trigger history, newest first.
+    
+    Keyset paginated on (timestamp, id): every page costs the same however far back it is.
+    """
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One extra row tells whether there is a next page
+    rows = await async_crud.get_trigger_history(
+        db,
+        limit + 1,
+        before=before,
+        camera_id=camera_id,
+        part=part,
+        belt=belt,
+        has_defects=has_defects,
+        disposition=disposition
+    )
+    
+    items = [
+        trigger.TriggerSummary(
+            id=db_trigger.id,
+            timestamp=db_trigger.timestamp,
+            label=db_trigger.label,
+            part_instance=db_trigger.part_instance,
+            belt=db_trigger.belt,
+            part=db_trigger.part,
+            image_count=image_count,
+            defect_count=defect_count
+        )
+        for db_trigger, image_count, defect_count in rows[:limit]
+    ]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+    
+    return trigger.TriggerPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/{trigger_id}/bundle", response_model=trigger.TriggerBundle)
+async def read_trigger_bundle(
+    trigger_id: int,
+    analysis: bool = Query(False, description="Include the region analysis verdict per image"),
+    include_suppressed: bool = Query(True, description="Include defects suppressed as repeats of earlier parts"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a trigger with all of its images, their defects and the regions of their cameras.
+    
+    Replaces the per-image and per-camera request waterfall when opening a part; the
+    trigger, images, defects and regions are loaded with four queries however many
+    cameras took part.
+    """
+    db_trigger = await async_crud.get_trigger(db, trigger_id=trigger_id)
+    if db_trigger is None:
+        raise HTTPException(status_code=404, detail="Trigger not found")
+    
+    db_images = await async_crud.get_images_by_trigger(db, trigger_id=trigger_id)
+    
+    defect_rows = await async_crud.get_defect_overlay_rows_by_images(
+        db, [img.id for img in db_images], include_suppressed=include_suppressed
+    )
+    defects_by_image = defaultdict(list)
+    for row in defect_rows:
+        defects_by_image[row.image_id].append(row)
+    
+    camera_ids = sorted({img.camera_id for img in db_images if img.camera_id})
+    regions = await async_crud.get_regions_by_cameras(db, camera_ids)
+    regions_by_camera = defaultdict(list)
+    for region in regions:
+        regions_by_camera[region.camera_id].append(region)
+    
+    images = []
+    has_failures = False if analysis else None
+    for db_image in db_images:
+        img_width = db_image.width or image_service.DEFAULT_IMAGE_SIZE
+        img_height = db_image.height or image_service.DEFAULT_IMAGE_SIZE
+        image_defects = defects_by_image.get(db_image.id, [])
+        
+        image_analysis = None
+        if analysis:
+            image_analysis = analysis_service.analyze_image_defects(
+                db_image.id,
+                db_image.camera_id,
+                image_defects,
+                regions_by_camera.get(db_image.camera_id, [])
+            )
+            has_failures = has_failures or image_analysis["overall_analysis"]["has_failures"]
+        
+        images.append(trigger.TriggerBundleImage(
+            id=db_image.id,
+            trigger_id=db_image.trigger_id,
+            width=db_image.width,
+            height=db_image.height,
+            camera_id=db_image.camera_id,
+            media_id=db_image.media_id,
+            image=db_image.image,
+            ether_checked=db_image.ether_checked,
+            image_url=image_service.get_image_url_by_id(db_image.id),
+            defect_count=len(image_defects),
+            defects=[
+                image_service.defect_to_normalized_dict(row, img_width, img_height)
+                for row in image_defects
+            ],
+            analysis=image_analysis
+        ))
+    
+    return {
+        "trigger": db_trigger,
+        "images": images,
+        "regions": regions,
+        "has_failures": has_failures
+    }
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from .endpoints import cameras, images, defects, regions
+from .endpoints import cameras, images, defects, regions, triggers, exports, inspection, jobs, stream, system
 
 api_router = APIRouter()
 
@@ -8,4 +8,10 @@ api_router = APIRouter()
 api_router.include_router(cameras.router, prefix="/cameras", tags=["cameras"])
 api_router.include_router(images.router, prefix="/images", tags=["images"])
 api_router.include_router(defects.router, prefix="/defects", tags=["defects"])
-api_router.include_router(regions.router, prefix="/regions", tags=["regions"])
\ No newline at end of file
+api_router.include_router(regions.router, prefix="/regions", tags=["regions"])
+api_router.include_router(triggers.router, prefix="/triggers", tags=["triggers"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(inspection.router, prefix="/inspection", tags=["inspection"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(stream.router, prefix="/stream", tags=["stream"])
+api_router.include_router(system.router, prefix="/system", tags=["system"])
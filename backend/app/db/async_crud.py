@@ -0,0 +1,183 @@
+"""
+Async equivalents of the read operations in crud, for routes using get_async_db.
+Statements shared with crud are built there so both paths issue identical SQL.
+"""
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import desc, func, select
+from . import models, crud
+from .cache import reference_cache
+from .journal import disposition_journal
+
+
+# Camera operations
+async def get_camera(db: AsyncSession, serial_number: str):
+    async def load():
+        result = await db.execute(
+            select(models.Camera).where(models.Camera.serial_number == serial_number)
+        )
+        return result.scalars().first()
+    
+    return await reference_cache.aget_or_load("Cameras", serial_number, load)
+
+
+async def get_cameras(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(models.Camera).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def get_cameras_by_group(db: AsyncSession, group_id: int):
+    result = await db.execute(select(models.Camera).where(models.Camera.group_id == group_id))
+    return result.scalars().all()
+
+
+async def get_camera_snapshot(db: AsyncSession):
+    result = await db.execute(crud.camera_snapshot_statement())
+    return result.all()
+
+
+# Image operations
+async def get_image(db: AsyncSession, image_id: int):
+    result = await db.execute(select(models.Image).where(models.Image.id == image_id))
+    return result.scalars().first()
+
+
+async def get_latest_images_with_defect_counts(db: AsyncSession):
+    result = await db.execute(crud.latest_images_with_defect_counts_statement())
+    return result.all()
+
+
+async def get_image_with_defect_count(db: AsyncSession, image_id: int):
+    # Returns None if the image doesn't exist
+    result = await db.execute(crud.image_with_defect_count_statement(image_id))
+    return result.first()
+
+
+async def get_images_by_trigger(db: AsyncSession, trigger_id: int):
+    result = await db.execute(select(models.Image).where(models.Image.trigger_id == trigger_id))
+    return result.scalars().all()
+
+
+async def get_camera_latest_image(db: AsyncSession, camera_id: str):
+    # The trigger is eager loaded; lazy loads aren't available on an AsyncSession
+    result = await db.execute(
+        select(models.Image)
+        .options(joinedload(models.Image.trigger))
+        .where(models.Image.camera_id == camera_id)
+        .order_by(desc(models.Image.id))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+# Defect operations
+def _with_pending_dispositions(db: AsyncSession, defects):
+    # Show dispositions still queued in the journal; detached so they're never flushed from here
+    for defect in defects:
+        if disposition_journal.pending_for(defect.id) is not None:
+            db.expunge(defect)
+            disposition_journal.apply_pending(defect)
+    return defects
+
+
+async def get_defect(db: AsyncSession, defect_id: int):
+    result = await db.execute(select(models.Defect).where(models.Defect.id == defect_id))
+    defect = result.scalars().first()
+    if defect is not None:
+        _with_pending_dispositions(db, [defect])
+    return defect
+
+
+async def get_defects_by_image(db: AsyncSession, image_id: int, include_suppressed: bool = True):
+    query = select(models.Defect).where(models.Defect.image_id == image_id)
+    if not include_suppressed:
+        query = query.where(models.Defect.supression_timestamp.is_(None))
+    
+    result = await db.execute(query)
+    return _with_pending_dispositions(db, result.scalars().all())
+
+
+def _defect_overlay_statement(include_suppressed: bool = True):
+    # Only the columns the overlay needs, as plain rows rather than ORM objects
+    query = select(
+        models.Defect.id,
+        models.Defect.image_id,
+        models.Defect.x,
+        models.Defect.y,
+        models.Defect.width,
+        models.Defect.height,
+        models.Defect.confidence,
+        models.Defect.type,
+        models.Defect.disposition
+    )
+    
+    # Repeats flagged by the suppression worker have a supression_timestamp
+    if not include_suppressed:
+        query = query.where(models.Defect.supression_timestamp.is_(None))
+    return query
+
+
+async def get_defect_overlay_rows(db: AsyncSession, image_id: int, include_suppressed: bool = True):
+    result = await db.execute(
+        _defect_overlay_statement(include_suppressed).where(models.Defect.image_id == image_id)
+    )
+    return disposition_journal.apply_pending_rows(result.all())
+
+
+async def get_defect_overlay_rows_by_images(db: AsyncSession, image_ids: List[int], include_suppressed: bool = True):
+    # One IN query for a whole trigger instead of one query per image
+    if not image_ids:
+        return []
+    
+    result = await db.execute(
+        _defect_overlay_statement(include_suppressed)
+        .where(models.Defect.image_id.in_(image_ids))
+        .order_by(models.Defect.image_id, models.Defect.id)
+    )
+    return disposition_journal.apply_pending_rows(result.all())
+
+
+async def count_defects_by_image(db: AsyncSession, image_id: int) -> int:
+    result = await db.execute(
+        select(func.count(models.Defect.id)).where(models.Defect.image_id == image_id)
+    )
+    return result.scalar_one()
+
+
+# Region operations
+async def get_regions_by_cameras(db: AsyncSession, camera_ids: List[str], active_only: bool = True):
+    # Uncached: a single IN query keeps the statement count independent of the camera count
+    if not camera_ids:
+        return []
+    
+    query = select(models.Region).where(models.Region.camera_id.in_(camera_ids))
+    
+    if active_only:
+        query = query.where(models.Region.active == True)
+    
+    result = await db.execute(query.order_by(models.Region.camera_id, models.Region.id))
+    return result.scalars().all()
+
+
+# Defect heatmap operations
+async def get_heatmap_histograms(db: AsyncSession, camera_id: str, grid_size: int, start=None, end=None):
+    result = await db.execute(crud.heatmap_histograms_statement(camera_id, grid_size, start, end))
+    return result.all()
+
+
+# Trigger operations
+async def get_latest_trigger(db: AsyncSession):
+    result = await db.execute(select(models.Trigger).order_by(desc(models.Trigger.id)).limit(1))
+    return result.scalars().first()
+
+
+async def get_trigger(db: AsyncSession, trigger_id: int):
+    result = await db.execute(select(models.Trigger).where(models.Trigger.id == trigger_id))
+    return result.scalars().first()
+
+
+async def get_trigger_history(db: AsyncSession, limit: int, **filters):
+    result = await db.execute(crud.trigger_history_statement(limit, **filters))
+    return result.all()
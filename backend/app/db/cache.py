@@ -0,0 +1,170 @@
+import copy
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import inspect
+
+from ..utils.config import load_config
+
+# Load configuration
+config = load_config()
+CACHE_CONFIG = config.get('reference_cache', {})
+
+# Sentinel for "not cached", so None results can be told apart from misses
+MISS = object()
+
+
+class ReferenceRow:
+    """
+    Read-only copy of a cached row's column values, with attribute access like the ORM
+    object it was taken from (so response models with orm_mode accept it). Relationships
+    aren't copied; every lookup gets its own copy, so callers can't change what others see.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: Dict[str, Any]):
+        object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"Cached reference rows are read-only (setting '{name}')")
+
+    def __repr__(self) -> str:
+        return f"ReferenceRow({self._values!r})"
+
+
+def _snapshot(value: Any) -> Any:
+    # Column values of an ORM object (or list of them), taken while it is still loaded
+    if isinstance(value, list):
+        return [_snapshot(item) for item in value]
+    return {attr.key: getattr(value, attr.key) for attr in inspect(value).mapper.column_attrs}
+
+
+def _rows(snapshot: Any) -> Any:
+    if isinstance(snapshot, list):
+        return [_rows(item) for item in snapshot]
+    return ReferenceRow(copy.deepcopy(snapshot))
+
+
+class ReferenceCache:
+    """
+    TTL cache for rarely changing reference tables (Cameras, Part_Information, Regions, Current_Part).
+
+    Rows are stored as their column values and handed out as ReferenceRow copies, on a miss
+    as well as on a hit, never as ORM objects shared between sessions. Every table has a version counter. invalidate()
+    bumps it, which turns every entry stored under an older version into a miss, and a load
+    that raced with a write is stored under the version read before the load so it is never
+    served. Writes from other processes arrive as notifications from the database (see
+    sql/stream_notify.sql and event_service.TriggerListener), which call invalidate() too.
+    """
+
+    def __init__(self, ttl_seconds: Dict[str, float], enabled: bool = True, default_ttl: float = 60.0):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.default_ttl = default_ttl
+        self._entries: Dict[Tuple[str, Hashable], Tuple[Any, float, int]] = {}
+        self._versions: Dict[str, int] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def get(self, table: str, key: Hashable) -> Any:
+        """Return a copy of the cached rows, or MISS if absent, expired or invalidated."""
+        if not self.enabled:
+            return MISS
+
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry is not None:
+                value, stored_at, version = entry
+                ttl = self.ttl_seconds.get(table, self.default_ttl)
+                if version == self.version(table) and time.monotonic() - stored_at < ttl:
+                    self._hits[table] = self._hits.get(table, 0) + 1
+                    return _rows(value)
+                del self._entries[(table, key)]
+
+            self._misses[table] = self._misses.get(table, 0) + 1
+            return MISS
+
+    def put(self, table: str, key: Hashable, value: Any, version: int) -> Any:
+        """
+        Store the column values of ORM rows loaded while the table was at `version`, and
+        return them as ReferenceRow copies. None isn't cached so new rows show up immediately.
+        """
+        if value is None:
+            return None
+
+        snapshot = _snapshot(value)
+        if self.enabled:
+            with self._lock:
+                self._entries[(table, key)] = (snapshot, time.monotonic(), version)
+        return _rows(snapshot)
+
+    def get_or_load(self, table: str, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Cached rows, or load() stored and returned the same way: callers get ReferenceRow
+        copies whether or not the lookup hit (or the cache is enabled at all).
+        """
+        value = self.get(table, key)
+        if value is not MISS:
+            return value
+
+        version = self.version(table)
+        return self.put(table, key, load(), version)
+
+    async def aget_or_load(self, table: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(table, key)
+        if value is not MISS:
+            return value
+
+        version = self.version(table)
+        return self.put(table, key, await load(), version)
+
+    def invalidate(self, table: str):
+        """Drop every cached entry for a table; call after writing to it."""
+        with self._lock:
+            self._versions[table] = self.version(table) + 1
+            self._entries = {k: v for k, v in self._entries.items() if k[0] != table}
+
+    def invalidate_all(self):
+        """Drop every entry, e.g. after missing notifications while not listening."""
+        with self._lock:
+            for table in {k[0] for k in self._entries} | set(self._versions):
+                self._versions[table] = self.version(table) + 1
+            self._entries = {}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-table hit/miss counts and hit ratio."""
+        with self._lock:
+            tables = set(self._hits) | set(self._misses) | set(self.ttl_seconds)
+            result = {}
+            for table in sorted(tables):
+                hits = self._hits.get(table, 0)
+                misses = self._misses.get(table, 0)
+                lookups = hits + misses
+                result[table] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": hits / lookups if lookups else None,
+                    "entries": sum(1 for k in self._entries if k[0] == table),
+                    "version": self.version(table),
+                    "ttl_seconds": self.ttl_seconds.get(table, self.default_ttl)
+                }
+            return result
+
+
+reference_cache = ReferenceCache(
+    ttl_seconds=CACHE_CONFIG.get('ttl_seconds', {}),
+    enabled=CACHE_CONFIG.get('enabled', False),
+    default_ttl=CACHE_CONFIG.get('default_ttl_seconds', 60.0)
+)
@@ -1,13 +1,18 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, and_, or_, func, select, exists, tuple_, insert, update, values, column, case, cast, text, union_all, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
 from . import models
+from .cache import reference_cache
 
 
 # Camera operations
 def get_camera(db: Session, serial_number: str):
-    return db.query(models.Camera).filter(models.Camera.serial_number == serial_number).first()
+    return reference_cache.get_or_load(
+        "Cameras", serial_number,
+        lambda: db.query(models.Camera).filter(models.Camera.serial_number == serial_number).first()
+    )
 
 
 def get_cameras(db: Session, skip: int = 0, limit: int = 100):
@@ -18,21 +23,80 @@ def get_cameras_by_group(db: Session, group_id: int):
     return db.query(models.Camera).filter(models.Camera.group_id == group_id).all()
 
 
+def camera_snapshot_statement():
+    """
+    Select the latest image, trigger timestamp and defect count for every camera in one query.
+    Cameras without images are included with NULL image columns.
+    """
+    latest = _latest_image_ids_subquery()
+    defect_counts = _defect_counts_subquery(
+        models.Defect.image_id.in_(select(latest.c.max_id))
+    )
+    
+    return (
+        select(
+            models.Camera.serial_number,
+            models.Camera.group_id,
+            models.Image.id.label("image_id"),
+            models.Trigger.id.label("trigger_id"),
+            models.Trigger.timestamp,
+            func.coalesce(defect_counts.c.defect_count, 0).label("defect_count")
+        )
+        .select_from(models.Camera)
+        .outerjoin(latest, latest.c.camera_id == models.Camera.serial_number)
+        .outerjoin(models.Image, models.Image.id == latest.c.max_id)
+        .outerjoin(models.Trigger, models.Trigger.id == models.Image.trigger_id)
+        .outerjoin(defect_counts, defect_counts.c.image_id == models.Image.id)
+        .order_by(models.Camera.serial_number)
+    )
+
+
+def get_camera_snapshot(db: Session):
+    return db.execute(camera_snapshot_statement()).all()
+
+
 # Image operations
 def get_image(db: Session, image_id: int):
     return db.query(models.Image).filter(models.Image.id == image_id).first()
 
 
-def get_latest_images(db: Session, limit_per_camera: int = 1):
-    # This query gets the latest image for each camera
-    subquery = (
-        db.query(
-            models.Image.camera_id,
-            func.max(models.Image.id).label("max_id")
+def _latest_image_ids_subquery():
+    # Latest image id for each camera. Each camera is resolved with a single probe of the
+    # ("camera", id DESC) index, so the cost grows with the camera count, not the Images table.
+    latest_id = (
+        select(models.Image.id)
+        .where(models.Image.camera_id == models.Camera.serial_number)
+        .order_by(desc(models.Image.id))
+        .limit(1)
+        .correlate(models.Camera)
+        .scalar_subquery()
+    )
+    
+    return (
+        select(
+            models.Camera.serial_number.label("camera_id"),
+            latest_id.label("max_id")
+        )
+        .subquery()
+    )
+
+
+def _defect_counts_subquery(*criteria):
+    # Defect count per image, restricted to the images matched by criteria
+    return (
+        select(
+            models.Defect.image_id,
+            func.count(models.Defect.id).label("defect_count")
         )
-        .group_by(models.Image.camera_id)
+        .where(*criteria)
+        .group_by(models.Defect.image_id)
         .subquery()
     )
+
+
+def get_latest_images(db: Session, limit_per_camera: int = 1):
+    # This query gets the latest image for each camera
+    subquery = _latest_image_ids_subquery()
     
     return (
         db.query(models.Image)
@@ -47,6 +111,54 @@ def get_latest_images(db: Session, limit_per_camera: int = 1):
     )
 
 
+def latest_images_with_defect_counts_statement():
+    """
+    Select (image, defect_count) rows for the latest image of each camera.
+    Trigger and camera are eager loaded so the result comes from a single statement.
+    """
+    latest = _latest_image_ids_subquery()
+    defect_counts = _defect_counts_subquery(
+        models.Defect.image_id.in_(select(latest.c.max_id))
+    )
+    
+    return (
+        select(models.Image, func.coalesce(defect_counts.c.defect_count, 0))
+        .join(
+            latest,
+            and_(
+                models.Image.camera_id == latest.c.camera_id,
+                models.Image.id == latest.c.max_id
+            )
+        )
+        .outerjoin(defect_counts, defect_counts.c.image_id == models.Image.id)
+        .options(joinedload(models.Image.trigger), joinedload(models.Image.camera))
+    )
+
+
+def get_latest_images_with_defect_counts(db: Session):
+    return db.execute(latest_images_with_defect_counts_statement()).all()
+
+
+def image_with_defect_count_statement(image_id: int):
+    """
+    Select an (image, defect_count) row for a single image.
+    Trigger and camera are eager loaded so the result comes from a single statement.
+    """
+    defect_counts = _defect_counts_subquery(models.Defect.image_id == image_id)
+    
+    return (
+        select(models.Image, func.coalesce(defect_counts.c.defect_count, 0))
+        .outerjoin(defect_counts, defect_counts.c.image_id == models.Image.id)
+        .options(joinedload(models.Image.trigger), joinedload(models.Image.camera))
+        .where(models.Image.id == image_id)
+    )
+
+
+def get_image_with_defect_count(db: Session, image_id: int):
+    # Returns None if the image doesn't exist
+    return db.execute(image_with_defect_count_statement(image_id)).first()
+
+
 def get_images_by_trigger(db: Session, trigger_id: int):
     return (
         db.query(models.Image)
@@ -78,17 +190,742 @@ def get_defects_by_image(db: Session, image_id: int):
 
 
 def update_defect_disposition(
-    db: Session, defect_id: int, disposition: str
+    db: Session, defect_id: int, disposition: str, notes: Optional[str] = None
 ):
     defect = db.query(models.Defect).filter(models.Defect.id == defect_id).first()
     if defect:
         defect.disposition = disposition
-        defect.dispositioned_at = datetime.now()
+        # UTC, like journaled dispositions and the batch path's now()
+        defect.dispositioned_at = datetime.now(timezone.utc)
+        if notes:
+            # Assign a new dict; in-place changes to a JSONB column aren't flushed
+            defect._metadata = {**(defect._metadata or {}), "disposition_notes": notes}
         db.commit()
         db.refresh(defect)
     return defect
 
 
+def get_existing_defect_ids(db: Session, defect_ids: List[int]) -> set:
+    return {row.id for row in db.query(models.Defect.id).filter(models.Defect.id.in_(defect_ids))}
+
+
+def update_defect_dispositions(db: Session, updates: List[Dict[str, Any]]):
+    """
+    Apply many {defect_id, disposition, notes} updates with one UPDATE ... FROM (VALUES ...)
+    and one commit. Notes are merged into the metadata JSONB in the same statement.
+    An entry's optional dispositioned_at is kept (queued dispositions); otherwise it's now().
+    
+    Returns the updated (id, disposition, dispositioned_at) rows; ids that don't exist are
+    simply absent. If an id appears more than once, its last entry wins.
+    """
+    latest = {update["defect_id"]: update for update in updates}
+    if not latest:
+        return []
+    
+    batch = values(
+        column("id", Integer),
+        column("disposition", String),
+        column("notes", String),
+        column("dispositioned_at", DateTime(timezone=True)),
+        name="batch"
+    ).data([
+        (defect_id, update["disposition"], update.get("notes") or None, update.get("dispositioned_at"))
+        for defect_id, update in latest.items()
+    ])
+    
+    notes_metadata = func.coalesce(models.Defect._metadata, func.jsonb_build_object()).op("||", return_type=JSONB)(
+        func.jsonb_build_object("disposition_notes", batch.c.notes)
+    )
+    
+    result = db.execute(
+        update(models.Defect)
+        .where(models.Defect.id == batch.c.id)
+        .values({
+            models.Defect.disposition: batch.c.disposition,
+            models.Defect.dispositioned_at: func.coalesce(
+                cast(batch.c.dispositioned_at, DateTime(timezone=True)), func.now()
+            ),
+            models.Defect._metadata: case(
+                (batch.c.notes.is_(None), models.Defect._metadata),
+                else_=notes_metadata
+            )
+        })
+        .returning(models.Defect.id, models.Defect.disposition, models.Defect.dispositioned_at)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    db.commit()
+    return rows
+
+
+def _defect_counts_by(db: Session, column, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    # One aggregate query: defect count per value of column, optionally limited to a trigger time window
+    query = db.query(column, func.count(models.Defect.id)).select_from(models.Defect)
+    
+    if column is models.Image.camera_id or start or end:
+        query = query.join(models.Image, models.Defect.image_id == models.Image.id)
+    if start or end:
+        query = query.join(models.Trigger, models.Image.trigger_id == models.Trigger.id)
+        if start:
+            query = query.filter(models.Trigger.timestamp >= start)
+        if end:
+            query = query.filter(models.Trigger.timestamp < end)
+    
+    return query.group_by(column).all()
+
+
+def get_defect_statistics(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Count defects by type, disposition and camera straight from the Defects table.
+    Issues one aggregate query per dimension; the total is the sum of the type groups.
+    """
+    by_type = _defect_counts_by(db, models.Defect.type, start, end)
+    by_disposition = _defect_counts_by(db, models.Defect.disposition, start, end)
+    by_camera = _defect_counts_by(db, models.Image.camera_id, start, end)
+    
+    return {
+        "total_defects": sum(count for _, count in by_type),
+        "defects_by_type": {key: count for key, count in by_type if key},
+        "defects_by_disposition": {key: count for key, count in by_disposition if key},
+        "defects_by_camera": {key: count for key, count in by_camera if key}
+    }
+
+
+def _hour_floor(moment: datetime):
+    # Truncated in SQL so the buckets line up with the date_trunc the rollup triggers use
+    return func.date_trunc("hour", cast(moment, DateTime(timezone=True)))
+
+
+def _hour_ceil(moment: datetime):
+    floor = _hour_floor(moment)
+    return case((floor == cast(moment, DateTime(timezone=True)), floor), else_=floor + timedelta(hours=1))
+
+
+def _add_grouped_counts(statistics: Dict[str, Any], rows) -> None:
+    # GROUPING() sets a bit for every column that is aggregated away in a row's grouping set
+    for row in rows:
+        count = int(row.defect_count or 0)
+        if row.grouping_id == 0b011:
+            statistics["total_defects"] += count
+            if row.type:
+                by_type = statistics["defects_by_type"]
+                by_type[row.type] = by_type.get(row.type, 0) + count
+        elif row.grouping_id == 0b101 and row.disposition:
+            by_disposition = statistics["defects_by_disposition"]
+            by_disposition[row.disposition] = by_disposition.get(row.disposition, 0) + count
+        elif row.grouping_id == 0b110 and row.camera_id:
+            by_camera = statistics["defects_by_camera"]
+            by_camera[row.camera_id] = by_camera.get(row.camera_id, 0) + count
+
+
+def get_defect_statistics_from_rollup(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Count defects by type, disposition and camera from the hourly rollup in a single
+    GROUPING SETS query. The rollup covers the whole hours inside the window; the partial
+    hours at either edge are counted from the Defects table.
+
+    The counts differ from get_defect_statistics in two ways, which matter for unbounded
+    or wide windows: defects of triggers without a timestamp are never counted (they have
+    no hour), and archived parts stay counted (sql/archive.sql keeps the rollup), while
+    get_defect_statistics only sees the hot Defects table. Within the hot data and for
+    triggers with timestamps, both give the same result for any bounds.
+    """
+    rollup = models.DefectRollupHourly
+    query = db.query(
+        rollup.type,
+        rollup.disposition,
+        rollup.camera_id,
+        func.grouping(rollup.type, rollup.disposition, rollup.camera_id).label("grouping_id"),
+        func.sum(rollup.defect_count).label("defect_count")
+    )
+    if start:
+        query = query.filter(rollup.hour >= _hour_ceil(start))
+    if end:
+        query = query.filter(rollup.hour < _hour_floor(end))
+    rows = query.group_by(func.grouping_sets(rollup.type, rollup.disposition, rollup.camera_id)).all()
+    
+    statistics = {
+        "total_defects": 0,
+        "defects_by_type": {},
+        "defects_by_disposition": {},
+        "defects_by_camera": {}
+    }
+    _add_grouped_counts(statistics, rows)
+    
+    if start or end:
+        # Defects of triggers in the partial first and last hours, which the rollup buckets would over-count
+        edges = []
+        if start:
+            edges.append(models.Trigger.timestamp < _hour_ceil(start))
+        if end:
+            edges.append(models.Trigger.timestamp >= _hour_floor(end))
+        query = db.query(
+            models.Defect.type,
+            models.Defect.disposition,
+            models.Image.camera_id,
+            func.grouping(models.Defect.type, models.Defect.disposition, models.Image.camera_id).label("grouping_id"),
+            func.count(models.Defect.id).label("defect_count")
+        ).select_from(models.Defect).join(
+            models.Image, models.Defect.image_id == models.Image.id
+        ).join(
+            models.Trigger, models.Image.trigger_id == models.Trigger.id
+        ).filter(or_(*edges))
+        if start:
+            query = query.filter(models.Trigger.timestamp >= start)
+        if end:
+            query = query.filter(models.Trigger.timestamp < end)
+        _add_grouped_counts(statistics, query.group_by(
+            func.grouping_sets(models.Defect.type, models.Defect.disposition, models.Image.camera_id)
+        ).all())
+    
+    return statistics
+
+
+def _defect_export_select(
+    trigger, image, defect,
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    disposition: Optional[str] = None
+):
+    # The same export rows from the hot tables or their archive (models.Archived*)
+    query = (
+        select(
+            defect.id.label("defect_id"),
+            image.id.label("image_id"),
+            trigger.id.label("trigger_id"),
+            trigger.timestamp.label("trigger_timestamp"),
+            trigger.part,
+            trigger.part_instance,
+            trigger.belt,
+            models.Camera.serial_number.label("camera"),
+            models.Camera.group_id.label("camera_group"),
+            defect.x,
+            defect.y,
+            defect.width,
+            defect.height,
+            defect.confidence,
+            defect.type,
+            defect.disposition,
+            defect.dispositioned_at,
+            defect._metadata["disposition_notes"].astext.label("disposition_notes")
+        )
+        .join(image, defect.image_id == image.id)
+        .join(trigger, image.trigger_id == trigger.id)
+        .outerjoin(models.Camera, image.camera_id == models.Camera.serial_number)
+        .where(trigger.timestamp >= start, trigger.timestamp < end)
+    )
+    
+    if trigger is models.ArchivedTrigger:
+        # Every archive table is partitioned by trigger time; bound each one so the
+        # planner prunes all three to the months in [start, end)
+        query = query.where(
+            image.trigger_timestamp == trigger.timestamp,
+            defect.trigger_timestamp == image.trigger_timestamp,
+            image.trigger_timestamp >= start, image.trigger_timestamp < end,
+            defect.trigger_timestamp >= start, defect.trigger_timestamp < end
+        )
+    if camera_id is not None:
+        query = query.where(image.camera_id == camera_id)
+    if disposition is not None:
+        query = query.where(defect.disposition == disposition)
+    return query
+
+
+def defect_export_statement(
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    disposition: Optional[str] = None,
+    include_archive: bool = False
+):
+    """
+    Flat rows of defects with their image, trigger and camera for triggers in [start, end),
+    for streaming exports; execute with stream_results so rows aren't buffered.
+    With include_archive, parts already moved to the archive schema are included.
+    """
+    hot = _defect_export_select(models.Trigger, models.Image, models.Defect, start, end, camera_id, disposition)
+    if not include_archive:
+        return hot.order_by(models.Trigger.timestamp, models.Trigger.id, models.Defect.id)
+    
+    archived = _defect_export_select(
+        models.ArchivedTrigger, models.ArchivedImage, models.ArchivedDefect, start, end, camera_id, disposition
+    )
+    rows = union_all(archived, hot).subquery()
+    return select(*rows.c).order_by(rows.c.trigger_timestamp, rows.c.trigger_id, rows.c.defect_id)
+
+
+def _training_images_filter(
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    dispositions: Optional[List[str]] = None
+):
+    criteria = [models.Trigger.timestamp >= start, models.Trigger.timestamp < end]
+    if camera_id is not None:
+        criteria.append(models.Image.camera_id == camera_id)
+    if dispositions:
+        criteria.append(exists(
+            select(models.Defect.id)
+            .where(models.Defect.image_id == models.Image.id, models.Defect.disposition.in_(dispositions))
+        ))
+    return criteria
+
+
+def training_images_statement(
+    start: datetime,
+    end: datetime,
+    after_image_id: int = 0,
+    limit: int = 100,
+    camera_id: Optional[str] = None,
+    dispositions: Optional[List[str]] = None
+):
+    """
+    Images of triggers in [start, end) (with a defect in one of `dispositions`, if given),
+    in image id order and keyset paginated on id so an interrupted export can continue.
+    """
+    return (
+        select(models.Image.id, models.Image.image, models.Image.width, models.Image.height, models.Image.camera_id)
+        .join(models.Trigger, models.Image.trigger_id == models.Trigger.id)
+        .where(models.Image.id > after_image_id, *_training_images_filter(start, end, camera_id, dispositions))
+        .order_by(models.Image.id)
+        .limit(limit)
+    )
+
+
+def count_training_images(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    dispositions: Optional[List[str]] = None
+) -> int:
+    return db.execute(
+        select(func.count(models.Image.id))
+        .join(models.Trigger, models.Image.trigger_id == models.Trigger.id)
+        .where(*_training_images_filter(start, end, camera_id, dispositions))
+    ).scalar_one()
+
+
+def get_defects_by_images(db: Session, image_ids: List[int], dispositions: Optional[List[str]] = None):
+    # One IN query for a batch of images
+    if not image_ids:
+        return []
+    
+    query = db.query(models.Defect).filter(models.Defect.image_id.in_(image_ids))
+    if dispositions:
+        query = query.filter(models.Defect.disposition.in_(dispositions))
+    return query.order_by(models.Defect.image_id, models.Defect.id).all()
+
+
+def _suppression_defects_query(db: Session):
+    # Defects with the camera and trigger of their image
+    return (
+        db.query(
+            models.Defect.id,
+            models.Defect.x,
+            models.Defect.y,
+            models.Defect.width,
+            models.Defect.height,
+            models.Image.camera_id,
+            models.Image.trigger_id
+        )
+        .join(models.Image, models.Defect.image_id == models.Image.id)
+    )
+
+
+def get_defects_for_suppression(db: Session, after_id: int, limit: int, until_id: Optional[int] = None):
+    query = _suppression_defects_query(db).filter(models.Defect.id > after_id)
+    if until_id is not None:
+        query = query.filter(models.Defect.id <= until_id)
+    return query.order_by(models.Defect.id).limit(limit).all()
+
+
+def get_unsuppressed_defects_by_ids(db: Session, defect_ids: List[int]):
+    # Defects among defect_ids without a suppression yet, in id order
+    return _suppression_defects_query(db).filter(
+        models.Defect.id.in_(defect_ids),
+        ~exists().where(models.SuppressedDefect.defect == models.Defect.id)
+    ).order_by(models.Defect.id).all()
+
+
+def create_suppressed_defects(
+    db: Session,
+    suppressed: List[Tuple[int, int, float]],
+    suppressed_at: datetime,
+    last_defect_id: Optional[int] = None
+) -> int:
+    """
+    Record (defect_id, suppressed_by, similarity) suppressions and stamp the defects'
+    supression_timestamp, in one transaction. Defects already suppressed are skipped.
+    With last_defect_id, the worker's watermark is advanced in the same transaction.
+    """
+    defect_ids = [defect_id for defect_id, _, _ in suppressed]
+    already = {
+        row.defect for row in
+        db.query(models.SuppressedDefect.defect).filter(models.SuppressedDefect.defect.in_(defect_ids))
+    } if defect_ids else set()
+    new = [entry for entry in suppressed if entry[0] not in already]
+
+    if new:
+        db.execute(
+            insert(models.SuppressedDefect),
+            [{"defect": defect_id, "suppressed_by": by, "similarity": similarity} for defect_id, by, similarity in new]
+        )
+        # ORM bulk UPDATE by primary key
+        db.execute(
+            update(models.Defect),
+            [{"id": defect_id, "supression_timestamp": suppressed_at} for defect_id, _, _ in new]
+        )
+    if last_defect_id is not None:
+        statement = pg_insert(models.SuppressionWatermark).values(id=1, last_defect_id=last_defect_id)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[models.SuppressionWatermark.id],
+            set_={"last_defect_id": statement.excluded.last_defect_id}
+        ))
+    db.commit()
+    return len(new)
+
+
+def get_suppression_watermark(db: Session) -> Optional[int]:
+    # None before the worker's first run
+    return db.query(models.SuppressionWatermark.last_defect_id).filter(models.SuppressionWatermark.id == 1).scalar()
+
+
+# Retention operations
+def archive_parts(db: Session, cutoff: datetime, limit: int) -> Tuple[int, List[str]]:
+    """
+    Move up to limit of the oldest parts before cutoff, with their images, defects and
+    suppressions, to the archive schema in one transaction (sql/archive.sql).
+    Returns the number of parts moved and the moved image paths.
+    """
+    row = db.execute(
+        select(column("trigger_count"), column("image_paths"))
+        .select_from(func.archive.archive_parts(cutoff, limit))
+    ).one()
+    db.commit()
+    return row.trigger_count, list(row.image_paths or [])
+
+
+def drop_archive_partitions(db: Session, before: datetime, detach_only: bool = True) -> List[str]:
+    # Detach (and unless detach_only, drop) archive months ending on or before `before`
+    names = db.execute(select(func.archive.drop_partitions(before, detach_only))).scalars().all()
+    db.commit()
+    return names
+
+
+# Defect heatmap operations
+def lock_heatmaps(db: Session, grid_size: int):
+    """
+    Serialize heatmap updates of one grid size until the commit, so the worker and
+    `manage.py build-heatmaps` never read the same watermark or merge into the same
+    bucket at once (a bucket neither has inserted yet can't be locked FOR UPDATE).
+    """
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtext("defect_heatmap"), grid_size)))
+
+
+def get_heatmap_watermark(db: Session, grid_size: int) -> int:
+    return db.query(func.max(models.DefectHeatmapHourly.last_defect_id)).filter(
+        models.DefectHeatmapHourly.grid_size == grid_size
+    ).scalar() or 0
+
+
+def _heatmap_defects_query(db: Session):
+    # Defects with their image size, camera and trigger hour
+    return (
+        db.query(
+            models.Defect.id,
+            models.Defect.x,
+            models.Defect.y,
+            models.Defect.width,
+            models.Defect.height,
+            models.Image.width.label("image_width"),
+            models.Image.height.label("image_height"),
+            models.Image.camera_id,
+            func.date_trunc("hour", models.Trigger.timestamp).label("hour")
+        )
+        .join(models.Image, models.Defect.image_id == models.Image.id)
+        .outerjoin(models.Trigger, models.Image.trigger_id == models.Trigger.id)
+    )
+
+
+def get_defects_for_heatmap(db: Session, after_id: int, limit: int, until_id: Optional[int] = None):
+    query = _heatmap_defects_query(db).filter(models.Defect.id > after_id)
+    if until_id is not None:
+        query = query.filter(models.Defect.id <= until_id)
+    return query.order_by(models.Defect.id).limit(limit).all()
+
+
+def get_defects_for_heatmap_by_ids(db: Session, defect_ids: List[int]):
+    return _heatmap_defects_query(db).filter(models.Defect.id.in_(defect_ids)).order_by(models.Defect.id).all()
+
+
+def heatmap_histograms_statement(
+    camera_id: str, grid_size: int, start: Optional[datetime] = None, end: Optional[datetime] = None
+):
+    heatmap = models.DefectHeatmapHourly
+    query = select(heatmap.hour, heatmap.histogram, heatmap.defect_count).where(
+        heatmap.camera_id == camera_id,
+        heatmap.grid_size == grid_size
+    )
+    if start:
+        query = query.where(heatmap.hour >= start.replace(minute=0, second=0, microsecond=0))
+    if end:
+        query = query.where(heatmap.hour < end)
+    return query
+
+
+def get_heatmap_buckets(db: Session, keys: List[Tuple[str, datetime]], grid_size: int):
+    """Existing (camera, hour) buckets for an update, locked until the commit."""
+    heatmap = models.DefectHeatmapHourly
+    return (
+        db.query(heatmap)
+        .filter(heatmap.grid_size == grid_size, tuple_(heatmap.camera_id, heatmap.hour).in_(keys))
+        .with_for_update()
+        .all()
+    )
+
+
+def save_heatmap_buckets(db: Session, buckets: List[Dict[str, Any]]):
+    # Upsert whole histograms (already merged by the caller) and commit
+    if buckets:
+        statement = pg_insert(models.DefectHeatmapHourly).values(buckets)
+        db.execute(statement.on_conflict_do_update(
+            constraint="Defect_Heatmap_Hourly_bucket_unique",
+            set_={
+                "histogram": statement.excluded.histogram,
+                "defect_count": statement.excluded.defect_count,
+                # Backfills of older ranges must not move the watermark back
+                "last_defect_id": func.greatest(
+                    models.DefectHeatmapHourly.last_defect_id, statement.excluded.last_defect_id
+                )
+            }
+        ))
+    db.commit()
+
+
+# HumanInspect ingest operations
+def get_processed_filenames(db: Session, filenames: List[str]) -> set:
+    return {
+        row.filename for row in
+        db.query(models.ProcessedFile.filename).filter(models.ProcessedFile.filename.in_(filenames))
+    }
+
+
+def insert_human_inspect_rows(db: Session, rows: List[Dict[str, Any]]):
+    # executemany; the caller commits together with mark_files_processed
+    created_at = datetime.now()
+    db.execute(insert(models.HumanInspect), [{**row, "created_at": created_at} for row in rows])
+
+
+def mark_files_processed(db: Session, filenames: List[str], processed_at: datetime):
+    # No ON CONFLICT: a file loaded concurrently by another run fails the whole transaction
+    db.execute(
+        insert(models.ProcessedFile),
+        [{"filename": filename, "processed_at": processed_at} for filename in filenames]
+    )
+
+
+# Inspection correlation operations
+AGREEMENT_COUNTERS = ("both_fail", "machine_only", "human_only", "both_pass", "unmatched")
+
+
+def get_correlation_watermark(db: Session) -> int:
+    return db.query(models.CorrelationWatermark.last_human_inspect_id).filter(
+        models.CorrelationWatermark.id == 1
+    ).scalar() or 0
+
+
+def get_human_inspect_for_correlation(
+    db: Session, after_id: int, limit: int, until_id: Optional[int] = None, unlinked_only: bool = False
+):
+    # unlinked_only: rows without any link yet (hot or archived), e.g. committed after later ids were correlated
+    query = db.query(
+        models.HumanInspect.id,
+        models.HumanInspect.serial_no,
+        models.HumanInspect.pass_fail,
+        models.HumanInspect.defect_area,
+        func.coalesce(models.HumanInspect.scan_datetime, models.HumanInspect.created_at).label("scanned_at")
+    ).filter(models.HumanInspect.id > after_id)
+    if until_id is not None:
+        query = query.filter(models.HumanInspect.id <= until_id)
+    if unlinked_only:
+        query = query.filter(
+            ~exists().where(models.InspectionLink.human_inspect_id == models.HumanInspect.id),
+            ~exists().where(models.ArchivedInspectionLink.human_inspect_id == models.HumanInspect.id)
+        )
+    return query.order_by(models.HumanInspect.id).limit(limit).all()
+
+
+def get_triggers_between(db: Session, start: datetime, end: datetime):
+    # Range scan on Triggers_timestamp_id_desc_idx
+    return db.query(models.Trigger.id, models.Trigger.timestamp, models.Trigger.part_instance).filter(
+        models.Trigger.timestamp >= start,
+        models.Trigger.timestamp <= end,
+        models.Trigger.part_instance.isnot(None)
+    ).all()
+
+
+def get_images_by_triggers(db: Session, trigger_ids: List[int]):
+    return db.query(models.Image.id, models.Image.trigger_id, models.Image.camera_id).filter(
+        models.Image.trigger_id.in_(trigger_ids)
+    ).all()
+
+
+def get_unsuppressed_defect_boxes(db: Session, image_ids: List[int]):
+    return db.query(
+        models.Defect.image_id,
+        models.Defect.x,
+        models.Defect.y,
+        models.Defect.width,
+        models.Defect.height
+    ).filter(
+        models.Defect.image_id.in_(image_ids),
+        models.Defect.supression_timestamp.is_(None)
+    ).all()
+
+
+def create_inspection_links(db: Session, links: List[Dict[str, Any]], last_human_inspect_id: Optional[int] = None) -> int:
+    """
+    Insert links and add the ones actually inserted to Inspection_Agreement_Daily, in one
+    transaction. Links already present (a retried batch) are skipped and not counted again.
+    With last_human_inspect_id, the correlation watermark is moved up to it in the same
+    transaction (never down, so backfills of older ranges leave it alone).
+    """
+    if last_human_inspect_id is not None:
+        watermark = models.CorrelationWatermark
+        statement = pg_insert(watermark).values(id=1, last_human_inspect_id=last_human_inspect_id)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[watermark.id],
+            set_={"last_human_inspect_id": func.greatest(watermark.last_human_inspect_id, statement.excluded.last_human_inspect_id)}
+        ))
+    if not links:
+        db.commit()
+        return 0
+
+    link = models.InspectionLink
+    # A multi-row VALUES needs the same keys in every row
+    keys = sorted({key for entry in links for key in entry})
+    rows = [{key: entry.get(key) for key in keys} for entry in links]
+
+    inserted = []
+    for start in range(0, len(rows), 1000):
+        inserted.extend(db.execute(
+            pg_insert(link).values(rows[start:start + 1000])
+            .on_conflict_do_nothing(constraint="Inspection_Links_unique")
+            .returning(
+                link.scanned_at,
+                link.camera_id.label("camera_id"),
+                link.region_id.label("region_id"),
+                link.human_fail,
+                link.machine_fail
+            )
+        ).all())
+
+    counters: Dict[Tuple[Any, Any, Any], Dict[str, int]] = {}
+    for row in inserted:
+        key = (row.scanned_at.date() if row.scanned_at else None, row.camera_id, row.region_id)
+        bucket = counters.setdefault(key, dict.fromkeys(AGREEMENT_COUNTERS, 0))
+        if row.camera_id is None:
+            bucket["unmatched"] += 1
+        elif row.human_fail:
+            bucket["both_fail" if row.machine_fail else "human_only"] += 1
+        else:
+            bucket["machine_only" if row.machine_fail else "both_pass"] += 1
+
+    if counters:
+        agreement = models.InspectionAgreementDaily
+        statement = pg_insert(agreement).values([
+            {"day": day, "camera_id": camera_id, "region_id": region_id, **counts}
+            for (day, camera_id, region_id), counts in counters.items()
+        ])
+        db.execute(statement.on_conflict_do_update(
+            constraint="Inspection_Agreement_Daily_bucket_unique",
+            set_={name: getattr(agreement, name) + statement.excluded[name] for name in AGREEMENT_COUNTERS}
+        ))
+
+    db.commit()
+    return len(inserted)
+
+
+def get_inspection_agreement(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    camera_id: Optional[str] = None
+):
+    """Sum the daily confusion counters per camera and region; days are whole scan days."""
+    agreement = models.InspectionAgreementDaily
+    query = db.query(
+        agreement.camera_id.label("camera_id"),
+        agreement.region_id.label("region_id"),
+        models.Region.region_id.label("region_name"),
+        *[func.sum(getattr(agreement, name)).label(name) for name in AGREEMENT_COUNTERS]
+    ).outerjoin(models.Region, models.Region.id == agreement.region_id)
+    if start:
+        query = query.filter(agreement.day >= start.date())
+    if end:
+        query = query.filter(agreement.day <= end.date())
+    if camera_id:
+        # Unmatched scans have no camera; keep their (camera NULL) rows so they're still counted
+        query = query.filter(or_(agreement.camera_id == camera_id, agreement.camera_id.is_(None)))
+    return query.group_by(agreement.camera_id, agreement.region_id, models.Region.region_id).all()
+
+
+# Job yield operations
+def get_job(db: Session, job_num: int):
+    # The latest Outflow row of the job
+    return (
+        db.query(models.Outflow)
+        .filter(models.Outflow.job_num == job_num)
+        .order_by(desc(models.Outflow.job_start))
+        .first()
+    )
+
+
+def get_current_job(db: Session):
+    return db.query(models.Outflow).filter(models.Outflow.job_start.isnot(None)).order_by(desc(models.Outflow.job_start)).first()
+
+
+def _plant_time(moment: datetime):
+    # A naive plant-local time (as Outflow stores them) as timestamptz, in plant_timezone()
+    return func.timezone(func.plant_timezone(), cast(moment, DateTime))
+
+
+def get_plant_now(db: Session) -> datetime:
+    # The current time as a naive plant-local time, comparable with Outflow times
+    return db.execute(select(func.timezone(func.plant_timezone(), func.now()))).scalar()
+
+
+def get_job_yield_hours(db: Session, job_num: int, job_start: Optional[datetime] = None, job_end: Optional[datetime] = None):
+    """
+    Hourly yield of job_num, limited to one run of the job when job_start (and job_end,
+    None while it is running) are given as the Outflow row's plant-local times. Earlier
+    runs of the same job number are keyed to it too.
+    """
+    rollup = models.JobYieldHourly
+    query = db.query(rollup).filter(rollup.job_num == job_num)
+    if job_start is not None:
+        query = query.filter(rollup.hour >= func.date_trunc("hour", _plant_time(job_start)))
+    if job_end is not None:
+        query = query.filter(rollup.hour < _plant_time(job_end))
+    return query.order_by(rollup.hour).all()
+
+
+def rebuild_job_yield(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Rebuild Part_Yield and Job_Yield_Hourly for the whole hours of [start, end] in one
+    transaction (sql/job_yield_rollup.sql). Part and defect writers wait on the SHARE
+    locks meanwhile, so keep ranges to a shift or a day on a live system.
+    """
+    # The job_yield lock first, as parts being inserted hold its shared form
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('job_yield'))"))
+    db.execute(text('LOCK TABLE "Triggers", "Images", "Defects" IN SHARE MODE'))
+    parts = db.execute(select(func.job_yield_rebuild(start, end))).scalar()
+    db.commit()
+    return parts or 0
+
+
 # Region operations
 def get_region(db: Session, region_id: int):
     return db.query(models.Region).filter(models.Region.id == region_id).first()
@@ -100,7 +937,7 @@ def get_regions_by_camera(db: Session, camera_id: str, active_only: bool = True)
     if active_only:
         query = query.filter(models.Region.active == True)
         
-    return query.all()
+    return reference_cache.get_or_load("Regions", (camera_id, active_only), query.all)
 
 
 def get_region_by_name(db: Session, camera_id: str, region_id: str):
@@ -118,6 +955,7 @@ def create_region(db: Session, region_data: Dict[str, Any]):
     new_region = models.Region(**region_data)
     db.add(new_region)
     db.commit()
+    reference_cache.invalidate("Regions")
     db.refresh(new_region)
     return new_region
 
@@ -129,6 +967,7 @@ def update_region(db: Session, region_id: int, region_data: Dict[str, Any]):
             setattr(region, key, value)
         region.updated_at = datetime.now()
         db.commit()
+        reference_cache.invalidate("Regions")
         db.refresh(region)
     return region
 
@@ -138,6 +977,7 @@ def delete_region(db: Session, region_id: int):
     if region:
         db.delete(region)
         db.commit()
+        reference_cache.invalidate("Regions")
         return True
     return False
 
@@ -151,6 +991,93 @@ def get_trigger(db: Session, trigger_id: int):
     return db.query(models.Trigger).filter(models.Trigger.id == trigger_id).first()
 
 
+# Dispositions accepted by the history filter besides literal disposition values
+PENDING_DISPOSITION = "pending"
+DISPOSITIONED = "dispositioned"
+
+
+def _trigger_defects_exist(*criteria):
+    # EXISTS over the defects of the outer query's trigger
+    return exists(
+        select(models.Defect.id)
+        .join(models.Image, models.Defect.image_id == models.Image.id)
+        .where(models.Image.trigger_id == models.Trigger.id, *criteria)
+    )
+
+
+def trigger_history_statement(
+    limit: int,
+    before: Optional[Tuple[datetime, int]] = None,
+    camera_id: Optional[str] = None,
+    part: Optional[str] = None,
+    belt: Optional[str] = None,
+    has_defects: Optional[bool] = None,
+    disposition: Optional[str] = None
+):
+    """
+    Triggers newest first, keyset paginated on (timestamp, id).
+    
+    `before` is the (timestamp, id) of the last row of the previous page; the row
+    comparison is answered from the (timestamp DESC, id DESC) index, so every page
+    costs the same however deep it is. Triggers without a timestamp aren't listed.
+    `disposition` is a literal value, PENDING_DISPOSITION (some defect not yet
+    dispositioned) or DISPOSITIONED (has defects, all dispositioned).
+    """
+    image_count = (
+        select(func.count(models.Image.id))
+        .where(models.Image.trigger_id == models.Trigger.id)
+        .correlate(models.Trigger)
+        .scalar_subquery()
+    )
+    defect_count = (
+        select(func.count(models.Defect.id))
+        .join(models.Image, models.Defect.image_id == models.Image.id)
+        .where(models.Image.trigger_id == models.Trigger.id)
+        .correlate(models.Trigger)
+        .scalar_subquery()
+    )
+    
+    query = (
+        select(
+            models.Trigger,
+            image_count.label("image_count"),
+            defect_count.label("defect_count")
+        )
+        .where(models.Trigger.timestamp.isnot(None))
+    )
+    
+    if before is not None:
+        query = query.where(tuple_(models.Trigger.timestamp, models.Trigger.id) < tuple_(*before))
+    if part is not None:
+        query = query.where(models.Trigger.part == part)
+    if belt is not None:
+        query = query.where(models.Trigger.belt == belt)
+    if camera_id is not None:
+        query = query.where(
+            exists(
+                select(models.Image.id)
+                .where(models.Image.trigger_id == models.Trigger.id, models.Image.camera_id == camera_id)
+            )
+        )
+    if has_defects is not None:
+        query = query.where(_trigger_defects_exist() if has_defects else ~_trigger_defects_exist())
+    if disposition == PENDING_DISPOSITION:
+        query = query.where(_trigger_defects_exist(models.Defect.disposition.is_(None)))
+    elif disposition == DISPOSITIONED:
+        query = query.where(
+            _trigger_defects_exist(),
+            ~_trigger_defects_exist(models.Defect.disposition.is_(None))
+        )
+    elif disposition is not None:
+        query = query.where(_trigger_defects_exist(models.Defect.disposition == disposition))
+    
+    return query.order_by(desc(models.Trigger.timestamp), desc(models.Trigger.id)).limit(limit)
+
+
+def get_trigger_history(db: Session, limit: int, **filters):
+    return db.execute(trigger_history_statement(limit, **filters)).all()
+
+
 # Part Information operations - Renamed original get_part_information for clarity
 def get_part_information_by_part_number(db: Session, part_number: str):
     """Gets part information using the original part_number column (e.g., vehicle code)."""
@@ -163,10 +1090,13 @@ def get_part_information_by_part_number(db: Session, part_number: str):
 # New function to get part information by job_num (part type identifier)
 def get_part_information_by_job_num(db: Session, job_num: str):
     """Gets part information using the job_num column (e.g., '39MC')."""
-    return (
-        db.query(models.PartInformation)
-        .filter(models.PartInformation.job_num == job_num)
-        .first()
+    return reference_cache.get_or_load(
+        "Part_Information", job_num,
+        lambda: (
+            db.query(models.PartInformation)
+            .filter(models.PartInformation.job_num == job_num)
+            .first()
+        )
     )
 
 
@@ -176,4 +1106,7 @@ def get_all_parts(db: Session):
 
 # Current Part operations
 def get_current_part(db: Session):
-    return db.query(models.CurrentPart).order_by(desc(models.CurrentPart.id)).first()
\ No newline at end of file
+    return reference_cache.get_or_load(
+        "Current_Part", None,
+        lambda: db.query(models.CurrentPart).order_by(desc(models.CurrentPart.id)).first()
+    )
\ No newline at end of file
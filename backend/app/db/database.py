@@ -1,9 +1,14 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import time
 import yaml
 import os
 
+from ..utils.metrics import db_pool_wait, registry
+
 # Load configuration from YAML file
 config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'config.yaml')
 with open(config_path, 'r') as config_file:
@@ -14,18 +19,62 @@ db_config = config['database']
 # Get password from environment variable or config
 password = os.environ.get('DATABASE_PASSWORD', db_config['password'])
 
-# Create database URL
-DATABASE_URL = f"postgresql://{db_config['username']}:{password}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+# Create database URL; DATABASE_URL in the environment (postgresql://...) replaces the whole section,
+# e.g. to point manage.py or the benchmarks at another database
+DATABASE_URL = os.environ.get('DATABASE_URL') or f"postgresql://{db_config['username']}:{password}@{db_config['host']}:{db_config['port']}/{db_config['dbname']}"
+
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waited (including connecting) in /metrics."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started, pool=self.metrics_label)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
 
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
     pool_size=db_config['pool_size'],
-    max_overflow=db_config['max_overflow']
+    max_overflow=db_config['max_overflow'],
+    poolclass=InstrumentedQueuePool
 )
 
-# Create session factory
+# Async engine for the hot read routes; these don't hold a threadpool worker while waiting on Postgres
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=db_config.get('async_pool_size', db_config['pool_size']),
+    max_overflow=db_config.get('async_max_overflow', db_config['max_overflow']),
+    poolclass=InstrumentedAsyncQueuePool
+)
+
+registry.gauge(
+    "porosity_db_pool_connections_in_use",
+    "Connections currently checked out of the SQLAlchemy pool",
+    labels=("pool",),
+    collect=lambda: {("sync",): engine.pool.checkedout(), ("async",): async_engine.pool.checkedout()}
+)
+registry.gauge(
+    "porosity_db_pool_connections_idle",
+    "Connections idle in the SQLAlchemy pool",
+    labels=("pool",),
+    collect=lambda: {("sync",): engine.pool.checkedin(), ("async",): async_engine.pool.checkedin()}
+)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -37,4 +86,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Async dependency to get DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
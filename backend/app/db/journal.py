@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from . import crud
+from .database import SessionLocal
+from ..utils.config import load_config
+from ..utils.worker import PeriodicWorker
+
+# Load configuration
+config = load_config()
+JOURNAL_CONFIG = config.get('disposition_journal', {})
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class DispositionJournal:
+    """
+    Write-behind queue for defect dispositions.
+
+    append() writes entries to an append-only JSON lines file and fsyncs before
+    returning, so an acknowledged disposition survives a crash without waiting on a
+    Postgres commit. A background flusher applies queued entries in batches with
+    crud.update_defect_dispositions and records the highest flushed sequence number
+    in a checkpoint file; on start the entries after the checkpoint are queued again.
+    Re-applying an entry is harmless since it carries its own dispositioned_at.
+
+    A batch the database rejects (rather than one it can't be reached for) is retried
+    max_attempts times, then applied entry by entry; entries failing on their own are
+    moved to a dead-letter file next to the journal (.dead) so the rest keep flowing.
+
+    Until flushed, the latest queued entry per defect is kept in memory so reads can
+    show it (see apply_pending). The journal is per process: run a single API worker
+    when it is enabled.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        enabled: bool = False,
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+        compact_bytes: int = 1024 * 1024,
+        max_attempts: int = 5
+    ):
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        self.dead_letter_path = path + ".dead"
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compact_bytes = compact_bytes
+        self.max_attempts = max_attempts
+        self._failed_attempts = 0
+        self._dead_lettered = 0
+        self._pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._seq = 0
+        self._checkpoint = 0
+        self._file = None
+        self._flusher: Optional[PeriodicWorker] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    # Lifecycle
+    def start(self):
+        """Replay unflushed entries and start the background flusher (idempotent)."""
+        with self._lock:
+            if self._file is None:
+                self._replay()
+                self._file = open(self.path, "ab")
+
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = _JournalFlusher(self)
+            self._flusher.start()
+
+    def stop(self):
+        """Stop the flusher and make a last attempt to flush what is queued."""
+        if self._flusher is not None:
+            self._flusher.stop(timeout=self.flush_interval * 4)
+            self._flusher = None
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final disposition journal flush failed, entries stay queued: {str(e)}")
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _replay(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r") as f:
+                self._checkpoint = int(f.read().strip() or 0)
+        self._seq = self._checkpoint
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        # A crash mid-append can leave a partial last line; drop it before appending again
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            logger.warning(f"Truncating partial entry at the end of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(len(complete))
+
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            self._seq = max(self._seq, entry["seq"])
+            if entry["seq"] > self._checkpoint:
+                self._queue(entry)
+
+        if self._pending:
+            logger.info(f"Replaying {len(self._pending)} queued dispositions from {self.path}")
+
+    # Writes
+    def append(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Durably queue {defect_id, disposition, notes} items; returns the journal entries,
+        which carry the dispositioned_at the defects will get.
+        """
+        dispositioned_at = datetime.now(timezone.utc).isoformat()
+
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Disposition journal is not started")
+
+            entries = []
+            for item in items:
+                self._seq += 1
+                entries.append({
+                    "seq": self._seq,
+                    "defect_id": item["defect_id"],
+                    "disposition": item["disposition"],
+                    "notes": item.get("notes"),
+                    "dispositioned_at": dispositioned_at
+                })
+
+            self._file.write("".join(json.dumps(entry) + "\n" for entry in entries).encode())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+            for entry in entries:
+                self._queue(entry)
+
+        if self._flusher is not None:
+            self._flusher.wake()
+        return entries
+
+    def _queue(self, entry: Dict[str, Any]):
+        # Only the latest entry per defect needs to reach the database
+        self._pending.pop(entry["defect_id"], None)
+        self._pending[entry["defect_id"]] = entry
+
+    def flush(self) -> int:
+        """Apply up to batch_size queued entries in one transaction; returns how many were applied."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())[:self.batch_size]
+            if not batch:
+                return 0
+
+            dead_lettered = self._dead_lettered
+            try:
+                rows = _apply(batch)
+            except OperationalError:
+                # The database is unreachable: keep everything queued, however long it takes
+                raise
+            except SQLAlchemyError:
+                self._failed_attempts += 1
+                if self._failed_attempts < self.max_attempts:
+                    raise
+                logger.error(f"Disposition batch failed {self._failed_attempts} times, applying its entries one by one")
+                rows = self._apply_each(batch)
+            self._failed_attempts = 0
+
+            missing = len(batch) - len(rows) - (self._dead_lettered - dead_lettered)
+            if missing:
+                logger.warning(f"Dropped {missing} queued dispositions for defects that no longer exist")
+
+            with self._lock:
+                for entry in batch:
+                    # A newer click on the same defect stays queued
+                    if self._pending.get(entry["defect_id"]) is entry:
+                        del self._pending[entry["defect_id"]]
+
+                # Everything below the oldest still queued entry is in the database
+                checkpoint = min((e["seq"] for e in self._pending.values()), default=self._seq + 1) - 1
+                self._write_checkpoint(checkpoint)
+
+                if not self._pending and self._file is not None and self._file.tell() >= self.compact_bytes:
+                    self._file.truncate(0)
+                    self._file.seek(0)
+                    os.fsync(self._file.fileno())
+
+            return len(batch)
+
+    def _apply_each(self, batch: List[Dict[str, Any]]) -> List[Any]:
+        rows = []
+        for entry in batch:
+            try:
+                rows.extend(_apply([entry]))
+            except OperationalError:
+                raise
+            except SQLAlchemyError as e:
+                self._dead_letter(entry, e)
+        return rows
+
+    def _dead_letter(self, entry: Dict[str, Any], error: Exception):
+        logger.error(f"Moving disposition of defect {entry['defect_id']} to {self.dead_letter_path}: {str(error)}")
+        with open(self.dead_letter_path, "ab") as f:
+            f.write((json.dumps({**entry, "error": str(error).splitlines()[0]}) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+        self._dead_lettered += 1
+
+    def _write_checkpoint(self, seq: int):
+        if seq <= self._checkpoint:
+            return
+
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self._checkpoint = seq
+
+    # Reads
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def pending_for(self, defect_id: int) -> Optional[Dict[str, Any]]:
+        return self._pending.get(defect_id)
+
+    def apply_pending(self, defect):
+        """
+        Overlay a queued disposition onto a defect object. Callers expunge ORM objects
+        from their session first so the overlay is never flushed.
+        """
+        entry = self._pending.get(defect.id)
+        if entry is not None:
+            defect.disposition = entry["disposition"]
+            defect.dispositioned_at = datetime.fromisoformat(entry["dispositioned_at"])
+            if entry.get("notes") and hasattr(defect, "_metadata"):
+                defect._metadata = {**(defect._metadata or {}), "disposition_notes": entry["notes"]}
+        return defect
+
+    def apply_pending_rows(self, rows):
+        """Overlay queued dispositions onto read-only rows with a disposition column."""
+        if not self._pending:
+            return rows
+
+        result = []
+        for row in rows:
+            entry = self._pending.get(row.id)
+            if entry is not None:
+                row = _OverlaidRow(row._asdict(), disposition=entry["disposition"])
+            result.append(row)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": self.pending_count,
+            "last_seq": self._seq,
+            "checkpoint": self._checkpoint,
+            "failed_attempts": self._failed_attempts,
+            "dead_lettered": self._dead_lettered
+        }
+
+
+def _apply(entries: List[Dict[str, Any]]):
+    db = SessionLocal()
+    try:
+        return crud.update_defect_dispositions(db, [
+            {**entry, "dispositioned_at": datetime.fromisoformat(entry["dispositioned_at"])}
+            for entry in entries
+        ])
+    finally:
+        db.close()
+
+
+class _OverlaidRow:
+    # Attribute access over a row's values with some of them replaced
+    def __init__(self, values: Dict[str, Any], **overrides):
+        self.__dict__.update(values, **overrides)
+
+    def _asdict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class _JournalFlusher(PeriodicWorker):
+    def __init__(self, journal: DispositionJournal):
+        super().__init__(name="disposition-journal-flusher", interval_seconds=journal.flush_interval)
+        self.journal = journal
+
+    def run_once(self):
+        # Drain in batches so a backlog after an outage catches up quickly
+        while not self.stopped and self.journal.flush() >= self.journal.batch_size:
+            pass
+
+
+disposition_journal = DispositionJournal(
+    path=JOURNAL_CONFIG.get('path', 'data/disposition_journal.log'),
+    enabled=JOURNAL_CONFIG.get('enabled', False),
+    flush_interval=float(JOURNAL_CONFIG.get('flush_interval_seconds', 0.5)),
+    batch_size=JOURNAL_CONFIG.get('batch_size', 500),
+    compact_bytes=JOURNAL_CONFIG.get('compact_bytes', 1024 * 1024),
+    max_attempts=JOURNAL_CONFIG.get('max_attempts', 5)
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Text, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Boolean, Float, Text, JSON, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -32,6 +32,12 @@ class Trigger(Base):
     
     # Relationships
     images = relationship("Image", back_populates="trigger")
+    
+    __table_args__ = (
+        # Keyset paginated history (see sql/trigger_history_indexes.sql)
+        Index("Triggers_timestamp_id_desc_idx", timestamp.desc(), id.desc()),
+        Index("Triggers_part_timestamp_id_desc_idx", part, timestamp.desc(), id.desc()),
+    )
 
 
 class Image(Base):
@@ -50,6 +56,13 @@ class Image(Base):
     camera = relationship("Camera", back_populates="images")
     trigger = relationship("Trigger", back_populates="images")
     defects = relationship("Defect", back_populates="image")
+    
+    __table_args__ = (
+        # Latest image per camera lookups (see sql/latest_image_indexes.sql)
+        Index("Images_camera_id_desc_idx", camera_id, id.desc()),
+        # Images of a trigger (see sql/trigger_history_indexes.sql)
+        Index("Images_trigger_idx", trigger_id),
+    )
 
 
 class Defect(Base):
@@ -75,6 +88,107 @@ class Defect(Base):
     
     # Relationships
     image = relationship("Image", back_populates="defects")
+    
+    __table_args__ = (
+        Index("Defects_image_idx", image_id),
+    )
+
+
+# Archive of parts older than retention.hot_days (sql/archive.sql). The tables are range
+# partitioned by month of trigger time; filter on trigger_timestamp (Triggers: timestamp)
+# so queries only touch the months they need.
+class ArchivedTrigger(Base):
+    __tablename__ = "Triggers"
+    __table_args__ = {"schema": "archive"}
+
+    id = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    label = Column(Integer)
+    part_instance = Column(String)
+    belt = Column(String)
+    part = Column(String)
+
+
+class ArchivedImage(Base):
+    __tablename__ = "Images"
+    __table_args__ = {"schema": "archive"}
+
+    id = Column(Integer, primary_key=True)
+    trigger_id = Column(Integer, name="trigger")
+    width = Column(Integer)
+    height = Column(Integer)
+    camera_id = Column(String, name="camera")
+    media_id = Column(String)
+    image = Column(String)
+    ether_checked = Column(Boolean)
+    trigger_timestamp = Column(DateTime(timezone=True), primary_key=True)
+
+
+class ArchivedDefect(Base):
+    __tablename__ = "Defects"
+    __table_args__ = {"schema": "archive"}
+
+    id = Column(Integer, primary_key=True)
+    image_id = Column(Integer, name="image")
+    x = Column(Integer)
+    y = Column(Integer)
+    width = Column(Integer)
+    height = Column(Integer)
+    confidence = Column(Float)
+    type = Column(String)
+    hand = Column(String)
+    uss_reviewed = Column(Boolean)
+    system_generated = Column(Boolean)
+    disposition = Column(String)
+    dispositioned_at = Column(DateTime(timezone=True))
+    supression_timestamp = Column(DateTime(timezone=True))
+    mode = Column(String)
+    iv_updated = Column(Boolean)
+    _metadata = Column('metadata', JSONB)
+    trigger_timestamp = Column(DateTime(timezone=True), primary_key=True)
+
+
+class ArchivedInspectionLink(Base):
+    __tablename__ = "Inspection_Links"
+    __table_args__ = {"schema": "archive"}
+
+    id = Column(Integer, primary_key=True)
+    human_inspect_id = Column(Integer, name="human_inspect", nullable=False)
+    trigger_id = Column(Integer, name="trigger")
+    trigger_timestamp = Column(DateTime(timezone=True), primary_key=True)
+
+
+class DefectRollupHourly(Base):
+    """Defect counts per trigger hour, camera, type and disposition, kept current by sql/defect_rollup.sql"""
+    __tablename__ = "Defect_Rollup_Hourly"
+
+    id = Column(Integer, primary_key=True, index=True)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    camera_id = Column(String, name="camera")
+    type = Column(String)
+    disposition = Column(String)
+    defect_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("Defect_Rollup_Hourly_hour_idx", hour),
+    )
+
+
+class DefectHeatmapHourly(Base):
+    """Defect center histogram per camera and trigger hour, kept by services/heatmap_service.py"""
+    __tablename__ = "Defect_Heatmap_Hourly"
+
+    id = Column(Integer, primary_key=True, index=True)
+    camera_id = Column(String, name="camera", nullable=False)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    grid_size = Column(Integer, nullable=False)
+    histogram = Column(LargeBinary, nullable=False)  # zlib-compressed .npy, grid_size x grid_size uint32
+    defect_count = Column(Integer, nullable=False, default=0)
+    last_defect_id = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint(camera_id, hour, grid_size, name="Defect_Heatmap_Hourly_bucket_unique"),
+    )
 
 
 class CurrentPart(Base):
@@ -112,6 +226,36 @@ class Outflow(Base):
     created_at = Column(DateTime)
 
 
+class PartYield(Base):
+    """Defect and scrap counts per part with its job, kept by sql/job_yield_rollup.sql"""
+    __tablename__ = "Part_Yield"
+
+    trigger_id = Column(Integer, primary_key=True, name="trigger")
+    job_num = Column(Integer)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    defects = Column(Integer, nullable=False, default=0)
+    scrap_defects = Column(Integer, nullable=False, default=0)
+    timestamp = Column(DateTime(timezone=True))
+
+
+class JobYieldHourly(Base):
+    """Parts, flagged parts, scrap parts and scrap defects per job and hour, kept by sql/job_yield_rollup.sql"""
+    __tablename__ = "Job_Yield_Hourly"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_num = Column(Integer)
+    hour = Column(DateTime(timezone=True), nullable=False)
+    parts = Column(Integer, nullable=False, default=0)
+    flagged_parts = Column(Integer, nullable=False, default=0)
+    scrap_parts = Column(Integer, nullable=False, default=0)
+    scrap_defects = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint(job_num, hour, name="Job_Yield_Hourly_bucket_unique"),
+        Index("Job_Yield_Hourly_hour_idx", hour),
+    )
+
+
 class HumanInspect(Base):
     __tablename__ = "HumanInspect"
 
@@ -141,6 +285,69 @@ class SuppressedDefect(Base):
     defect = Column(Integer, ForeignKey("Defects.id"))
     suppressed_by = Column(Integer)
     similarity = Column(Float)
+    
+    __table_args__ = (
+        # Suppression lookups per defect (see sql/suppression_indexes.sql)
+        Index("Suppressed_Defects_defect_idx", defect),
+    )
+
+
+class SuppressionWatermark(Base):
+    """The last defect id the suppression worker processed (one row), see sql/suppression_indexes.sql"""
+    __tablename__ = "Suppression_Watermark"
+
+    id = Column(Integer, primary_key=True, default=1)
+    last_defect_id = Column(Integer, nullable=False)
+
+
+class InspectionLink(Base):
+    """A HumanInspect row matched to one image (and region) of its part, see sql/inspection_correlation.sql"""
+    __tablename__ = "Inspection_Links"
+
+    id = Column(Integer, primary_key=True, index=True)
+    human_inspect_id = Column(Integer, ForeignKey("HumanInspect.id"), name="human_inspect", nullable=False)
+    trigger_id = Column(Integer, ForeignKey("Triggers.id"), name="trigger")  # NULL when no part matched
+    image_id = Column(Integer, ForeignKey("Images.id"), name="image")
+    camera_id = Column(String, name="camera")
+    region_id = Column(Integer, ForeignKey("Regions.id"), name="region")  # NULL for the whole image
+    scanned_at = Column(DateTime)
+    human_fail = Column(Boolean)
+    machine_fail = Column(Boolean)
+    machine_defects = Column(Integer)
+    linked_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        UniqueConstraint(human_inspect_id, image_id, region_id, name="Inspection_Links_unique"),
+        Index("Inspection_Links_trigger_idx", trigger_id),
+    )
+
+
+class CorrelationWatermark(Base):
+    """The last HumanInspect id the correlation job passed (one row), see sql/inspection_correlation.sql"""
+    __tablename__ = "Correlation_Watermark"
+
+    id = Column(Integer, primary_key=True, default=1)
+    last_human_inspect_id = Column(Integer, nullable=False)
+
+
+class InspectionAgreementDaily(Base):
+    """Machine vs. human confusion counters per scan day, camera and region, kept by the correlation job"""
+    __tablename__ = "Inspection_Agreement_Daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date)
+    camera_id = Column(String, name="camera")  # NULL (with region NULL) counts unmatched scans
+    region_id = Column(Integer, name="region")  # NULL for whole images
+    both_fail = Column(Integer, nullable=False, default=0)
+    machine_only = Column(Integer, nullable=False, default=0)
+    human_only = Column(Integer, nullable=False, default=0)
+    both_pass = Column(Integer, nullable=False, default=0)
+    unmatched = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint(day, camera_id, region_id, name="Inspection_Agreement_Daily_bucket_unique"),
+        Index("Inspection_Agreement_Daily_day_idx", day),
+    )
 
 
 class ProcessedFile(Base):
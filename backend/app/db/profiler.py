@@ -0,0 +1,241 @@
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from ..utils.config import load_config
+
+# Load configuration
+config = load_config()
+PROFILER_CONFIG = config.get('sql_profiler', {})
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|%s")
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so executions that differ only in parameters compare equal:
+    placeholders become ?, expanded IN lists become (?), whitespace is collapsed.
+    """
+    normalized = _PLACEHOLDER.sub("?", statement)
+    normalized = _PLACEHOLDER_LIST.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    return hashlib.md5(normalized.encode()).hexdigest()[:8]
+
+
+class QueryProfile:
+    """Statements run during one request (or one capture): count, time and repeats per fingerprint."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, normalized: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.fingerprints[normalized] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Fingerprints run at least threshold times, the usual shape of an N+1."""
+        return {statement: count for statement, count in self.fingerprints.most_common() if count >= threshold}
+
+    def summary(self, threshold: int) -> Dict[str, Any]:
+        return {
+            "statements": self.count,
+            "db_ms": round(self.seconds * 1000, 2),
+            "repeated": [
+                {"fingerprint": fingerprint_id(statement), "count": count, "statement": statement}
+                for statement, count in self.repeated(threshold).items()
+            ]
+        }
+
+
+class QueryProfiler:
+    """
+    Per-request SQL accounting from the engines' before/after_cursor_execute events.
+
+    profile() makes a QueryProfile current for the calling context (contextvars follow
+    FastAPI into the threadpool and SQLAlchemy into its async greenlets). capture()
+    collects every statement of the process regardless of context, for tests that drive
+    the app through a TestClient thread. Statements slower than slow_query_ms are logged
+    with their EXPLAIN plan and kept for /api/system/queries, along with per-route totals.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        slow_query_ms: float = 200.0,
+        explain_slow: bool = True,
+        n_plus_one_threshold: int = 5,
+        recent_slow: int = 50
+    ):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow = explain_slow
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._current: contextvars.ContextVar[Optional[QueryProfile]] = contextvars.ContextVar("query_profile", default=None)
+        self._captures: List[QueryProfile] = []
+        self._slow: deque = deque(maxlen=recent_slow)
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._explaining = threading.local()
+        self._lock = threading.Lock()
+        self._installed = set()
+
+    # Engine hooks
+
+    def install(self, *engines):
+        """Listen to the cursor events of sync engines (pass async_engine.sync_engine for async ones)."""
+        for engine in engines:
+            if id(engine) in self._installed:
+                continue
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+            self._installed.add(id(engine))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._query_started
+        if getattr(self._explaining, "active", False):
+            return
+
+        profile = self._current.get()
+        if profile is None and not self._captures:
+            return
+
+        normalized = fingerprint(statement)
+        if profile is not None:
+            profile.record(normalized, seconds)
+        for capture in list(self._captures):
+            capture.record(normalized, seconds)
+
+        if seconds * 1000 >= self.slow_query_ms:
+            self._record_slow(conn, statement, parameters, executemany, normalized, seconds)
+
+    def _record_slow(self, conn, statement, parameters, executemany, normalized, seconds):
+        plan = None
+        if self.explain_slow and not executemany and normalized.upper().startswith(("SELECT", "WITH")):
+            plan = self._explain(conn, statement, parameters)
+
+        logger.warning(
+            f"Slow query ({seconds * 1000:.1f} ms): {normalized}" + (f"\n{plan}" if plan else "")
+        )
+        self._slow.append({
+            "fingerprint": fingerprint_id(normalized),
+            "statement": normalized,
+            "ms": round(seconds * 1000, 2),
+            "at": time.time(),
+            "plan": plan
+        })
+
+    def _explain(self, conn, statement, parameters) -> Optional[str]:
+        # Plain EXPLAIN on the same DBAPI connection: no re-execution, sees the same transaction
+        self._explaining.active = True
+        try:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute("EXPLAIN " + statement, parameters)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.debug(f"EXPLAIN failed: {str(e)}")
+            return None
+        finally:
+            self._explaining.active = False
+
+    # Profiling scopes
+
+    @contextmanager
+    def profile(self) -> Iterator[QueryProfile]:
+        profile = QueryProfile()
+        token = self._current.set(profile)
+        try:
+            yield profile
+        finally:
+            self._current.reset(token)
+
+    @contextmanager
+    def capture(self) -> Iterator[QueryProfile]:
+        profile = QueryProfile()
+        with self._lock:
+            self._captures.append(profile)
+        try:
+            yield profile
+        finally:
+            with self._lock:
+                self._captures.remove(profile)
+
+    # Reporting
+
+    def record_request(self, route: str, profile: QueryProfile):
+        repeated = profile.repeated(self.n_plus_one_threshold)
+        if repeated:
+            statement, count = next(iter(repeated.items()))
+            logger.warning(f"Possible N+1 in {route}: {count} x {statement}")
+
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0, "statements": 0, "max_statements": 0, "db_ms": 0.0, "n_plus_one": {}
+            })
+            totals["requests"] += 1
+            totals["statements"] += profile.count
+            totals["max_statements"] = max(totals["max_statements"], profile.count)
+            totals["db_ms"] += profile.seconds * 1000
+            for statement, count in repeated.items():
+                totals["n_plus_one"][statement] = max(totals["n_plus_one"].get(statement, 0), count)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": totals["requests"],
+                    "avg_statements": round(totals["statements"] / totals["requests"], 2),
+                    "max_statements": totals["max_statements"],
+                    "avg_db_ms": round(totals["db_ms"] / totals["requests"], 2),
+                    "n_plus_one": [
+                        {"fingerprint": fingerprint_id(statement), "max_count": count, "statement": statement}
+                        for statement, count in totals["n_plus_one"].items()
+                    ]
+                }
+                for route, totals in self._routes.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "slow_query_ms": self.slow_query_ms,
+            "routes": routes,
+            "slow_queries": list(self._slow)
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._slow.clear()
+
+
+query_profiler = QueryProfiler(
+    enabled=PROFILER_CONFIG.get('enabled', False),
+    slow_query_ms=PROFILER_CONFIG.get('slow_query_ms', 200.0),
+    explain_slow=PROFILER_CONFIG.get('explain_slow', True),
+    n_plus_one_threshold=PROFILER_CONFIG.get('n_plus_one_threshold', 5),
+    recent_slow=PROFILER_CONFIG.get('recent_slow', 50)
+)
@@ -1,10 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
 import os
 
 from .api.routes import api_router
+from .services import correlation_service, event_service, heatmap_service, ingest_service, retention_service, suppression_service
+from .db.database import async_engine, engine
+from .db.journal import disposition_journal
+from .db.profiler import query_profiler
+from .middleware.metrics import MetricsMiddleware
+from .middleware.micro_cache import MicroCacheMiddleware, response_cache
+from .middleware.sql_profiler import SQLProfilerMiddleware
 from .utils.config import load_config
+from .utils.metrics import registry as metrics_registry
+from .utils.responses import DefaultResponse
 
 # Load configuration
 config = load_config()
@@ -14,9 +24,31 @@ app = FastAPI(
     title="Ford Livonia Porosity HMI API",
     description="API for the Ford Livonia Porosity HMI",
     version="0.1.0",
+    default_response_class=DefaultResponse,
 )
 
-# Configure CORS
+# Opt-in per-request SQL accounting (statement counts, DB time, N+1 and slow query logging);
+# inside the micro cache so only requests that reach the routes are profiled
+sql_profiler_config = config.get("sql_profiler", {})
+if query_profiler.enabled:
+    query_profiler.install(engine, async_engine.sync_engine)
+app.add_middleware(
+    SQLProfilerMiddleware,
+    enabled=query_profiler.enabled,
+    debug_header=sql_profiler_config.get("debug_header", True),
+)
+
+# Short-TTL response cache with request coalescing for the hot polling routes
+micro_cache_config = config.get("micro_cache", {})
+response_cache.max_entries = micro_cache_config.get("max_entries", 1024)
+app.add_middleware(
+    MicroCacheMiddleware,
+    routes=micro_cache_config.get("routes", []),
+    enabled=micro_cache_config.get("enabled", False),
+)
+
+# CORS outside the micro cache: cached responses are shared by every origin, so the
+# Access-Control-* headers are added per request rather than stored with them
 app.add_middleware(
     CORSMiddleware,
     allow_origins=config["api"]["cors_origins"],
@@ -25,6 +57,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timing for /metrics; added last so it is outermost and also times micro-cache hits
+app.add_middleware(MetricsMiddleware, routes=app.routes, enabled=metrics_registry.enabled)
+
+# A new part invalidates cached responses before HMIs are told to refresh
+event_service.broadcaster.add_callback(lambda event: response_cache.clear())
+# ...and lets the suppression worker pick up its defects without waiting for the next poll
+event_service.broadcaster.add_callback(lambda event: suppression_service.wake_worker())
+event_service.broadcaster.add_callback(lambda event: heatmap_service.wake_worker())
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -41,6 +82,37 @@ else:
     print("Warning: image_access.fallback_path not found in config.yaml, fallback images won't be served statically.") # Added warning
 
 
+# Start the single database watcher that feeds /api/stream and the disposition flusher
+@app.on_event("startup")
+def start_background_services():
+    if config.get("stream", {}).get("enabled", False):
+        event_service.start_listener()
+    if disposition_journal.enabled:
+        disposition_journal.start()
+    if config.get("suppression", {}).get("enabled", False):
+        suppression_service.start_worker()
+    if config.get("human_inspect_ingest", {}).get("enabled", False):
+        ingest_service.start_worker()
+    if config.get("correlation", {}).get("enabled", False):
+        correlation_service.start_worker()
+    if config.get("heatmap", {}).get("enabled", False):
+        heatmap_service.start_worker()
+    if config.get("retention", {}).get("enabled", False):
+        retention_service.start_worker()
+
+
+@app.on_event("shutdown")
+def stop_background_services():
+    event_service.stop_listener()
+    suppression_service.stop_worker()
+    ingest_service.stop_worker()
+    correlation_service.stop_worker()
+    heatmap_service.stop_worker()
+    retention_service.stop_worker()
+    if disposition_journal.enabled:
+        disposition_journal.stop()
+
+
 @app.get("/")
 async def root():
     """
@@ -53,6 +125,16 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Prometheus scrape endpoint: request latency per route, DB pool, image cache, FTP and analysis timing
+    """
+    if not metrics_registry.enabled:
+        return Response(status_code=404)
+    return Response(content=metrics_registry.render(), media_type=metrics_registry.content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,67 @@
+import time
+from typing import Dict, List, Tuple
+
+from starlette.routing import Match
+
+from ..utils.metrics import http_request_duration
+
+# Label for requests no route matched, so probes of random paths can't add label values
+UNMATCHED = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request into http_request_duration, labelled by route
+    template (/api/images/{image_id}/file rather than the path) so the label set stays bounded.
+
+    Outermost, so responses served by MicroCacheMiddleware are timed too. Their routes are
+    found by matching the app's routes, which are remembered per method and path.
+    """
+
+    def __init__(self, app, routes: List, enabled: bool = True, max_paths: int = 4096):
+        self.app = app
+        self.routes = routes
+        self.enabled = enabled
+        self.max_paths = max_paths
+        self._templates: Dict[Tuple[str, str], str] = {}
+
+    def _template_for(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is not None:
+            return template
+
+        template = UNMATCHED
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED)
+                break
+
+        if len(self._templates) >= self.max_paths:
+            self._templates.clear()
+        self._templates[key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+        started = time.perf_counter()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=self._template_for(scope),
+                status=str(status["code"])
+            )
@@ -0,0 +1,170 @@
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.responses import etag_matches
+
+# Response cache entry: (status, headers, body, stored_at)
+CacheEntry = Tuple[int, List[Tuple[bytes, bytes]], bytes, float]
+
+
+class ResponseCache:
+    """
+    Store of pre-serialized GET responses shared by MicroCacheMiddleware.
+
+    clear() bumps a generation counter; a response computed across a clear is not stored,
+    so an invalidation can't be undone by a request that was already in flight.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: Dict[Tuple, CacheEntry] = {}
+
+    def get(self, key: Tuple, ttl: float) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[3] >= ttl:
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    def put(self, key: Tuple, entry: CacheEntry, generation: int):
+        if generation != self.generation:
+            return
+        if len(self._entries) >= self.max_entries:
+            # Entries live for a second or two, so dropping everything is cheap and rare
+            self._entries.clear()
+        self._entries[key] = entry
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+class MicroCacheMiddleware:
+    """
+    ASGI middleware caching GET responses of selected routes for a short TTL.
+
+    Concurrent identical requests are coalesced: the first one computes the response while
+    the others wait for it, then all of them are served the same stored bytes. Only 200
+    responses are stored. Any successful non-GET request clears the cache.
+    """
+
+    def __init__(self, app, routes: List[Dict[str, Any]], cache: ResponseCache = response_cache, enabled: bool = True):
+        self.app = app
+        self.routes = [(re.compile(route["pattern"]), float(route["ttl_seconds"])) for route in routes]
+        self.cache = cache
+        self.enabled = enabled
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    def _ttl_for(self, path: str) -> Optional[float]:
+        for pattern, ttl in self.routes:
+            if pattern.match(path):
+                return ttl
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._call_write(scope, receive, send)
+            return
+
+        ttl = self._ttl_for(scope["path"])
+        if ttl is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        key = (scope["path"], scope["query_string"], headers.get(b"accept", b""))
+
+        entry = self.cache.get(key, ttl)
+        if entry is not None:
+            await self._send_entry(entry, scope, headers, send, b"HIT")
+            return
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            entry = await asyncio.shield(inflight)
+            if entry is not None:
+                await self._send_entry(entry, scope, headers, send, b"COALESCED")
+                return
+            # The leader's response wasn't cacheable; compute our own
+            await self.app(scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        entry = None
+        try:
+            entry = await self._call_and_capture(scope, receive, send, key)
+        finally:
+            del self._inflight[key]
+            future.set_result(entry)
+
+    async def _call_and_capture(self, scope, receive, send, key) -> Optional[CacheEntry]:
+        generation = self.cache.generation
+        request_headers = dict(scope["headers"])
+        # Computed without the client's If-None-Match: a route's 304 fits this client only and
+        # can't be stored, so pollers that all hold the ETag would never refill the cache.
+        # The full response is stored, then answered to this client like any hit.
+        headers = [(k, v) for k, v in scope["headers"] if k.lower() != b"if-none-match"]
+        messages: List[Dict[str, Any]] = []
+
+        async def capture(message):
+            messages.append(message)
+
+        await self.app(dict(scope, headers=headers), receive, capture)
+
+        start = next((message for message in messages if message["type"] == "http.response.start"), None)
+        if start is None or start["status"] != 200 or scope["method"] != "GET":
+            for message in messages:
+                if message is start:
+                    message = dict(message, headers=list(message.get("headers", [])) + [(b"x-micro-cache", b"MISS")])
+                await send(message)
+            return None
+
+        body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+        entry = (200, list(start.get("headers", [])), body, time.monotonic())
+        self.cache.put(key, entry, generation)
+        await self._send_entry(entry, scope, request_headers, send, b"MISS")
+        return entry
+
+    async def _send_entry(self, entry: CacheEntry, scope, request_headers, send, cache_status: bytes):
+        status, headers, body, _ = entry
+        headers = headers + [(b"x-micro-cache", cache_status)]
+
+        # Answer conditional polls from the stored ETag without touching the route
+        etag = next((v for k, v in headers if k.lower() == b"etag"), None)
+        if_none_match = request_headers.get(b"if-none-match")
+        if etag is not None and if_none_match and etag_matches(if_none_match.decode("latin-1"), etag.decode("latin-1")):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag), (b"x-micro-cache", cache_status)]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body if scope["method"] == "GET" else b""})
+
+    async def _call_write(self, scope, receive, send):
+        status = {"code": None}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, capture)
+        if status["code"] is not None and status["code"] < 400:
+            self.cache.clear()
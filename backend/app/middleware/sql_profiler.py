@@ -0,0 +1,44 @@
+from ..db.profiler import QueryProfiler, fingerprint_id, query_profiler
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI middleware running each HTTP request under its own QueryProfile and reporting it
+    to the profiler under the endpoint's function name (read_latest_images, ...).
+
+    With debug_header, responses carry X-DB-Queries, X-DB-Time-Ms and X-DB-Repeated
+    (fingerprint*count of statements repeated n_plus_one_threshold times or more, matching
+    /api/system/queries). Headers go out with the response start, so statements a streaming
+    response runs afterwards are only in the route totals.
+    """
+
+    def __init__(self, app, profiler: QueryProfiler = query_profiler, enabled: bool = False, debug_header: bool = True):
+        self.app = app
+        self.profiler = profiler
+        self.enabled = enabled
+        self.debug_header = debug_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.profile() as profile:
+            async def annotate(message):
+                if message["type"] == "http.response.start" and self.debug_header:
+                    repeated = profile.repeated(self.profiler.n_plus_one_threshold)
+                    headers = list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(profile.count).encode()),
+                        (b"x-db-time-ms", f"{profile.seconds * 1000:.2f}".encode())
+                    ]
+                    if repeated:
+                        value = ",".join(f"{fingerprint_id(statement)}*{count}" for statement, count in repeated.items())
+                        headers.append((b"x-db-repeated", value.encode()))
+                    message = dict(message, headers=headers)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, annotate)
+            finally:
+                endpoint = scope.get("endpoint")
+                self.profiler.record_request(getattr(endpoint, "__name__", "unmatched"), profile)
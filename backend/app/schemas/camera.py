@@ -24,4 +24,15 @@ class CameraLatestStatus(BaseModel):
     timestamp: Optional[datetime] = None
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class CameraSnapshotEntry(CameraLatestStatus):
+    group_id: Optional[int] = None
+    latest_trigger_id: Optional[int] = None
+    passed: Optional[bool] = None  # None when the camera has no image yet
+
+
+class CameraSnapshot(BaseModel):
+    """Latest status of every camera, versioned so unchanged polls can return 304"""
+    version: str
+    cameras: List[CameraSnapshotEntry]
@@ -38,6 +38,27 @@ class DefectUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class DefectDispositionItem(DefectUpdate):
+    defect_id: int
+
+
+class DefectDispositionBatch(BaseModel):
+    items: List[DefectDispositionItem] = Field(..., min_length=1, max_length=1000)
+
+
+class DefectDispositionResult(BaseModel):
+    defect_id: int
+    status: str  # "updated", "not_found" or "queued"
+    disposition: Optional[str] = None
+    dispositioned_at: Optional[datetime] = None
+
+
+class DefectDispositionBatchResult(BaseModel):
+    updated: int
+    queued: int = 0
+    results: List[DefectDispositionResult]
+
+
 class DefectNormalized(BaseModel):
     """Schema representing a defect with normalized coordinates for frontend rendering"""
     id: int
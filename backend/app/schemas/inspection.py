@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+
+class ConfusionMatrix(BaseModel):
+    """Machine vs. human verdicts for one camera (region_id None: whole images) or region"""
+    camera_id: Optional[str] = None
+    region_id: Optional[int] = None
+    region_name: Optional[str] = None
+    both_fail: int = 0
+    machine_only: int = 0
+    human_only: int = 0
+    both_pass: int = 0
+    agreement: Optional[float] = None  # (both_fail + both_pass) / total, None without data
+
+
+class InspectionAgreement(BaseModel):
+    unmatched_scans: int = 0  # HumanInspect rows no part could be found for (of every camera: they have none)
+    total: ConfusionMatrix  # Whole images of all cameras
+    matrices: List[ConfusionMatrix]
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+
+class JobYieldHour(BaseModel):
+    hour: datetime
+    parts: int = 0
+    flagged_parts: int = 0  # Parts with at least one defect
+    scrap_parts: int = 0  # Parts with at least one defect dispositioned Scrap
+    scrap_defects: int = 0
+    
+    class Config:
+        orm_mode = True
+
+
+class JobYield(BaseModel):
+    """Live yield of a job from the Job_Yield_Hourly rollup"""
+    job_num: int
+    job_start: Optional[datetime] = None
+    job_end: Optional[datetime] = None  # None while the job is running
+    total_outflow: Optional[int] = None
+    parts: int = 0
+    flagged_parts: int = 0
+    scrap_parts: int = 0
+    scrap_defects: int = 0
+    yield_rate: Optional[float] = None  # (parts - scrap_parts) / parts
+    parts_per_hour: Optional[float] = None
+    hours: List[JobYieldHour] = []
@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+from .image import Image
+from .defect import DefectNormalized
+from .region import Region
+
+
+class TriggerBase(BaseModel):
+    timestamp: Optional[datetime] = None
+    label: Optional[int] = None
+    part_instance: Optional[str] = None
+    belt: Optional[str] = None
+    part: Optional[str] = None
+
+
+class Trigger(TriggerBase):
+    id: int
+    
+    class Config:
+        orm_mode = True
+
+
+class TriggerSummary(Trigger):
+    image_count: int = 0
+    defect_count: int = 0
+
+
+class TriggerPage(BaseModel):
+    """One page of trigger history; pass next_cursor back as ?cursor= for the next page"""
+    items: List[TriggerSummary]
+    next_cursor: Optional[str] = None
+
+
+class TriggerBundleImage(Image):
+    image_url: Optional[str] = None
+    defect_count: int = 0
+    defects: List[DefectNormalized] = []
+    analysis: Optional[Dict[str, Any]] = None
+
+
+class TriggerBundle(BaseModel):
+    """Everything the HMI needs to open one part, loaded in a fixed number of queries"""
+    trigger: Trigger
+    images: List[TriggerBundleImage]
+    regions: List[Region]
+    has_failures: Optional[bool] = None  # Only set when the analysis verdict was requested
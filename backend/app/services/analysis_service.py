@@ -1,8 +1,10 @@
 import math
+import time
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 
 from ..db import models, crud
+from ..utils import metrics
 
 
 def calculate_distance(defect1, defect2, pixel_density) -> float:
@@ -183,10 +185,27 @@ def analyze_image_defects_with_regions(
     # Get all regions for the camera
     regions = crud.get_regions_by_camera(db, camera_id=image.camera_id)
     
+    return analyze_image_defects(image_id, image.camera_id, defects, regions, pixel_density)
+
+
+def analyze_image_defects(
+    image_id: int,
+    camera_id: str,
+    defects: List[Any],
+    regions: List[models.Region],
+    pixel_density: float = 95 / 7.9375
+) -> Dict[str, Any]:
+    """
+    Analyze already loaded defects against already loaded regions.
+    
+    Defects only need id, x, y, width and height, so overlay rows work as well as ORM objects.
+    """
+    started = time.perf_counter()
+    
     # Initialize results
     results = {
         "image_id": image_id,
-        "camera_id": image.camera_id,
+        "camera_id": camera_id,
         "defect_count": len(defects),
         "regions": [],
         "overall_analysis": {
@@ -231,4 +250,8 @@ def analyze_image_defects_with_regions(
             results["overall_analysis"]["total_fails"] += failure_count
             results["overall_analysis"]["fail_regions"].append(region.region_id)
     
+    metrics.analysis_duration.observe(
+        time.perf_counter() - started,
+        defects=metrics.defect_count_label(len(defects))
+    )
     return results
\ No newline at end of file
@@ -0,0 +1,256 @@
+import bisect
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..db import crud
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from ..utils.worker import PeriodicWorker
+from .analysis_service import filter_defects_by_region
+
+# Load configuration
+config = load_config()
+CORRELATION_CONFIG = config.get('correlation', {})
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FAIL_VALUES = {value.upper() for value in CORRELATION_CONFIG.get('fail_values', ["FAIL", "F", "NG", "REJECT"])}
+
+
+def is_human_fail(pass_fail: Optional[str]) -> bool:
+    return (pass_fail or "").strip().upper() in FAIL_VALUES
+
+
+def _normalize(name: Optional[str]) -> str:
+    return (name or "").strip().upper()
+
+
+class PartIndex:
+    """
+    Triggers of a time range, sorted by part_instance so every trigger whose
+    part_instance starts with a serial number is found with two bisections.
+    """
+
+    def __init__(self, triggers: List[Any]):
+        self._entries = sorted((t.part_instance, t.timestamp, t.id) for t in triggers if t.part_instance)
+        self._keys = [entry[0] for entry in self._entries]
+
+    def match(self, serial_no: str, scanned_at: datetime, before: timedelta, after: timedelta) -> Optional[int]:
+        # Nearest trigger in time among those with a matching part_instance prefix
+        low = bisect.bisect_left(self._keys, serial_no)
+        high = bisect.bisect_left(self._keys, serial_no + "\U0010ffff")
+        best: Optional[Tuple[float, int]] = None
+        for _, timestamp, trigger_id in self._entries[low:high]:
+            delta = (timestamp - scanned_at).total_seconds()
+            if delta < -before.total_seconds() or delta > after.total_seconds():
+                continue
+            if best is None or abs(delta) < best[0]:
+                best = (abs(delta), trigger_id)
+        return best[1] if best else None
+
+
+class Correlator:
+    """
+    Matches HumanInspect rows to the trigger of their part and writes Inspection_Links
+    with the machine and human verdict per image and per active region.
+
+    The machine fails an image (region) when it has unsuppressed defects (centered in the
+    region). The human fails it when pass_fail is a fail value; for a region, defect_area
+    must also name the region (Regions.region_id, or via area_regions) or be blank.
+    """
+
+    def __init__(
+        self,
+        window_before: timedelta = timedelta(hours=12),
+        window_after: timedelta = timedelta(minutes=5),
+        area_regions: Optional[Dict[str, List[str]]] = None,
+        max_span: timedelta = timedelta(hours=24)
+    ):
+        self.window_before = window_before
+        self.window_after = window_after
+        self.max_span = max_span
+        self.area_regions = {
+            _normalize(area): {_normalize(name) for name in names}
+            for area, names in (area_regions or {}).items()
+        }
+
+    def _human_fails_region(self, scan, region) -> bool:
+        if not is_human_fail(scan.pass_fail):
+            return False
+        area = _normalize(scan.defect_area)
+        if not area:
+            return True
+        region_name = _normalize(region.region_id)
+        return area == region_name or region_name in self.area_regions.get(area, ())
+
+    def _time_groups(self, timed: List[Any]) -> List[List[Any]]:
+        # Scans of a backfill can be far apart; read candidate triggers per cluster of scan times
+        groups: List[List[Any]] = []
+        for scan in timed:
+            if groups and scan.scanned_at - groups[-1][0].scanned_at <= self.max_span:
+                groups[-1].append(scan)
+            else:
+                groups.append([scan])
+        return groups
+
+    def links_for(self, db, scans: List[Any]) -> List[Dict[str, Any]]:
+        """Build the link rows of a batch of scans with a fixed number of queries."""
+        timed = sorted(
+            (scan for scan in scans if scan.scanned_at is not None and (scan.serial_no or "").strip()),
+            key=lambda scan: scan.scanned_at
+        )
+
+        trigger_by_scan = {}
+        for group in self._time_groups(timed):
+            parts = PartIndex(crud.get_triggers_between(
+                db,
+                _as_utc(group[0].scanned_at) - self.window_before,
+                _as_utc(group[-1].scanned_at) + self.window_after
+            ))
+            for scan in group:
+                trigger_id = parts.match(scan.serial_no.strip(), _as_utc(scan.scanned_at), self.window_before, self.window_after)
+                if trigger_id is not None:
+                    trigger_by_scan[scan.id] = trigger_id
+
+        images_by_trigger = defaultdict(list)
+        defects_by_image = defaultdict(list)
+        if trigger_by_scan:
+            for image in crud.get_images_by_triggers(db, list(set(trigger_by_scan.values()))):
+                images_by_trigger[image.trigger_id].append(image)
+            image_ids = [image.id for images in images_by_trigger.values() for image in images]
+            if image_ids:
+                for defect in crud.get_unsuppressed_defect_boxes(db, image_ids):
+                    if None not in (defect.x, defect.y, defect.width, defect.height):
+                        defects_by_image[defect.image_id].append(defect)
+
+        # Regions come from the reference cache, so this is one query per camera at most
+        regions_by_camera = {}
+
+        links = []
+        linked_at = datetime.now(timezone.utc)
+        for scan in scans:
+            trigger_id = trigger_by_scan.get(scan.id)
+            base = {"human_inspect_id": scan.id, "scanned_at": scan.scanned_at, "linked_at": linked_at}
+            if trigger_id is None or not images_by_trigger.get(trigger_id):
+                # Counted as unmatched; also keeps the correlation watermark moving
+                links.append({**base, "trigger_id": trigger_id, "human_fail": is_human_fail(scan.pass_fail)})
+                continue
+
+            for image in images_by_trigger[trigger_id]:
+                defects = defects_by_image.get(image.id, [])
+                image_link = {**base, "trigger_id": trigger_id, "image_id": image.id, "camera_id": image.camera_id}
+                links.append({
+                    **image_link,
+                    "human_fail": is_human_fail(scan.pass_fail),
+                    "machine_fail": bool(defects),
+                    "machine_defects": len(defects)
+                })
+
+                if image.camera_id not in regions_by_camera:
+                    regions_by_camera[image.camera_id] = crud.get_regions_by_camera(db, camera_id=image.camera_id)
+                for region in regions_by_camera[image.camera_id]:
+                    inside = filter_defects_by_region(defects, region)
+                    links.append({
+                        **image_link,
+                        "region_id": region.id,
+                        "human_fail": self._human_fails_region(scan, region),
+                        "machine_fail": bool(inside),
+                        "machine_defects": len(inside)
+                    })
+
+        return links
+
+
+def _as_utc(value: datetime) -> datetime:
+    # HumanInspect times are naive plant-local times; Triggers are timezone aware
+    return value.astimezone(timezone.utc) if value.tzinfo is None else value
+
+
+def build_correlator() -> Correlator:
+    return Correlator(
+        window_before=timedelta(minutes=CORRELATION_CONFIG.get('window_before_minutes', 720)),
+        window_after=timedelta(minutes=CORRELATION_CONFIG.get('window_after_minutes', 5)),
+        area_regions=CORRELATION_CONFIG.get('area_regions', {})
+    )
+
+
+def correlate_range(
+    start_id: Optional[int] = None,
+    end_id: Optional[int] = None,
+    correlator: Optional[Correlator] = None,
+    batch_size: int = 500,
+    on_batch=None,
+    rescan_ids: int = 0
+) -> int:
+    """
+    Correlate HumanInspect rows with start_id < id <= end_id in id order (by default,
+    everything after the stored watermark). With rescan_ids, rows without links among the
+    rescan_ids ids up to the watermark are correlated first: rows committed after higher
+    ids had already been passed. Returns the number of links written.
+    """
+    correlator = correlator or build_correlator()
+    written = 0
+
+    db = SessionLocal()
+    try:
+        after_id = crud.get_correlation_watermark(db) if start_id is None else start_id
+        if rescan_ids:
+            late = crud.get_human_inspect_for_correlation(
+                db, after_id=max(0, after_id - rescan_ids), limit=batch_size, until_id=after_id, unlinked_only=True
+            )
+            if late:
+                logger.info(f"Correlating {len(late)} HumanInspect rows committed behind the watermark")
+                written += crud.create_inspection_links(db, correlator.links_for(db, late))
+
+        while True:
+            scans = crud.get_human_inspect_for_correlation(db, after_id=after_id, limit=batch_size, until_id=end_id)
+            if not scans:
+                break
+            after_id = scans[-1].id
+
+            written += crud.create_inspection_links(db, correlator.links_for(db, scans), last_human_inspect_id=after_id)
+            if on_batch is not None:
+                on_batch(after_id, written)
+    finally:
+        db.close()
+
+    return written
+
+
+class CorrelationWorker(PeriodicWorker):
+    """Correlates newly ingested HumanInspect rows, continuing from the stored watermark."""
+
+    def __init__(self, correlator: Optional[Correlator] = None):
+        super().__init__(
+            name="inspection-correlation",
+            interval_seconds=float(CORRELATION_CONFIG.get('poll_interval_seconds', 30.0))
+        )
+        self.correlator = correlator or build_correlator()
+        self.batch_size = CORRELATION_CONFIG.get('batch_size', 500)
+        self.rescan_ids = CORRELATION_CONFIG.get('rescan_ids', 1000)
+
+    def run_once(self):
+        written = correlate_range(correlator=self.correlator, batch_size=self.batch_size, rescan_ids=self.rescan_ids)
+        if written:
+            logger.info(f"Linked {written} inspection rows to parts")
+
+
+_worker: Optional[CorrelationWorker] = None
+
+
+def start_worker():
+    """Start the process-wide correlation worker (idempotent)."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = CorrelationWorker()
+        _worker.start()
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import func
+
+from ..db import models
+from ..db.cache import reference_cache
+from ..db.database import DATABASE_URL, SessionLocal
+from ..utils.config import load_config
+
+# Load configuration
+config = load_config()
+STREAM_CONFIG = config.get('stream', {})
+CHANNEL = STREAM_CONFIG.get('channel', 'porosity_events')
+REFERENCE_CHANNEL = STREAM_CONFIG.get('reference_channel', 'porosity_reference')
+MODE = STREAM_CONFIG.get('mode', 'listen')
+POLL_INTERVAL = float(STREAM_CONFIG.get('poll_interval_seconds', 2.0))
+COALESCE_SECONDS = STREAM_CONFIG.get('coalesce_ms', 250) / 1000.0
+RECONNECT_SECONDS = float(STREAM_CONFIG.get('reconnect_seconds', 10.0))
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class EventBroadcaster:
+    """
+    Fans events out to every connected stream client.
+    Each client owns an asyncio.Queue; publish() is safe to call from any thread.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        """Call `callback(event)` on the publishing thread for every event, before clients see it."""
+        self._callbacks.append(callback)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a new client on the running event loop and return its queue."""
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not queue}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: Dict[str, Any]):
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Event callback error: {str(e)}")
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+    # A client that stopped reading loses its oldest event rather than blocking everyone else
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+broadcaster = EventBroadcaster()
+
+
+def build_trigger_events(changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse raw image/defect change notifications into one "new_trigger" event per trigger.
+    """
+    by_trigger: Dict[Any, Dict[str, Any]] = {}
+    for change in changes:
+        trigger_id = change.get("trigger_id")
+        event = by_trigger.setdefault(trigger_id, {
+            "event": "new_trigger",
+            "trigger_id": trigger_id,
+            "cameras": [],
+            "image_ids": []
+        })
+        camera = change.get("camera")
+        if camera and camera not in event["cameras"]:
+            event["cameras"].append(camera)
+        image_id = change.get("image_id")
+        if image_id and image_id not in event["image_ids"]:
+            event["image_ids"].append(image_id)
+
+    return list(by_trigger.values())
+
+
+class TriggerListener(threading.Thread):
+    """
+    Single per-process watcher that turns new Images/Defects rows into stream events.
+
+    Uses Postgres LISTEN/NOTIFY (see sql/stream_notify.sql). If the LISTEN connection
+    cannot be established, or mode is 'poll', it polls for new image ids instead and
+    retries LISTEN periodically. Reference table notifications invalidate the process's
+    reference_cache as they arrive.
+    """
+
+    def __init__(self, event_broadcaster: EventBroadcaster = broadcaster):
+        super().__init__(name="trigger-listener", daemon=True)
+        self.broadcaster = event_broadcaster
+        self._stop_event = threading.Event()
+        self._last_image_id: Optional[int] = None
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if MODE == 'listen':
+                try:
+                    self._listen()
+                    continue
+                except Exception as e:
+                    logger.warning(f"LISTEN on '{CHANNEL}' unavailable, polling instead: {str(e)}")
+
+            # Polling fallback; in listen mode LISTEN is retried after RECONNECT_SECONDS
+            deadline = time.monotonic() + RECONNECT_SECONDS
+            while not self._stop_event.is_set() and (MODE == 'poll' or time.monotonic() < deadline):
+                try:
+                    self._poll_once()
+                except Exception as e:
+                    logger.error(f"Stream polling error: {str(e)}")
+                self._stop_event.wait(POLL_INTERVAL)
+
+    def _listen(self):
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{CHANNEL}";')
+                cursor.execute(f'LISTEN "{REFERENCE_CHANNEL}";')
+            logger.info(f"Listening for database notifications on '{CHANNEL}' and '{REFERENCE_CHANNEL}'")
+
+            # Anything inserted while we weren't listening is picked up by one poll, and
+            # reference writes we may have missed by dropping the cache
+            reference_cache.invalidate_all()
+            self._poll_once()
+
+            pending: List[Dict[str, Any]] = []
+            flush_at = 0.0
+            while not self._stop_event.is_set():
+                # Wake up regularly to notice stop(); flush COALESCE_SECONDS after the oldest
+                # pending notification, so a steady stream of them can't hold events back
+                timeout = max(0.0, flush_at - time.monotonic()) if pending else 1.0
+                if select.select([conn], [], [], timeout) != ([], [], []):
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.channel == REFERENCE_CHANNEL:
+                            reference_cache.invalidate(notify.payload)
+                            continue
+                        try:
+                            change = json.loads(notify.payload)
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed notification payload: {notify.payload}")
+                            continue
+                        if not pending:
+                            flush_at = time.monotonic() + COALESCE_SECONDS
+                        pending.append(change)
+
+                if pending and time.monotonic() >= flush_at:
+                    self._publish(pending)
+                    pending = []
+        finally:
+            conn.close()
+
+    def _poll_once(self):
+        db = SessionLocal()
+        try:
+            if self._last_image_id is None:
+                # Start from the current head; clients already have everything before it
+                self._last_image_id = db.query(func.max(models.Image.id)).scalar() or 0
+                return
+
+            new_images = (
+                db.query(models.Image.id, models.Image.trigger_id, models.Image.camera_id)
+                .filter(models.Image.id > self._last_image_id)
+                .order_by(models.Image.id)
+                .all()
+            )
+        finally:
+            db.close()
+
+        if new_images:
+            self._last_image_id = new_images[-1].id
+            self._publish([
+                {"image_id": row.id, "trigger_id": row.trigger_id, "camera": row.camera_id}
+                for row in new_images
+            ])
+
+    def _publish(self, changes: List[Dict[str, Any]]):
+        for change in changes:
+            image_id = change.get("image_id")
+            if image_id and (self._last_image_id is None or image_id > self._last_image_id):
+                self._last_image_id = image_id
+
+        for event in build_trigger_events(changes):
+            self.broadcaster.publish(event)
+
+
+_listener: Optional[TriggerListener] = None
+
+
+def start_listener():
+    """Start the process-wide listener (idempotent)."""
+    global _listener
+    if _listener is None or not _listener.is_alive():
+        _listener = TriggerListener()
+        _listener.start()
+
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
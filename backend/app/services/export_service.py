@@ -0,0 +1,199 @@
+import csv
+import io
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..db import crud
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from . import retention_service
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Load configuration
+config = load_config()
+EXPORT_CONFIG = config.get('export', {})
+BATCH_ROWS = EXPORT_CONFIG.get('batch_rows', 50000)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "parquet")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Column order of the export, matching crud.defect_export_statement
+COLUMNS = (
+    "defect_id", "image_id", "trigger_id", "trigger_timestamp", "part", "part_instance",
+    "belt", "camera", "camera_group", "x", "y", "width", "height", "confidence", "type",
+    "disposition", "dispositioned_at", "disposition_notes",
+)
+
+
+class ExportError(Exception):
+    """Exception raised when an export can't be produced as requested."""
+    pass
+
+
+def check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}'; expected one of {', '.join(FORMATS)}")
+    if fmt == "parquet" and pq is None:
+        raise ExportError("Parquet export requires the pyarrow package")
+
+
+def export_filename(fmt: str, start: datetime, end: datetime, compress: bool) -> str:
+    name = f"defects_{start:%Y%m%dT%H%M}_{end:%Y%m%dT%H%M}.{fmt}"
+    # Parquet compresses its column chunks internally
+    return name + ".gz" if compress and fmt == "csv" else name
+
+
+def iter_defect_batches(
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    disposition: Optional[str] = None,
+    batch_rows: int = BATCH_ROWS
+) -> Iterator[List[Any]]:
+    """
+    Yield export rows in lists of at most batch_rows, read through a server-side cursor
+    so memory stays bounded by one batch however large the range is. Ranges reaching
+    past retention.hot_days also read the archive.
+    """
+    db = SessionLocal()
+    try:
+        statement = crud.defect_export_statement(
+            start, end,
+            camera_id=camera_id,
+            disposition=disposition,
+            include_archive=retention_service.reaches_archive(start)
+        )
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=batch_rows))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _csv_chunks(batches: Iterator[List[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+
+    for batch in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ChunkSink(io.RawIOBase):
+    # Write-only file that hands written bytes back to the caller instead of storing them
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("defect_id", pa.int64()),
+        ("image_id", pa.int64()),
+        ("trigger_id", pa.int64()),
+        ("trigger_timestamp", pa.timestamp("us", tz="UTC")),
+        ("part", pa.string()),
+        ("part_instance", pa.string()),
+        ("belt", pa.string()),
+        ("camera", pa.string()),
+        ("camera_group", pa.int32()),
+        ("x", pa.int32()),
+        ("y", pa.int32()),
+        ("width", pa.int32()),
+        ("height", pa.int32()),
+        ("confidence", pa.float64()),
+        ("type", pa.string()),
+        ("disposition", pa.string()),
+        ("dispositioned_at", pa.timestamp("us", tz="UTC")),
+        ("disposition_notes", pa.string()),
+    ])
+
+
+def _parquet_chunks(batches: Iterator[List[Any]], compress: bool) -> Iterator[bytes]:
+    schema = _parquet_schema()
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd" if compress else "snappy")
+    try:
+        # One row group per batch, sent as soon as it's written
+        for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_defect_export(
+    start: datetime,
+    end: datetime,
+    fmt: str = "csv",
+    compress: bool = False,
+    camera_id: Optional[str] = None,
+    disposition: Optional[str] = None,
+    batch_rows: int = BATCH_ROWS
+) -> Iterator[bytes]:
+    """
+    Stream defects with their image, trigger and camera for triggers in [start, end) as
+    CSV (gzip'd if compress) or Parquet (zstd column chunks if compress).
+    """
+    check_format(fmt)
+    batches = iter_defect_batches(start, end, camera_id=camera_id, disposition=disposition, batch_rows=batch_rows)
+
+    if fmt == "parquet":
+        return _parquet_chunks(batches, compress)
+
+    chunks = _csv_chunks(batches)
+    return _gzip(chunks) if compress else chunks
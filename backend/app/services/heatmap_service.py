@@ -0,0 +1,275 @@
+import io
+import logging
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..db import crud
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from ..utils.worker import PeriodicWorker
+from .image_service import DEFAULT_IMAGE_SIZE
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+# Load configuration
+config = load_config()
+HEATMAP_CONFIG = config.get('heatmap', {})
+GRID_SIZE = HEATMAP_CONFIG.get('grid_size', 64)
+DEFAULT_WINDOW_HOURS = HEATMAP_CONFIG.get('default_window_hours', 24 * 7)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FORMATS = ("png", "json", "npy")
+
+
+class HeatmapError(Exception):
+    """Exception raised when a heatmap can't be produced as requested."""
+    pass
+
+
+def encode_histogram(histogram: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, histogram.astype(np.uint32), allow_pickle=False)
+    return zlib.compress(buffer.getvalue())
+
+
+def decode_histogram(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(zlib.decompress(data)), allow_pickle=False)
+
+
+def accumulate(defects: List[Any], grid_size: int) -> Dict[Tuple[str, datetime], np.ndarray]:
+    """
+    Bin defect centers, normalized by their image size, into a grid_size x grid_size
+    histogram per (camera, hour). Defects without a box or a trigger hour are skipped.
+    """
+    usable = [
+        d for d in defects
+        if d.hour is not None and None not in (d.x, d.y, d.width, d.height)
+    ]
+    if not usable:
+        return {}
+
+    boxes = np.array([(d.x, d.y, d.width, d.height) for d in usable], dtype=np.float64)
+    sizes = np.array(
+        [(d.image_width or DEFAULT_IMAGE_SIZE, d.image_height or DEFAULT_IMAGE_SIZE) for d in usable],
+        dtype=np.float64
+    )
+    centers = (boxes[:, :2] + boxes[:, 2:] / 2) / sizes
+    cells = np.clip((centers * grid_size).astype(np.int64), 0, grid_size - 1)
+
+    indices = defaultdict(list)
+    for index, defect in enumerate(usable):
+        indices[(defect.camera_id, defect.hour)].append(index)
+
+    histograms = {}
+    for key, rows in indices.items():
+        histogram = np.zeros((grid_size, grid_size), dtype=np.uint32)
+        # Row is y, column is x, as in the image
+        np.add.at(histogram, (cells[rows, 1], cells[rows, 0]), 1)
+        histograms[key] = histogram
+    return histograms
+
+
+def merge_into_buckets(db, histograms: Dict[Tuple[str, datetime], np.ndarray], grid_size: int, last_defect_id: int):
+    """
+    Add partial histograms to the stored hourly buckets and advance the watermark, in one
+    transaction. Callers hold crud.lock_heatmaps from before reading the defects.
+    """
+    existing = {
+        (bucket.camera_id, bucket.hour): bucket
+        for bucket in crud.get_heatmap_buckets(db, list(histograms), grid_size)
+    }
+
+    buckets = []
+    for (camera_id, hour), histogram in histograms.items():
+        bucket = existing.get((camera_id, hour))
+        if bucket is not None:
+            histogram = histogram + decode_histogram(bucket.histogram)
+        buckets.append({
+            "camera_id": camera_id,
+            "hour": hour,
+            "grid_size": grid_size,
+            "histogram": encode_histogram(histogram),
+            "defect_count": int(histogram.sum()),
+            "last_defect_id": last_defect_id
+        })
+    crud.save_heatmap_buckets(db, buckets)
+
+
+def build_range(
+    start_id: Optional[int] = None,
+    end_id: Optional[int] = None,
+    grid_size: int = GRID_SIZE,
+    batch_size: int = 20000,
+    on_batch=None,
+    gaps: Optional[Set[int]] = None,
+    lag: int = 10000
+) -> int:
+    """
+    Add defects with start_id < id <= end_id (by default, everything after the stored
+    watermark) to the hourly heatmaps. Returns the number of defects read.
+
+    Every batch holds the heatmap lock from reading the watermark to the commit, so
+    concurrent runs take turns instead of adding the same defects twice. Ids skipped
+    inside a batch (not committed yet, or rolled back) less than lag below its last id
+    are added to gaps if given, for rescan_gaps.
+    """
+    processed = 0
+    after_id = start_id or 0
+    db = SessionLocal()
+    try:
+        while True:
+            crud.lock_heatmaps(db, grid_size)
+            if start_id is None:
+                after_id = max(after_id, crud.get_heatmap_watermark(db, grid_size))
+            defects = crud.get_defects_for_heatmap(db, after_id=after_id, limit=batch_size, until_id=end_id)
+            if not defects:
+                db.rollback()
+                break
+
+            if gaps is not None:
+                skipped = range(max(after_id + 1, defects[-1].id - lag), defects[-1].id)
+                gaps.update(set(skipped) - {defect.id for defect in defects})
+            after_id = defects[-1].id
+
+            histograms = accumulate(defects, grid_size)
+            if histograms:
+                merge_into_buckets(db, histograms, grid_size, after_id)
+            else:
+                db.rollback()
+            processed += len(defects)
+            if on_batch is not None:
+                on_batch(after_id, processed)
+    finally:
+        db.close()
+
+    return processed
+
+
+def rescan_gaps(gaps: Set[int], grid_size: int = GRID_SIZE, lag: int = 10000) -> int:
+    """
+    Add defects whose ids build_range skipped but that have been committed since, and
+    forget gaps more than lag ids below the watermark (rolled back inserts). Returns the
+    number of defects added.
+    """
+    db = SessionLocal()
+    try:
+        crud.lock_heatmaps(db, grid_size)
+        watermark = crud.get_heatmap_watermark(db, grid_size)
+        gaps.difference_update({defect_id for defect_id in gaps if defect_id <= watermark - lag})
+        if not gaps:
+            db.rollback()
+            return 0
+
+        defects = crud.get_defects_for_heatmap_by_ids(db, sorted(gaps))
+        histograms = accumulate(defects, grid_size)
+        if histograms:
+            merge_into_buckets(db, histograms, grid_size, watermark)
+        else:
+            db.rollback()
+        gaps.difference_update(defect.id for defect in defects)
+        return len(defects)
+    finally:
+        db.close()
+
+
+def combine(rows: Iterable[Any], grid_size: int) -> Tuple[np.ndarray, int]:
+    """Sum hourly (hour, histogram, defect_count) rows into one histogram."""
+    total = np.zeros((grid_size, grid_size), dtype=np.uint64)
+    count = 0
+    for row in rows:
+        total += decode_histogram(row.histogram)
+        count += row.defect_count
+    return total, count
+
+
+def default_window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = end or datetime.now(timezone.utc)
+    return start or end - timedelta(hours=DEFAULT_WINDOW_HOURS), end
+
+
+def render_png(histogram: np.ndarray, width: int, height: int, opacity: float = 0.6) -> bytes:
+    """
+    Render a histogram as a transparent overlay: empty cells are clear, busier cells
+    go from yellow to red with increasing opacity. Scaled with a square root so a few
+    hot spots don't wash out the rest.
+    """
+    if PILImage is None:
+        raise HeatmapError("PNG heatmaps require the Pillow package")
+
+    peak = histogram.max()
+    intensity = np.sqrt(histogram / peak) if peak else np.zeros(histogram.shape)
+
+    rgba = np.zeros(histogram.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = 255
+    rgba[..., 1] = (255 * (1 - intensity)).astype(np.uint8)
+    rgba[..., 3] = (255 * opacity * intensity).astype(np.uint8)
+
+    image = PILImage.fromarray(rgba, mode="RGBA").resize((width, height), PILImage.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def to_npy(histogram: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, histogram, allow_pickle=False)
+    return buffer.getvalue()
+
+
+class HeatmapWorker(PeriodicWorker):
+    """
+    Adds newly arrived defects to the hourly heatmaps, continuing from the stored watermark,
+    and picks up defects committed after the watermark passed their ids.
+    """
+
+    def __init__(self):
+        super().__init__(
+            name="defect-heatmap",
+            interval_seconds=float(HEATMAP_CONFIG.get('poll_interval_seconds', 10.0))
+        )
+        self.batch_size = HEATMAP_CONFIG.get('batch_size', 5000)
+        self.rescan_ids = HEATMAP_CONFIG.get('rescan_ids', 10000)
+        # Skipped ids below the watermark, re-checked every run until rescan_ids behind it
+        self._gaps: Set[int] = set()
+
+    def run_once(self):
+        if self._gaps:
+            late = rescan_gaps(self._gaps, lag=self.rescan_ids)
+            if late:
+                logger.info(f"Added {late} defects committed behind the heatmap watermark")
+
+        processed = build_range(batch_size=self.batch_size, gaps=self._gaps, lag=self.rescan_ids)
+        if processed:
+            logger.debug(f"Added {processed} defects to the heatmaps")
+
+
+_worker: Optional[HeatmapWorker] = None
+
+
+def start_worker():
+    """Start the process-wide heatmap worker (idempotent)."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = HeatmapWorker()
+        _worker.start()
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def wake_worker():
+    if _worker is not None:
+        _worker.wake()
@@ -1,16 +1,21 @@
 import os
 import tempfile
 import logging
+import threading
+from contextlib import contextmanager
 from ftplib import FTP
 import time
 import hashlib
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 import yaml
 from sqlalchemy.orm import Session
 import re # Import regex module
 import posixpath # Import posixpath for FTP paths
 
+from . import overlay_service
+from ..utils import metrics
+
 # Load configuration
 config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'config.yaml')
 with open(config_path, 'r') as config_file:
@@ -26,6 +31,11 @@ CACHE_DIR = os.path.join(tempfile.gettempdir(), 'ford_porosity_cache')
 os.makedirs(CACHE_DIR, exist_ok=True)
 CACHE_TTL = IMAGE_ACCESS.get('ftp', {}).get('cache_ttl_seconds', 3600)
 CACHE_ENABLED = IMAGE_ACCESS.get('ftp', {}).get('cache_enabled', True)
+FTP_POOL_SIZE = IMAGE_ACCESS.get('ftp', {}).get('pool_size', 4)
+FTP_IDLE_CHECK_SECONDS = IMAGE_ACCESS.get('ftp', {}).get('idle_check_seconds', 30)
+
+# Image size assumed when the Images row has no width/height
+DEFAULT_IMAGE_SIZE = 5120
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -56,8 +66,11 @@ def get_ftp_connection() -> FTP:
         if not host or not username or not password:
             raise ImageAccessError("Missing FTP configuration parameters")
         
-        ftp = FTP(host)
+        started = time.perf_counter()
+        ftp = FTP()
+        ftp.connect(host, ftp_config.get('port', 21))
         ftp.login(username, password)
+        metrics.ftp_connect_duration.observe(time.perf_counter() - started)
         logger.debug(f"Connected to FTP server {host}")
         return ftp
     
@@ -66,6 +79,70 @@ def get_ftp_connection() -> FTP:
         raise ImageAccessError(f"Failed to connect to FTP server: {str(e)}")
 
 
+def _close_quietly(ftp: FTP):
+    try:
+        ftp.quit()
+    except Exception:
+        ftp.close()
+
+
+class FTPConnectionPool:
+    """
+    Logged-in FTP connections shared by image fetches, so parallel fetches don't each
+    pay connect + login. At most max_size connections exist at once; a connection idle
+    longer than idle_seconds is checked with NOOP before reuse, and one that fails
+    while borrowed is discarded.
+    """
+
+    def __init__(self, max_size: int = 4, idle_seconds: float = 30.0):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._idle: List[Tuple[FTP, float]] = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            ftp = self._checkout()
+            try:
+                yield ftp
+            except Exception:
+                _close_quietly(ftp)
+                raise
+            with self._lock:
+                self._idle.append((ftp, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _checkout(self) -> FTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                ftp, returned_at = self._idle.pop()
+            
+            if time.monotonic() - returned_at < self.idle_seconds:
+                return ftp
+            try:
+                ftp.voidcmd("NOOP")
+                return ftp
+            except Exception:
+                _close_quietly(ftp)
+        
+        return get_ftp_connection()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for ftp, _ in idle:
+            _close_quietly(ftp)
+
+
+ftp_pool = FTPConnectionPool(max_size=FTP_POOL_SIZE, idle_seconds=FTP_IDLE_CHECK_SECONDS)
+
+
 def generate_cache_key(image_path: str) -> str:
     """Generate a cache key from the image path."""
     return hashlib.md5(image_path.encode()).hexdigest()
@@ -96,6 +173,20 @@ def get_cached_path(image_path: str) -> Optional[str]:
     return None
 
 
+def evict_cached_images(image_paths: List[str]) -> int:
+    """Remove cached copies of the given images; returns how many files were removed."""
+    removed = 0
+    for image_path in image_paths:
+        try:
+            os.remove(os.path.join(CACHE_DIR, generate_cache_key(image_path)))
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove cached image for {image_path}: {str(e)}")
+    return removed
+
+
 def fetch_ftp_image(image_path: str) -> str:
     """
     Fetch an image from FTP server and return the local path.
@@ -104,6 +195,8 @@ def fetch_ftp_image(image_path: str) -> str:
     # Check cache first
     cache_path = get_cached_path(image_path)
     if cache_path:
+        metrics.image_cache_requests.inc(result="hit")
+        metrics.image_cache_bytes.inc(os.path.getsize(cache_path), result="hit")
         return cache_path
     
     try:
@@ -111,9 +204,6 @@ def fetch_ftp_image(image_path: str) -> str:
         cache_key = generate_cache_key(image_path)
         local_path = os.path.join(CACHE_DIR, cache_key)
         
-        # Connect to FTP
-        ftp = get_ftp_connection()
-        
         # Construct the remote path
         ftp_config = IMAGE_ACCESS.get('ftp', {})
         base_path = ftp_config.get('base_path', '')
@@ -132,11 +222,20 @@ def fetch_ftp_image(image_path: str) -> str:
         # Create parent directories if they don't exist
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
         
-        # Download the file
-        with open(local_path, 'wb') as f:
-            ftp.retrbinary(f'RETR {remote_path}', f.write)
+        # Download to a temporary name so concurrent readers never see a partial file
+        tmp_path = f"{local_path}.{threading.get_ident()}.part"
+        try:
+            with ftp_pool.connection() as ftp, open(tmp_path, 'wb') as f:
+                started = time.perf_counter()
+                ftp.retrbinary(f'RETR {remote_path}', f.write)
+                metrics.ftp_transfer_duration.observe(time.perf_counter() - started)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
         
-        ftp.quit()
+        metrics.image_cache_requests.inc(result="miss")
+        metrics.image_cache_bytes.inc(os.path.getsize(local_path), result="miss")
         logger.info(f"Downloaded image from FTP: {remote_path}")
         return local_path
     
@@ -268,8 +367,15 @@ def get_image_url(image) -> Optional[str]:
     if not image or not image.id:
         return None
     
+    return get_image_url_by_id(image.id)
+
+
+def get_image_url_by_id(image_id: int) -> str:
+    """
+    Get the frontend URL for an image when only its id is loaded.
+    """
     # Return an API URL that the frontend can use to get the image
-    return f"/api/images/{image.id}/file"
+    return f"/api/images/{image_id}/file"
 
 
 def normalize_defect_coordinates(defect, image_width, image_height) -> Dict[str, float]:
@@ -292,28 +398,54 @@ def normalize_defect_coordinates(defect, image_width, image_height) -> Dict[str,
     }
 
 
-def convert_defects_to_yolo_format(defects, image_width, image_height) -> str:
+def defect_to_normalized_dict(defect, image_width, image_height) -> Dict[str, Any]:
+    """
+    Build the DefectNormalized payload for a defect as a plain dict.
+    Used on the trusted serialization path, so it must produce exactly the schema's fields.
+    """
+    return {
+        "id": defect.id,
+        "image_id": defect.image_id,
+        "normalized": normalize_defect_coordinates(defect, image_width, image_height),
+        "x": defect.x,
+        "y": defect.y,
+        "width": defect.width,
+        "height": defect.height,
+        "confidence": defect.confidence,
+        "type": defect.type,
+        "disposition": defect.disposition,
+        "metadata": None
+    }
+
+
+def defect_class_id(defect) -> int:
+    """YOLO class of a defect: its numeric type, or 0."""
+    return int(defect.type) if defect.type and defect.type.isdigit() else 0
+
+
+def convert_defects_to_yolo_format(
+    defects, image_width, image_height, class_ids: Optional[Sequence[int]] = None
+) -> str:
     """
     Convert defects to YOLO format text for frontend compatibility.
+    class_ids overrides the per-defect class (e.g. classes by disposition for training sets).
     """
-    yolo_lines = []
+    columns = overlay_service.defect_columns(defects, image_width, image_height)
     
-    for defect in defects:
-        # Calculate normalized center coordinates
-        x_center = (defect.x + defect.width / 2) / image_width
-        y_center = (defect.y + defect.height / 2) / image_height
-        
-        # Calculate normalized width and height
-        width_norm = defect.width / image_width
-        height_norm = defect.height / image_height
-        
-        # Use type as class or default to 0
-        class_id = 0
-        if defect.type and defect.type.isdigit():
-            class_id = int(defect.type)
-        
-        # Format: class_id x_center y_center width height
-        yolo_line = f"{class_id} {x_center} {y_center} {width_norm} {height_norm}"
-        yolo_lines.append(yolo_line)
+    # Use type as class or default to 0
+    if class_ids is None:
+        class_ids = [defect_class_id(defect) for defect in defects]
+    
+    # Format: class_id x_center y_center width height
+    yolo_lines = [
+        f"{class_id} {x_center} {y_center} {width_norm} {height_norm}"
+        for class_id, x_center, y_center, width_norm, height_norm in zip(
+            class_ids,
+            columns["x_center"].tolist(),
+            columns["y_center"].tolist(),
+            columns["width_norm"].tolist(),
+            columns["height_norm"].tolist()
+        )
+    ]
     
-    return "\n".join(yolo_lines)
\ No newline at end of file
+    return "\n".join(yolo_lines)
@@ -0,0 +1,370 @@
+import csv
+import fnmatch
+import io
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..db import crud
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from ..utils.worker import PeriodicWorker
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Load configuration
+config = load_config()
+INGEST_CONFIG = config.get('human_inspect_ingest', {})
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HumanInspect columns filled from scan files, in COPY order
+COLUMNS = (
+    "scan_id", "part_suffix", "serial_no", "julian_date", "cast_id_1", "cast_id_2", "cast_id_3",
+    "defect_area", "size", "impreg", "location_row", "location_column", "pass_fail",
+    "scan_datetime", "file_name",
+)
+INTEGER_COLUMNS = {"cast_id_1", "cast_id_2", "cast_id_3", "location_row", "location_column"}
+
+DATETIME_FORMATS = INGEST_CONFIG.get('datetime_formats', ["%m/%d/%Y %H:%M:%S", "%m/%d/%Y %I:%M:%S %p"])
+
+
+class ScanFileError(Exception):
+    """Exception raised when a scan file can't be parsed."""
+    pass
+
+
+def _header_key(name: str) -> str:
+    # "Location Row" / "location_row" / "LocationRow" -> "locationrow"
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ScanFileError(f"Unrecognized scan_datetime '{value}'")
+
+
+def parse_scan_file(path: str, file_name: str, column_map: Dict[str, str]) -> List[Tuple[Any, ...]]:
+    """
+    Parse one scan file (CSV with a header row) into HumanInspect tuples in COLUMNS order.
+
+    Headers are matched to columns case- and punctuation-insensitively, after applying
+    column_map (file header -> column) for headers named differently. Runs in worker
+    processes, so it only uses its arguments.
+    """
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        try:
+            header = next(reader)
+        except StopIteration:
+            return []
+
+        keys = [_header_key(column_map.get(name.strip(), name)) for name in header]
+        positions = {column: keys.index(_header_key(column)) for column in COLUMNS if _header_key(column) in keys}
+        if "serial_no" not in positions:
+            raise ScanFileError(f"{file_name}: no serial_no column in header {header}")
+
+        rows = []
+        for line_number, record in enumerate(reader, start=2):
+            if not any(field.strip() for field in record):
+                continue
+
+            values = []
+            for column in COLUMNS:
+                position = positions.get(column)
+                value = record[position].strip() if position is not None and position < len(record) else ""
+                if column == "file_name":
+                    values.append(file_name)
+                elif not value:
+                    values.append(None)
+                elif column in INTEGER_COLUMNS:
+                    try:
+                        values.append(int(float(value)))
+                    except ValueError:
+                        raise ScanFileError(f"{file_name}:{line_number}: {column} '{value}' is not a number")
+                elif column == "scan_datetime":
+                    values.append(_parse_datetime(value))
+                else:
+                    values.append(value)
+            rows.append(tuple(values))
+
+        return rows
+
+
+def _parse_job(args: Tuple[str, str, Dict[str, str]]):
+    # Process pool entry point; errors are returned rather than raised so one bad file doesn't stop a batch
+    path, file_name, column_map = args
+    try:
+        return file_name, parse_scan_file(path, file_name, column_map), None
+    except Exception as e:
+        return file_name, None, str(e)
+
+
+def copy_rows(db, rows: List[Tuple[Any, ...]]):
+    """Load HumanInspect rows with COPY on the session's connection (same transaction)."""
+    created_at = datetime.now()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat(sep=" ") if isinstance(value, datetime) else value for value in row + (created_at,)]
+        for row in rows
+    )
+    buffer.seek(0)
+
+    column_list = ", ".join(COLUMNS + ("created_at",))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "HumanInspect" ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+class HumanInspectIngester:
+    """
+    Loads new scan files from a directory into HumanInspect.
+
+    Files are parsed in a process pool and loaded in batches. Each batch's rows (COPY, or
+    executemany) and its processed_files entries are committed in one transaction, so
+    a file is either fully loaded and marked or not at all, and a rerun skips it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        patterns: Iterable[str] = ("*.csv",),
+        column_map: Optional[Dict[str, str]] = None,
+        method: str = "copy",
+        processes: int = 2,
+        batch_files: int = 50
+    ):
+        self.directory = directory
+        self.patterns = list(patterns)
+        self.column_map = column_map or {}
+        self.method = method
+        self.processes = processes
+        self.batch_files = batch_files
+        self._failed: Set[Tuple[str, float]] = set()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def candidate_files(self, settle_seconds: float = 0.0, complete: Optional[Set[str]] = None) -> List[str]:
+        """
+        Matching files under the directory (relative paths), oldest first. Files younger
+        than settle_seconds are left for a later call unless listed in complete (relative
+        paths known to be fully written, e.g. from inotify close/move events).
+        """
+        now = time.time()
+        complete = complete or set()
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                relative = os.path.relpath(path, self.directory)
+                # Still being written, or failed before and unchanged since
+                if now - mtime < settle_seconds and relative not in complete:
+                    continue
+                if (relative, mtime) in self._failed:
+                    continue
+                found.append((mtime, relative))
+        return [relative for _, relative in sorted(found)]
+
+    def ingest(self, settle_seconds: float = 0.0, on_batch=None, complete: Optional[Set[str]] = None) -> Dict[str, int]:
+        """Load every candidate file not yet in processed_files; returns file/row counts."""
+        totals = {"files": 0, "rows": 0, "failed": 0}
+        candidates = self.candidate_files(settle_seconds, complete)
+        if not candidates:
+            return totals
+
+        db = SessionLocal()
+        try:
+            for start in range(0, len(candidates), self.batch_files):
+                batch = candidates[start:start + self.batch_files]
+                done = crud.get_processed_filenames(db, batch)
+                pending = [name for name in batch if name not in done]
+                if not pending:
+                    continue
+
+                jobs = [(os.path.join(self.directory, name), name, self.column_map) for name in pending]
+                rows: List[Tuple[Any, ...]] = []
+                loaded: List[str] = []
+                for file_name, file_rows, error in self._executor().map(_parse_job, jobs):
+                    if error is not None:
+                        logger.error(f"Skipping scan file {file_name}: {error}")
+                        self._remember_failure(file_name)
+                        totals["failed"] += 1
+                        continue
+                    rows.extend(file_rows)
+                    loaded.append(file_name)
+
+                if not loaded:
+                    continue
+
+                try:
+                    if rows:
+                        if self.method == "copy":
+                            copy_rows(db, rows)
+                        else:
+                            crud.insert_human_inspect_rows(db, [dict(zip(COLUMNS, row)) for row in rows])
+                    crud.mark_files_processed(db, loaded, datetime.now())
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+
+                totals["files"] += len(loaded)
+                totals["rows"] += len(rows)
+                if on_batch is not None:
+                    on_batch(totals)
+        finally:
+            db.close()
+
+        if totals["files"]:
+            logger.info(f"Ingested {totals['rows']} HumanInspect rows from {totals['files']} files")
+        return totals
+
+    def _remember_failure(self, file_name: str):
+        try:
+            self._failed.add((file_name, os.path.getmtime(os.path.join(self.directory, file_name))))
+        except OSError:
+            pass
+
+
+def build_ingester(directory: Optional[str] = None) -> HumanInspectIngester:
+    return HumanInspectIngester(
+        directory=directory or INGEST_CONFIG.get('directory', 'data/human_inspect'),
+        patterns=INGEST_CONFIG.get('patterns', ["*.csv"]),
+        column_map=INGEST_CONFIG.get('column_map', {}),
+        method=INGEST_CONFIG.get('method', 'copy'),
+        processes=INGEST_CONFIG.get('processes', 2),
+        batch_files=INGEST_CONFIG.get('batch_files', 50)
+    )
+
+
+class IngestWorker(PeriodicWorker):
+    """
+    Ingests new scan files as they appear. Every poll only takes files whose mtime is
+    settle_seconds old, so half-written files are left alone. With inotify_simple
+    available, close/move events anywhere under the directory wake the worker right away,
+    and the files they name are taken without waiting to settle.
+    """
+
+    def __init__(self, ingester: Optional[HumanInspectIngester] = None):
+        super().__init__(
+            name="human-inspect-ingest",
+            interval_seconds=float(INGEST_CONFIG.get('poll_interval_seconds', 10.0))
+        )
+        self.ingester = ingester or build_ingester()
+        self.settle_seconds = float(INGEST_CONFIG.get('settle_seconds', 5.0))
+        self._watcher: Optional[threading.Thread] = None
+        self._complete: Set[str] = set()
+        self._complete_lock = threading.Lock()
+
+    def run(self):
+        os.makedirs(self.ingester.directory, exist_ok=True)
+        if INotify is not None:
+            self._watcher = threading.Thread(target=self._watch, name="human-inspect-inotify", daemon=True)
+            self._watcher.start()
+        else:
+            logger.info(f"inotify not available, polling {self.ingester.directory}")
+        try:
+            super().run()
+        finally:
+            self.ingester.close()
+
+    def _watch(self):
+        try:
+            inotify = INotify()
+        except OSError as e:
+            logger.warning(f"inotify unavailable, polling {self.ingester.directory} instead: {str(e)}")
+            return
+
+        # Watch descriptor -> directory relative to the ingest directory
+        directories: Dict[int, str] = {}
+        file_mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+
+        def watch_tree(relative: str):
+            # candidate_files walks subdirectories, so every one of them is watched too
+            for root, names, _ in os.walk(os.path.join(self.ingester.directory, relative)):
+                try:
+                    descriptor = inotify.add_watch(root, file_mask)
+                except OSError as e:
+                    logger.warning(f"inotify watch on {root} failed, polling it instead: {str(e)}")
+                    continue
+                directories[descriptor] = os.path.relpath(root, self.ingester.directory)
+
+        try:
+            watch_tree(".")
+            while not self.stopped:
+                complete = set()
+                for event in inotify.read(timeout=1000):
+                    parent = directories.get(event.wd)
+                    if parent is None or not event.name:
+                        continue
+                    relative = os.path.normpath(os.path.join(parent, event.name))
+                    if event.mask & inotify_flags.ISDIR:
+                        if event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                            watch_tree(relative)
+                    elif event.mask & (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO):
+                        complete.add(relative)
+                if complete:
+                    with self._complete_lock:
+                        self._complete |= complete
+                    self.wake()
+        finally:
+            inotify.close()
+
+    def run_once(self):
+        # Files announced complete skip the settle window; everything else still waits for it
+        with self._complete_lock:
+            complete, self._complete = self._complete, set()
+        self.ingester.ingest(settle_seconds=self.settle_seconds, complete=complete)
+
+
+_worker: Optional[IngestWorker] = None
+
+
+def start_worker():
+    """Start the process-wide ingest worker (idempotent)."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = IngestWorker()
+        _worker.start()
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
@@ -0,0 +1,126 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Overlay representations served by /api/defects/image/{id}, by ?format= name
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.porosity.columnar+json",
+    "msgpack": "application/msgpack",
+    "f32": "application/vnd.porosity.boxes+f32",
+}
+
+# Numeric columns shipped as-is, plus the normalized box computed on the server
+INTEGER_FIELDS = ("id", "x", "y", "width", "height")
+NORMALIZED_FIELDS = ("x_center", "y_center", "width_norm", "height_norm")
+
+
+class UnsupportedFormatError(Exception):
+    """Exception raised when a requested overlay format can't be produced."""
+    pass
+
+
+def negotiate_format(format_param: Optional[str], accept_header: Optional[str]) -> str:
+    """
+    Pick the overlay format from ?format= first, then from the Accept header.
+    Falls back to the row-per-defect JSON the frontend has always used.
+    """
+    if format_param:
+        if format_param not in MEDIA_TYPES:
+            raise UnsupportedFormatError(
+                f"Unknown format '{format_param}'; expected one of {', '.join(MEDIA_TYPES)}"
+            )
+        name = format_param
+    else:
+        name = "json"
+        accepted = [part.split(";")[0].strip() for part in (accept_header or "").split(",")]
+        for candidate, media_type in MEDIA_TYPES.items():
+            if media_type in accepted:
+                name = candidate
+                break
+
+    if name == "msgpack" and msgpack is None:
+        raise UnsupportedFormatError("MessagePack output requires the msgpack package")
+    return name
+
+
+def defect_columns(defects: Sequence[Any], image_width: float, image_height: float) -> Dict[str, Any]:
+    """
+    Turn defect rows into one array per field, computing normalized center/size boxes
+    for all defects at once with NumPy.
+    """
+    count = len(defects)
+    columns: Dict[str, Any] = {
+        field: np.fromiter(
+            (getattr(defect, field) or 0 for defect in defects), dtype=np.int64, count=count
+        )
+        for field in INTEGER_FIELDS
+    }
+
+    x = columns["x"].astype(np.float64)
+    y = columns["y"].astype(np.float64)
+    width = columns["width"].astype(np.float64)
+    height = columns["height"].astype(np.float64)
+    columns["x_center"] = (x + width / 2) / image_width
+    columns["y_center"] = (y + height / 2) / image_height
+    columns["width_norm"] = width / image_width
+    columns["height_norm"] = height / image_height
+
+    columns["confidence"] = [defect.confidence for defect in defects]
+    columns["type"] = [defect.type for defect in defects]
+    columns["disposition"] = [defect.disposition for defect in defects]
+    return columns
+
+
+def _columns_to_lists(columns: Dict[str, Any]) -> Dict[str, List[Any]]:
+    return {
+        field: values.tolist() if isinstance(values, np.ndarray) else list(values)
+        for field, values in columns.items()
+    }
+
+
+def encode_overlay(
+    fmt: str, image_id: int, image_width: int, image_height: int, columns: Dict[str, Any]
+) -> bytes:
+    """
+    Encode columns for a compact format.
+
+    columnar/msgpack: {"image_id", "image_width", "image_height", "count", "columns": {field: [...]}}
+    f32: little-endian, 4-byte aligned so it can be viewed as typed arrays directly:
+         uint32 count N, N uint32 defect ids, then N float32 quadruples
+         (x_center, y_center, width, height) in the same order.
+    """
+    if fmt == "f32":
+        count = len(columns["id"])
+        boxes = np.column_stack([columns[field] for field in NORMALIZED_FIELDS]) if count else np.empty((0, 4))
+        return (
+            np.array([count], dtype="<u4").tobytes()
+            + columns["id"].astype("<u4").tobytes()
+            + boxes.astype("<f4").tobytes()
+        )
+
+    payload = {
+        "image_id": image_id,
+        "image_width": image_width,
+        "image_height": image_height,
+        "count": len(columns["id"]),
+        "columns": columns,
+    }
+    if fmt == "columnar" and orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    payload["columns"] = _columns_to_lists(columns)
+    if fmt == "msgpack":
+        return msgpack.packb(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
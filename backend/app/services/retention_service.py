@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from ..db import crud
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from ..utils.worker import PeriodicWorker
+from . import image_service
+
+# Load configuration
+config = load_config()
+RETENTION_CONFIG = config.get('retention', {})
+HOT_DAYS = RETENTION_CONFIG.get('hot_days', 90)
+ARCHIVE_MONTHS = RETENTION_CONFIG.get('archive_months', 0)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def hot_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Parts triggered before this time are moved to the archive."""
+    return (now or datetime.now(timezone.utc)) - timedelta(days=HOT_DAYS)
+
+
+def reaches_archive(start: datetime) -> bool:
+    """Whether a range starting at start may include archived parts."""
+    if not RETENTION_CONFIG.get('enabled', False):
+        return False
+    if start.tzinfo is None:
+        start = start.astimezone(timezone.utc)
+    return start < hot_cutoff()
+
+
+def archive_before(
+    cutoff: datetime,
+    batch_size: int = 500,
+    prune_cache: bool = True,
+    on_batch=None,
+    should_stop=None
+) -> Dict[str, int]:
+    """
+    Move parts triggered before cutoff to the archive, batch_size parts per transaction,
+    and drop the cached image files of the moved images.
+    """
+    totals = {"parts": 0, "images": 0, "evicted": 0}
+    db = SessionLocal()
+    try:
+        while should_stop is None or not should_stop():
+            parts, image_paths = crud.archive_parts(db, cutoff, batch_size)
+            if not parts:
+                break
+
+            totals["parts"] += parts
+            totals["images"] += len(image_paths)
+            if prune_cache:
+                totals["evicted"] += image_service.evict_cached_images(image_paths)
+            if on_batch is not None:
+                on_batch(totals)
+    finally:
+        db.close()
+
+    return totals
+
+
+def expire_archive(before: datetime, detach_only: bool = True):
+    """Detach (or drop) archive months ending on or before `before`."""
+    db = SessionLocal()
+    try:
+        return crud.drop_archive_partitions(db, before, detach_only)
+    finally:
+        db.close()
+
+
+def run_retention(should_stop=None, on_batch=None) -> Dict[str, Any]:
+    """Archive parts older than retention.hot_days, then expire archive months past retention.archive_months."""
+    totals: Dict[str, Any] = archive_before(
+        hot_cutoff(),
+        batch_size=RETENTION_CONFIG.get('batch_size', 500),
+        prune_cache=RETENTION_CONFIG.get('prune_image_cache', True),
+        on_batch=on_batch,
+        should_stop=should_stop
+    )
+
+    totals["expired_partitions"] = []
+    if ARCHIVE_MONTHS:
+        before = hot_cutoff() - timedelta(days=31 * ARCHIVE_MONTHS)
+        totals["expired_partitions"] = expire_archive(before, detach_only=RETENTION_CONFIG.get('detach_only', True))
+
+    if totals["parts"] or totals["expired_partitions"]:
+        logger.info(
+            f"Archived {totals['parts']} parts ({totals['images']} images, {totals['evicted']} cached files removed), "
+            f"expired archive partitions: {', '.join(totals['expired_partitions']) or 'none'}"
+        )
+    return totals
+
+
+class RetentionWorker(PeriodicWorker):
+    """Runs the retention job every retention.interval_minutes."""
+
+    def __init__(self):
+        super().__init__(
+            name="retention",
+            interval_seconds=60.0 * RETENTION_CONFIG.get('interval_minutes', 60)
+        )
+
+    def run_once(self):
+        run_retention(should_stop=lambda: self.stopped)
+
+
+_worker: Optional[RetentionWorker] = None
+
+
+def start_worker():
+    """Start the process-wide retention worker (idempotent)."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = RetentionWorker()
+        _worker.start()
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
@@ -0,0 +1,316 @@
+import logging
+import math
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from ..db import crud, models
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from ..utils.worker import PeriodicWorker
+
+# Load configuration
+config = load_config()
+SUPPRESSION_CONFIG = config.get('suppression', {})
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# (defect_id, trigger_id, x1, y1, x2, y2, center_x, center_y)
+Entry = Tuple[int, Any, float, float, float, float, float, float]
+
+
+class SpatialHash:
+    """
+    Boxes of the last window_parts parts of one camera, indexed in every grid cell they
+    cover. A lookup visits the cells its box covers (and those within reach of its center),
+    so its cost depends on box sizes, not on how many defects the window holds.
+    """
+
+    def __init__(self, cell_size: float, window_parts: int):
+        self.cell_size = cell_size
+        self.window_parts = window_parts
+        self._cells: Dict[Tuple[int, int], List[Entry]] = defaultdict(list)
+        # trigger_id -> cells holding its boxes, oldest part first
+        self._parts: "OrderedDict[Any, Set[Tuple[int, int]]]" = OrderedDict()
+
+    def _cells_between(self, x1: float, y1: float, x2: float, y2: float) -> Iterable[Tuple[int, int]]:
+        for cell_x in range(int(x1 // self.cell_size), int(x2 // self.cell_size) + 1):
+            for cell_y in range(int(y1 // self.cell_size), int(y2 // self.cell_size) + 1):
+                yield cell_x, cell_y
+
+    def candidates(self, entry: Entry, reach: float = 0) -> Iterable[Entry]:
+        """
+        Boxes that may overlap entry's box or have a center within reach of its center,
+        each once.
+        """
+        cells = set(self._cells_between(entry[2], entry[3], entry[4], entry[5]))
+        cells.update(self._cells_between(entry[6] - reach, entry[7] - reach, entry[6] + reach, entry[7] + reach))
+        seen = set()
+        for key in cells:
+            for candidate in self._cells.get(key, ()):
+                if candidate[0] not in seen:
+                    seen.add(candidate[0])
+                    yield candidate
+
+    def add_part(self, trigger_id: Any, entries: List[Entry]):
+        """
+        Add a part's boxes. A part already in the window (its defects split across fetch
+        batches) is extended in place rather than counted again.
+        """
+        keys = self._parts.get(trigger_id)
+        if keys is None:
+            keys = self._parts[trigger_id] = set()
+        for entry in entries:
+            for key in self._cells_between(entry[2], entry[3], entry[4], entry[5]):
+                self._cells[key].append(entry)
+                keys.add(key)
+
+        while len(self._parts) > self.window_parts:
+            old_trigger_id, old_keys = self._parts.popitem(last=False)
+            for key in old_keys:
+                remaining = [e for e in self._cells[key] if e[1] != old_trigger_id]
+                if remaining:
+                    self._cells[key] = remaining
+                else:
+                    del self._cells[key]
+
+    def __len__(self) -> int:
+        return len({entry[0] for entries in self._cells.values() for entry in entries})
+
+
+def _entry(defect) -> Entry:
+    x1, y1 = float(defect.x or 0), float(defect.y or 0)
+    x2, y2 = x1 + float(defect.width or 0), y1 + float(defect.height or 0)
+    return (defect.id, defect.trigger_id, x1, y1, x2, y2, (x1 + x2) / 2, (y1 + y2) / 2)
+
+
+def box_similarity(a: Entry, b: Entry, center_distance: float) -> float:
+    """The better of IoU and center proximity (1 at the same center, 0 at center_distance)."""
+    inter_w = min(a[4], b[4]) - max(a[2], b[2])
+    inter_h = min(a[5], b[5]) - max(a[3], b[3])
+    iou = 0.0
+    if inter_w > 0 and inter_h > 0:
+        intersection = inter_w * inter_h
+        union = (a[4] - a[2]) * (a[5] - a[3]) + (b[4] - b[2]) * (b[5] - b[3]) - intersection
+        iou = intersection / union if union > 0 else 0.0
+
+    distance = math.hypot(a[6] - b[6], a[7] - b[7])
+    proximity = max(0.0, 1.0 - distance / center_distance) if center_distance > 0 else 0.0
+    return max(iou, proximity)
+
+
+class SuppressionEngine:
+    """
+    Flags defects that repeat at the same place on consecutive parts of a camera
+    (fixture marks, lens debris).
+
+    A defect is suppressed when similar defects (box_similarity >= similarity_threshold)
+    were seen on at least min_repeats of the camera's last window_parts parts with
+    defects; it is suppressed by the most recent of them. Defects must be fed in
+    arrival (id) order.
+    """
+
+    def __init__(
+        self,
+        cell_size: float = 64,
+        window_parts: int = 20,
+        min_repeats: int = 2,
+        center_distance: float = 16,
+        similarity_threshold: float = 0.5
+    ):
+        self.cell_size = cell_size
+        self.window_parts = window_parts
+        self.min_repeats = min_repeats
+        self.center_distance = center_distance
+        self.similarity_threshold = similarity_threshold
+        self._hashes: Dict[str, SpatialHash] = {}
+
+    def _hash(self, camera_id: str) -> SpatialHash:
+        spatial_hash = self._hashes.get(camera_id)
+        if spatial_hash is None:
+            spatial_hash = self._hashes[camera_id] = SpatialHash(self.cell_size, self.window_parts)
+        return spatial_hash
+
+    def _score(self, spatial_hash: SpatialHash, entry: Entry) -> Optional[Tuple[int, float]]:
+        matched_triggers = set()
+        best: Optional[Tuple[int, float]] = None
+        for candidate in spatial_hash.candidates(entry, self.center_distance):
+            if candidate[1] == entry[1]:
+                continue
+            similarity = box_similarity(entry, candidate, self.center_distance)
+            if similarity < self.similarity_threshold:
+                continue
+            matched_triggers.add(candidate[1])
+            # Later defects have higher ids; prefer the most recent repeat
+            if best is None or candidate[0] > best[0]:
+                best = (candidate[0], similarity)
+
+        if best is not None and len(matched_triggers) >= self.min_repeats:
+            return best
+        return None
+
+    def process(self, defects: Iterable[Any]) -> List[Tuple[int, int, float]]:
+        """
+        Score defect rows (id, x, y, width, height, camera_id, trigger_id) and add them to
+        the window. Returns (defect_id, suppressed_by, similarity) for suppressed defects.
+        """
+        # Defects of one camera and trigger form a part; they never suppress each other
+        parts: Dict[Tuple[str, Any], List[Entry]] = {}
+        for defect in defects:
+            parts.setdefault((defect.camera_id, defect.trigger_id), []).append(_entry(defect))
+
+        suppressed = []
+        for (camera_id, trigger_id), entries in parts.items():
+            spatial_hash = self._hash(camera_id)
+            for entry in entries:
+                match = self._score(spatial_hash, entry)
+                if match is not None:
+                    suppressed.append((entry[0], match[0], round(match[1], 4)))
+            spatial_hash.add_part(trigger_id, entries)
+
+        return suppressed
+
+
+def build_engine() -> SuppressionEngine:
+    return SuppressionEngine(
+        cell_size=SUPPRESSION_CONFIG.get('cell_size_px', 64),
+        window_parts=SUPPRESSION_CONFIG.get('window_parts', 20),
+        min_repeats=SUPPRESSION_CONFIG.get('min_repeats', 2),
+        center_distance=SUPPRESSION_CONFIG.get('center_distance_px', 16),
+        similarity_threshold=SUPPRESSION_CONFIG.get('similarity_threshold', 0.5)
+    )
+
+
+def suppress_range(
+    start_id: int = 0,
+    end_id: Optional[int] = None,
+    engine: Optional[SuppressionEngine] = None,
+    batch_size: int = 5000,
+    on_batch=None
+) -> int:
+    """
+    Run suppression over defects with start_id < id <= end_id in id order, writing
+    Suppressed_Defects for defects not already suppressed. Returns the number written.
+    """
+    engine = engine or build_engine()
+    written = 0
+    after_id = start_id
+
+    db = SessionLocal()
+    try:
+        while True:
+            defects = crud.get_defects_for_suppression(db, after_id=after_id, limit=batch_size, until_id=end_id)
+            if not defects:
+                break
+            after_id = defects[-1].id
+
+            suppressed = engine.process(defects)
+            if suppressed:
+                written += crud.create_suppressed_defects(db, suppressed, datetime.now(timezone.utc))
+            if on_batch is not None:
+                on_batch(after_id, written)
+    finally:
+        db.close()
+
+    return written
+
+
+class SuppressionWorker(PeriodicWorker):
+    """
+    Follows new Defects rows and suppresses repeats as they arrive, continuing from the
+    stored watermark. On start the window is warmed with the defects just before it
+    (without writing); on the very first start the watermark is set to the current head.
+    Ids a batch skipped (not committed yet) are re-read on later runs until the watermark
+    is rescan_ids past them, so defects committed out of id order are still scored.
+    """
+
+    def __init__(self, engine: Optional[SuppressionEngine] = None):
+        super().__init__(
+            name="defect-suppression",
+            interval_seconds=float(SUPPRESSION_CONFIG.get('poll_interval_seconds', 2.0))
+        )
+        self.engine = engine or build_engine()
+        self.batch_size = SUPPRESSION_CONFIG.get('batch_size', 1000)
+        self.warmup_defects = SUPPRESSION_CONFIG.get('warmup_defects', 5000)
+        self.rescan_ids = SUPPRESSION_CONFIG.get('rescan_ids', 1000)
+        self._last_defect_id: Optional[int] = None
+        # Skipped ids below the watermark, not scored yet
+        self._gaps: Set[int] = set()
+
+    def _warm_up(self, db):
+        watermark = crud.get_suppression_watermark(db)
+        if watermark is None:
+            watermark = db.query(func.max(models.Defect.id)).scalar() or 0
+            crud.create_suppressed_defects(db, [], datetime.now(timezone.utc), last_defect_id=watermark)
+
+        recent = crud.get_defects_for_suppression(
+            db, after_id=max(0, watermark - self.warmup_defects), limit=self.warmup_defects, until_id=watermark
+        )
+        self.engine.process(recent)
+        self._last_defect_id = watermark
+        logger.info(f"Defect suppression warmed with {len(recent)} defects, following from id {watermark}")
+
+    def _rescan_gaps(self, db):
+        # Forget gaps too far behind (rolled back inserts), score the ones committed since
+        self._gaps.difference_update({defect_id for defect_id in self._gaps if defect_id <= self._last_defect_id - self.rescan_ids})
+        if not self._gaps:
+            return
+
+        late = crud.get_unsuppressed_defects_by_ids(db, sorted(self._gaps))
+        if not late:
+            return
+        suppressed = self.engine.process(late)
+        crud.create_suppressed_defects(db, suppressed, datetime.now(timezone.utc))
+        self._gaps.difference_update(defect.id for defect in late)
+        logger.info(f"Scored {len(late)} defects committed behind the suppression watermark, suppressed {len(suppressed)}")
+
+    def run_once(self):
+        db = SessionLocal()
+        try:
+            if self._last_defect_id is None:
+                self._warm_up(db)
+            self._rescan_gaps(db)
+
+            while not self.stopped:
+                defects = crud.get_defects_for_suppression(db, after_id=self._last_defect_id, limit=self.batch_size)
+                if not defects:
+                    break
+
+                skipped = range(max(self._last_defect_id + 1, defects[-1].id - self.rescan_ids), defects[-1].id)
+                self._gaps.update(set(skipped) - {defect.id for defect in defects})
+                suppressed = self.engine.process(defects)
+                crud.create_suppressed_defects(db, suppressed, datetime.now(timezone.utc), last_defect_id=defects[-1].id)
+                if suppressed:
+                    logger.info(f"Suppressed {len(suppressed)} repeat defects")
+                self._last_defect_id = defects[-1].id
+
+                if len(defects) < self.batch_size:
+                    break
+        finally:
+            db.close()
+
+
+_worker: Optional[SuppressionWorker] = None
+
+
+def start_worker():
+    """Start the process-wide suppression worker (idempotent)."""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = SuppressionWorker()
+        _worker.start()
+
+
+def stop_worker():
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def wake_worker():
+    if _worker is not None:
+        _worker.wake()
@@ -0,0 +1,280 @@
+import io
+import json
+import logging
+import os
+import tarfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..db import crud
+from ..db.database import SessionLocal
+from ..utils.config import load_config
+from . import image_service
+from .export_service import ChunkSink
+
+# Load configuration
+config = load_config()
+TRAINING_CONFIG = config.get('export', {}).get('training', {})
+FETCH_WORKERS = TRAINING_CONFIG.get('fetch_workers', 8)
+BATCH_IMAGES = TRAINING_CONFIG.get('batch_images', 64)
+MAX_TRACKED_JOBS = 20
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class TrainingExportProgress:
+    """Counters of one export job, safe to read from other threads."""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.total: Optional[int] = None
+        self.images = 0
+        self.labels = 0
+        self.failed = 0
+        self.last_image_id = 0
+        self.classes: Dict[int, str] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        done = self.images + self.failed
+        return {
+            "job_id": self.job_id,
+            "total": self.total,
+            "done": done,
+            "images": self.images,
+            "labels": self.labels,
+            "failed": self.failed,
+            "percent": round(100.0 * done / self.total, 1) if self.total else None,
+            "last_image_id": self.last_image_id,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 1),
+            "finished": self.finished_at is not None,
+            "error": self.error
+        }
+
+
+# Jobs started through the API, for progress polling
+_jobs: "Dict[str, TrainingExportProgress]" = {}
+_jobs_lock = threading.Lock()
+
+
+def register_job(progress: TrainingExportProgress):
+    with _jobs_lock:
+        _jobs[progress.job_id] = progress
+        # Forget the oldest jobs; their progress is only interesting while they run
+        for job_id in list(_jobs)[:-MAX_TRACKED_JOBS]:
+            del _jobs[job_id]
+
+
+def get_job(job_id: str) -> Optional[TrainingExportProgress]:
+    return _jobs.get(job_id)
+
+
+def _fetch_in_order(images: List[Any], executor: ThreadPoolExecutor, window: int) -> Iterator[Any]:
+    # Fetch image files in parallel, yielding (image, local path or None) in input order
+    pending = deque()
+    remaining = iter(images)
+
+    for image in remaining:
+        pending.append((image, executor.submit(image_service.get_image_file_path, image)))
+        if len(pending) >= window:
+            break
+
+    while pending:
+        image, future = pending.popleft()
+        try:
+            path = future.result()
+        except Exception as e:
+            logger.warning(f"Could not fetch image {image.id}: {str(e)}")
+            path = None
+        yield image, path
+
+        next_image = next(remaining, None)
+        if next_image is not None:
+            pending.append((next_image, executor.submit(image_service.get_image_file_path, next_image)))
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_training_set(
+    tar: tarfile.TarFile,
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    dispositions: Optional[List[str]] = None,
+    progress: Optional[TrainingExportProgress] = None,
+    after_image_id: int = 0,
+    fetch_workers: int = FETCH_WORKERS,
+    batch_images: int = BATCH_IMAGES
+) -> Iterator[TrainingExportProgress]:
+    """
+    Write images/<id>.<ext> and labels/<id>.txt (YOLO) for the selected images into tar,
+    yielding progress after every batch so callers can drain or checkpoint the archive.
+
+    Images are selected in id order after after_image_id. With dispositions, only those
+    defects are labelled and the class is the disposition's index in the list; otherwise
+    the class is the defect type (image_service.defect_class_id). classes.txt is written
+    last, after the final progress, so a checkpoint never includes it and a resumed export
+    writes it once; image files are fetched through the image cache and the FTP pool in
+    parallel.
+    """
+    progress = progress or TrainingExportProgress()
+    progress.last_image_id = max(progress.last_image_id, after_image_id)
+    if dispositions:
+        progress.classes = {index: name for index, name in enumerate(dispositions)}
+        class_by_disposition = {name: index for index, name in enumerate(dispositions)}
+
+    db = SessionLocal()
+    try:
+        if progress.total is None:
+            progress.total = crud.count_training_images(db, start, end, camera_id, dispositions)
+
+        with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="training-fetch") as executor:
+            while True:
+                images = db.execute(crud.training_images_statement(
+                    start, end,
+                    after_image_id=progress.last_image_id,
+                    limit=batch_images,
+                    camera_id=camera_id,
+                    dispositions=dispositions
+                )).all()
+                if not images:
+                    break
+
+                defects_by_image = defaultdict(list)
+                for defect in crud.get_defects_by_images(db, [img.id for img in images], dispositions):
+                    defects_by_image[defect.image_id].append(defect)
+
+                for image, path in _fetch_in_order(images, executor, window=fetch_workers * 2):
+                    progress.last_image_id = image.id
+                    if path is None:
+                        progress.failed += 1
+                        continue
+
+                    defects = defects_by_image.get(image.id, [])
+                    if dispositions:
+                        class_ids = [class_by_disposition[defect.disposition] for defect in defects]
+                    else:
+                        class_ids = [image_service.defect_class_id(defect) for defect in defects]
+                        for class_id in class_ids:
+                            progress.classes.setdefault(class_id, str(class_id))
+
+                    label = image_service.convert_defects_to_yolo_format(
+                        defects,
+                        image.width or image_service.DEFAULT_IMAGE_SIZE,
+                        image.height or image_service.DEFAULT_IMAGE_SIZE,
+                        class_ids=class_ids
+                    )
+
+                    extension = os.path.splitext(image.image or "")[1] or ".jpg"
+                    tar.add(path, arcname=f"images/{image.id}{extension}")
+                    _add_bytes(tar, f"labels/{image.id}.txt", label.encode())
+                    progress.images += 1
+                    if defects:
+                        progress.labels += 1
+
+                yield progress
+    finally:
+        db.close()
+
+    names = "\n".join(progress.classes[class_id] for class_id in sorted(progress.classes))
+    _add_bytes(tar, "classes.txt", (names + "\n").encode())
+
+
+def stream_training_set(
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    dispositions: Optional[List[str]] = None,
+    compress: bool = False,
+    progress: Optional[TrainingExportProgress] = None
+) -> Iterator[bytes]:
+    """Stream the training set as a tar (gzip'd if compress) without staging it on disk."""
+    progress = progress or TrainingExportProgress()
+    sink = ChunkSink()
+    try:
+        with tarfile.open(fileobj=sink, mode="w|gz" if compress else "w|") as tar:
+            for _ in write_training_set(tar, start, end, camera_id, dispositions, progress):
+                yield sink.drain()
+        yield sink.drain()
+    except Exception as e:
+        progress.error = str(e)
+        raise
+    finally:
+        progress.finished_at = time.time()
+
+
+def export_training_set_to_file(
+    output: str,
+    start: datetime,
+    end: datetime,
+    camera_id: Optional[str] = None,
+    dispositions: Optional[List[str]] = None,
+    resume: bool = False,
+    on_progress=None,
+    batch_images: int = BATCH_IMAGES
+) -> TrainingExportProgress:
+    """
+    Write the training set to an uncompressed tar file, checkpointing after every batch
+    to <output>.state.json. With resume, an interrupted export continues after the last
+    checkpointed image: the archive is cut back to the checkpoint and appended to.
+    """
+    state_path = output + ".state.json"
+    progress = TrainingExportProgress()
+    offset = 0
+
+    if resume and os.path.exists(state_path) and os.path.exists(output):
+        with open(state_path, "r") as f:
+            state = json.load(f)
+        offset = state["offset"]
+        progress.total = state["total"]
+        progress.images = state["images"]
+        progress.labels = state["labels"]
+        progress.failed = state["failed"]
+        progress.last_image_id = state["last_image_id"]
+        progress.classes = {int(k): v for k, v in state["classes"].items()}
+        logger.info(f"Resuming training export after image {progress.last_image_id}")
+
+    with open(output, "r+b" if offset else "wb") as f:
+        f.seek(offset)
+        f.truncate()
+        with tarfile.open(fileobj=f, mode="w") as tar:
+            for _ in write_training_set(tar, start, end, camera_id, dispositions, progress,
+                                        after_image_id=progress.last_image_id, batch_images=batch_images):
+                f.flush()
+                os.fsync(f.fileno())
+                _write_state(state_path, progress, tar.offset)
+                if on_progress is not None:
+                    on_progress(progress)
+
+    progress.finished_at = time.time()
+    os.remove(state_path)
+    return progress
+
+
+def _write_state(state_path: str, progress: TrainingExportProgress, offset: int):
+    state = {
+        "offset": offset,
+        "total": progress.total,
+        "images": progress.images,
+        "labels": progress.labels,
+        "failed": progress.failed,
+        "last_image_id": progress.last_image_id,
+        "classes": progress.classes
+    }
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
@@ -0,0 +1,59 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from typing import Any, Dict, Optional
+
+from .config import load_config
+
+# Load configuration
+config = load_config()
+
+try:
+    import orjson  # noqa: F401 - ORJSONResponse needs it at render time
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+FAST_JSON = config.get('api', {}).get('fast_json', True) and ORJSON_AVAILABLE
+
+# Application-wide response class (see main.py)
+DefaultResponse = ORJSONResponse if FAST_JSON else JSONResponse
+
+
+class StdlibJSONResponse(JSONResponse):
+    """
+    JSONResponse for trusted content without orjson: json.dumps encodes the plain values
+    itself and only hands what it can't (datetimes, decimals) to jsonable_encoder, instead
+    of jsonable_encoder walking the whole payload first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=jsonable_encoder
+        ).encode("utf-8")
+
+
+def trusted_json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+    """
+    Serialize content built from already-typed database rows without running it through
+    the route's response_model again. Routes using this keep response_model for the docs only.
+    """
+    response_class = DefaultResponse if FAST_JSON else StdlibJSONResponse
+    return response_class(content=content, status_code=status_code, headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag: "*" or any tag of its comma-separated
+    list, compared weakly (a W/ prefix, e.g. added by a proxy, is ignored on either side).
+    """
+    if not if_none_match:
+        return False
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    wanted = opaque(etag)
+    return any(tag.strip() == "*" or opaque(tag) == wanted for tag in if_none_match.split(","))
@@ -0,0 +1,45 @@
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker(threading.Thread):
+    """
+    Daemon thread calling run_once() every interval_seconds until stop().
+    
+    wake() runs the next iteration early; errors are logged and retried on the next
+    iteration rather than ending the thread.
+    """
+
+    def __init__(self, name: str, interval_seconds: float):
+        super().__init__(name=name, daemon=True)
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def run_once(self):
+        raise NotImplementedError
+
+    def wake(self):
+        self._wake_event.set()
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"{self.name} error: {str(e)}")
+            self._wake_event.wait(self.interval_seconds)
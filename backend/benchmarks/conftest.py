@@ -0,0 +1,184 @@
+"""
+Fixtures for the benchmark suite (see benchmarks/README.md).
+
+Database benchmarks run against $BENCH_DATABASE_URL, which the backend also uses (as
+DATABASE_URL) for the whole session; without it they are skipped. With BENCH_GENERATE=1
+the database is recreated with generate_data at $BENCH_SCALE (small by default) first.
+"""
+import os
+import random
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+import pytest
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL")
+if BENCH_DATABASE_URL:
+    # Must be set before app.db.database is first imported
+    os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+IMAGE_SIZE = 5120
+
+# Same fields as the overlay/suppression rows the services are fed from crud
+DefectRow = namedtuple(
+    "DefectRow",
+    "id image_id x y width height confidence type disposition camera_id trigger_id"
+)
+RegionRow = namedtuple("RegionRow", "id region_id camera_id polygon size_threshold density_threshold proximity_threshold")
+
+
+def synthetic_defects(count: int, seed: int = 1, parts: int = 1, camera_id: str = "DM08617AAK00001"):
+    """Defect rows spread over `parts` triggers of one camera, a third of them on a few fixed spots."""
+    rng = random.Random(seed)
+    spots = [(rng.uniform(200, IMAGE_SIZE - 200), rng.uniform(200, IMAGE_SIZE - 200)) for _ in range(3)]
+    rows = []
+    for index in range(count):
+        if rng.random() < 0.3:
+            x, y = rng.choice(spots)
+            x, y = rng.gauss(x, 3), rng.gauss(y, 3)
+        else:
+            x, y = rng.uniform(0, IMAGE_SIZE - 12), rng.uniform(0, IMAGE_SIZE - 12)
+        trigger_id = index * parts // max(count, 1) + 1
+        rows.append(DefectRow(
+            index + 1, trigger_id, int(x), int(y), rng.randint(5, 12), rng.randint(5, 12),
+            0.9, "0", None, camera_id, trigger_id
+        ))
+    return rows
+
+
+def synthetic_regions(count: int = 3, camera_id: str = "DM08617AAK00001"):
+    width = IMAGE_SIZE // count
+    return [
+        RegionRow(
+            n + 1, f"R{n + 1}", camera_id,
+            [{"x": n * width, "y": 0}, {"x": (n + 1) * width, "y": 0}, {"x": (n + 1) * width, "y": IMAGE_SIZE}, {"x": n * width, "y": IMAGE_SIZE}],
+            0.75, 3, 2.0
+        )
+        for n in range(count)
+    ]
+
+
+@pytest.fixture(scope="session")
+def bench_database():
+    """URL of the benchmark database, generated first when BENCH_GENERATE=1."""
+    if not BENCH_DATABASE_URL:
+        pytest.skip("BENCH_DATABASE_URL is not set")
+
+    from . import generate_data
+
+    if os.environ.get("BENCH_GENERATE") == "1":
+        scale = generate_data.SCALES[os.environ.get("BENCH_SCALE", "small")]
+        generate_data.generate(BENCH_DATABASE_URL, scale)
+    return BENCH_DATABASE_URL
+
+
+@pytest.fixture
+def db(bench_database):
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def dataset(bench_database):
+    """Bounds of the loaded data: trigger ids and times, cameras."""
+    from sqlalchemy import func, select
+
+    from app.db import models
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        first_id, last_id, first_at, last_at = session.execute(
+            select(func.min(models.Trigger.id), func.max(models.Trigger.id), func.min(models.Trigger.timestamp), func.max(models.Trigger.timestamp))
+        ).one()
+        if last_id is None:
+            pytest.skip("The benchmark database has no triggers; run benchmarks.generate_data or set BENCH_GENERATE=1")
+        cameras = [camera.serial_number for camera in session.query(models.Camera).all()]
+    finally:
+        session.close()
+
+    return {
+        "first_trigger_id": first_id,
+        "last_trigger_id": last_id,
+        "start": first_at,
+        "end": last_at,
+        "cameras": cameras,
+    }
+
+
+@pytest.fixture
+def client(bench_database, app_client):
+    return app_client
+
+
+@pytest.fixture(scope="session")
+def ftp_server(tmp_path_factory):
+    """A local pyftpdlib server on a free port serving a directory of placeholder images."""
+    pytest.importorskip("pyftpdlib")
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+
+    from .generate_data import Scale, camera_serials, image_path, part_instance, write_image_files
+
+    root = tmp_path_factory.mktemp("ftp_root")
+    images_dir = root / "images"
+    scale = Scale(triggers=50)
+    # Images.image relative to the FTP base path (05-08-2025/09/1/...jpg)
+    paths = [
+        image_path(scale.start + timedelta(minutes=index), camera, camera_index, f"{index:032x}", part_instance(index)).split("images/", 1)[1]
+        for index in range(scale.triggers)
+        for camera_index, camera in enumerate(camera_serials(scale.cameras), start=1)
+    ]
+    write_image_files(str(images_dir), paths)
+
+    authorizer = DummyAuthorizer()
+    authorizer.add_user("bench", "bench", str(root), perm="elr")
+    handler = type("BenchFTPHandler", (FTPHandler,), {"authorizer": authorizer, "banner": "bench"})
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"handle_exit": False}, daemon=True)
+    thread.start()
+    try:
+        yield {
+            "host": "127.0.0.1",
+            "port": server.address[1],
+            "username": "bench",
+            "password": "bench",
+            "base_path": "images",
+            "root": str(root),
+            "paths": paths,
+        }
+    finally:
+        server.close_all()
+
+
+@pytest.fixture
+def ftp_image_access(ftp_server, monkeypatch, tmp_path):
+    """Point image_service at the local FTP server with an empty cache directory and a fresh pool."""
+    from app.services import image_service
+
+    ftp_config = dict(image_service.IMAGE_ACCESS.get("ftp", {}))
+    ftp_config.update(
+        host=ftp_server["host"],
+        port=ftp_server["port"],
+        username=ftp_server["username"],
+        password=ftp_server["password"],
+        base_path=ftp_server["base_path"],
+    )
+    monkeypatch.setitem(image_service.IMAGE_ACCESS, "ftp", ftp_config)
+    monkeypatch.setenv("IMAGE_ACCESS_FTP_PASSWORD", ftp_server["password"])
+    monkeypatch.setattr(image_service, "PROTOCOL", "ftp")
+    monkeypatch.setattr(image_service, "CACHE_ENABLED", True)
+    monkeypatch.setattr(image_service, "CACHE_DIR", str(tmp_path))
+    pool = image_service.FTPConnectionPool(max_size=4)
+    monkeypatch.setattr(image_service, "ftp_pool", pool)
+    try:
+        yield ftp_server
+    finally:
+        pool.close_all()
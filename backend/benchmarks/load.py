@@ -0,0 +1,137 @@
+"""
+Concurrent load against a running backend.
+
+    python -m benchmarks.load --url http://localhost:8000 --clients 50,200,500 \\
+        --route /api/images/latest --duration 30 --output load.json
+
+    python -m benchmarks.load --url http://localhost:8000 --scenario hmi --clients 20
+
+The "route" scenario has every client request one route back to back (with --bust-cache,
+each request carries a unique query string so the micro cache can't answer it). The "hmi"
+scenario plays the shop-floor screens: each client polls the camera snapshot every
+--interval seconds and opens the latest part's bundle when it changes. Results per
+client count (requests/s, latency percentiles, errors) are printed and written as JSON.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def get(self, client: httpx.AsyncClient, name: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return response
+
+    def summary(self, seconds: float) -> Dict[str, Any]:
+        summary = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            latencies = self.latencies.get(name, [])
+            summary[name] = {
+                "requests": len(latencies),
+                "errors": self.errors.get(name, 0),
+                "requests_per_second": round(len(latencies) / seconds, 1),
+                "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 2) if latencies else None,
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 2) if latencies else None,
+                "p99_ms": round(_percentile(latencies, 99) * 1000, 2) if latencies else None,
+            }
+        return summary
+
+
+async def route_client(client: httpx.AsyncClient, recorder: Recorder, route: str, deadline: float, bust_cache: bool = False):
+    requests = itertools.count()
+    while time.monotonic() < deadline:
+        params = {"_": f"{id(recorder)}-{next(requests)}"} if bust_cache else None
+        await recorder.get(client, route, route, params=params)
+
+
+async def hmi_client(client: httpx.AsyncClient, recorder: Recorder, interval: float, deadline: float):
+    etag = None
+    last_trigger = None
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await recorder.get(client, "snapshot", "/api/cameras/snapshot", headers=headers)
+        if response is not None and response.status_code == 200:
+            etag = response.headers.get("etag")
+            latest = await recorder.get(client, "latest_trigger", "/api/triggers/", params={"limit": 1})
+            items = latest.json().get("items", []) if latest is not None and latest.status_code == 200 else []
+            if items and items[0]["id"] != last_trigger:
+                last_trigger = items[0]["id"]
+                await recorder.get(client, "bundle", f"/api/triggers/{last_trigger}/bundle")
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+async def run(
+    url: str, clients: int, duration: float, scenario: str, route: str, interval: float, bust_cache: bool = False
+) -> Dict[str, Any]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        deadline = time.monotonic() + duration
+        started = time.perf_counter()
+        if scenario == "hmi":
+            tasks = [hmi_client(client, recorder, interval, deadline) for _ in range(clients)]
+        else:
+            tasks = [route_client(client, recorder, route, deadline, bust_cache) for _ in range(clients)]
+        await asyncio.gather(*tasks)
+        seconds = time.perf_counter() - started
+
+    return {"clients": clients, "seconds": round(seconds, 2), "routes": recorder.summary(seconds)}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Concurrent load against a running backend")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--scenario", choices=["route", "hmi"], default="route")
+    parser.add_argument("--route", default="/api/images/latest", help="Route for the route scenario")
+    parser.add_argument("--clients", default="50,200,500", help="Comma separated client counts, run in turn")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per client count")
+    parser.add_argument("--interval", type=float, default=1.0, help="Poll interval of the hmi scenario")
+    parser.add_argument("--bust-cache", action="store_true", help="Unique query string per request in the route scenario")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = []
+    for clients in (int(count) for count in args.clients.split(",")):
+        result = asyncio.run(run(args.url, clients, args.duration, args.scenario, args.route, args.interval, args.bust_cache))
+        result["scenario"] = args.scenario
+        results.append(result)
+        print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
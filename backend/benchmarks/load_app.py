@@ -0,0 +1,44 @@
+"""
+The backend app plus the routes the load benchmarks (test_load.py) need, served by uvicorn
+in its own process:
+
+    uvicorn benchmarks.load_app:app --lifespan off
+
+/bench/sync/images/latest answers /api/images/latest the way it did before the async
+database layer: a blocking session, on a threadpool worker. /bench/statements counts the
+SQL statements the process has run. BENCH_MICRO_CACHE=0 turns the micro cache off.
+"""
+import os
+from contextlib import ExitStack
+from typing import List
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.api.endpoints.images import _build_image_detail
+from app.db import crud
+from app.db.database import async_engine, engine, get_db
+from app.db.profiler import query_profiler
+from app.main import app
+from app.middleware.micro_cache import MicroCacheMiddleware
+from app.schemas import image
+
+if os.environ.get("BENCH_MICRO_CACHE") == "0":
+    for middleware in app.user_middleware:
+        if middleware.cls is MicroCacheMiddleware:
+            middleware.options["enabled"] = False
+
+query_profiler.install(engine, async_engine.sync_engine)
+_captures = ExitStack()
+statements = _captures.enter_context(query_profiler.capture())
+
+
+@app.get("/bench/statements")
+def read_statements():
+    return {"statements": statements.count}
+
+
+@app.get("/bench/sync/images/latest", response_model=List[image.ImageDetail])
+def read_latest_images_sync(db: Session = Depends(get_db)):
+    rows = crud.get_latest_images_with_defect_counts(db)
+    return [_build_image_detail(img, defect_count) for img, defect_count in rows]
@@ -0,0 +1,262 @@
+"""
+CPU-bound hot paths that need no database: region analysis, overlay encoding and
+serialization, repeat suppression, heatmap binning and the metrics middleware.
+"""
+import asyncio
+import json
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from .conftest import IMAGE_SIZE, synthetic_defects, synthetic_regions  # noqa: E402
+
+DEFECT_COUNTS = (10, 100, 1000)
+
+HeatmapRow = namedtuple("HeatmapRow", "id x y width height image_width image_height camera_id hour")
+
+
+@pytest.mark.benchmark(group="analysis: one region")
+@pytest.mark.parametrize("count", DEFECT_COUNTS)
+def test_analyze_defects_with_region(benchmark, count):
+    from app.services.analysis_service import analyze_defects_with_region
+
+    defects = synthetic_defects(count)
+    region = synthetic_regions(1)[0]
+
+    analyzed = benchmark(analyze_defects_with_region, defects, region)
+    assert len(analyzed) == count
+
+
+@pytest.mark.benchmark(group="analysis: polygon filter")
+@pytest.mark.parametrize("count", DEFECT_COUNTS)
+def test_filter_defects_by_region(benchmark, count):
+    from app.services.analysis_service import filter_defects_by_region
+
+    defects = synthetic_defects(count)
+    region = synthetic_regions(3)[1]
+
+    inside = benchmark(filter_defects_by_region, defects, region)
+    assert len(inside) <= count
+
+
+@pytest.mark.benchmark(group="analysis: image")
+@pytest.mark.parametrize("count", DEFECT_COUNTS)
+def test_analyze_image_defects(benchmark, count):
+    from app.services.analysis_service import analyze_image_defects
+
+    defects = synthetic_defects(count)
+    regions = synthetic_regions(3)
+
+    result = benchmark(analyze_image_defects, 1, defects[0].camera_id, defects, regions)
+    assert result["defect_count"] == count
+
+
+OVERLAY_FORMATS = ["rows", "columnar", "msgpack", "f32"]
+
+
+def _encoder(fmt, defects):
+    """The overlay body for a format; "rows" is the row-per-defect JSON the route serves by default."""
+    from app.services import overlay_service
+    from app.services.image_service import defect_to_normalized_dict
+    from app.utils.responses import trusted_json_response
+
+    if fmt == "msgpack" and overlay_service.msgpack is None:
+        pytest.skip("msgpack is not installed")
+    if fmt == "rows":
+        return lambda: trusted_json_response(
+            [defect_to_normalized_dict(defect, IMAGE_SIZE, IMAGE_SIZE) for defect in defects]
+        ).body
+
+    def encode():
+        columns = overlay_service.defect_columns(defects, IMAGE_SIZE, IMAGE_SIZE)
+        return overlay_service.encode_overlay(fmt, 1, IMAGE_SIZE, IMAGE_SIZE, columns)
+
+    return encode
+
+
+def _decoder(fmt):
+    """Parse a body back into ids and normalized boxes, as the frontend does."""
+    import numpy as np
+
+    from app.services import overlay_service
+
+    def rows(body):
+        defects = json.loads(body)
+        return [defect["id"] for defect in defects], [defect["normalized"] for defect in defects]
+
+    def columnar(body):
+        columns = json.loads(body)["columns"]
+        return columns["id"], [columns[field] for field in overlay_service.NORMALIZED_FIELDS]
+
+    def msgpack(body):
+        columns = overlay_service.msgpack.unpackb(body)["columns"]
+        return columns["id"], [columns[field] for field in overlay_service.NORMALIZED_FIELDS]
+
+    def f32(body):
+        # Typed-array views over the buffer, no per-defect work
+        count = int(np.frombuffer(body, dtype="<u4", count=1)[0])
+        ids = np.frombuffer(body, dtype="<u4", count=count, offset=4)
+        boxes = np.frombuffer(body, dtype="<f4", count=count * 4, offset=4 + 4 * count).reshape(count, 4)
+        return ids, boxes
+
+    return {"rows": rows, "columnar": columnar, "msgpack": msgpack, "f32": f32}[fmt]
+
+
+@pytest.mark.parametrize("count", [100, 1000])
+@pytest.mark.parametrize("fmt", OVERLAY_FORMATS)
+def test_encode_overlay(benchmark, fmt, count):
+    benchmark.group = f"overlay: encode {count} defects"
+    content = benchmark(_encoder(fmt, synthetic_defects(count)))
+    benchmark.extra_info["bytes"] = len(content)
+
+
+@pytest.mark.parametrize("count", [100, 1000])
+@pytest.mark.parametrize("fmt", OVERLAY_FORMATS)
+def test_parse_overlay(benchmark, fmt, count):
+    benchmark.group = f"overlay: parse {count} defects"
+    body = _encoder(fmt, synthetic_defects(count))()
+
+    ids, _ = benchmark(_decoder(fmt), body)
+    assert len(ids) == count
+    benchmark.extra_info["bytes"] = len(body)
+
+
+def _serialize_before(defects):
+    # The overlay route before the trusted path: a DefectNormalized per defect, which
+    # FastAPI then validated against response_model and encoded with the stock JSONResponse
+    from typing import List
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app.schemas.defect import DefectNormalized
+
+    field = create_response_field(name="response", type_=List[DefectNormalized])
+
+    def serialize():
+        models = [
+            DefectNormalized(
+                id=defect.id,
+                image_id=defect.image_id,
+                normalized={
+                    "x_center": (defect.x + defect.width / 2) / IMAGE_SIZE,
+                    "y_center": (defect.y + defect.height / 2) / IMAGE_SIZE,
+                    "width": defect.width / IMAGE_SIZE,
+                    "height": defect.height / IMAGE_SIZE,
+                },
+                x=defect.x,
+                y=defect.y,
+                width=defect.width,
+                height=defect.height,
+                confidence=defect.confidence,
+                type=defect.type,
+                disposition=defect.disposition,
+            )
+            for defect in defects
+        ]
+        content = asyncio.run(serialize_response(field=field, response_content=models))
+        return JSONResponse(content).body
+
+    return serialize
+
+
+@pytest.mark.benchmark(group="overlay: json serialization")
+@pytest.mark.parametrize("count", [1000, 10_000])
+@pytest.mark.parametrize("path", ["before", "trusted_stdlib_json", "trusted"])
+def test_serialize_defects(benchmark, monkeypatch, path, count):
+    from fastapi.responses import JSONResponse
+
+    from app.services.image_service import defect_to_normalized_dict
+    from app.utils import responses
+
+    defects = synthetic_defects(count)
+    if path == "trusted_stdlib_json":
+        # The trusted path with api.fast_json off (or orjson missing)
+        monkeypatch.setattr(responses, "FAST_JSON", False)
+        monkeypatch.setattr(responses, "DefaultResponse", JSONResponse)
+
+    def trusted():
+        rows = [defect_to_normalized_dict(defect, IMAGE_SIZE, IMAGE_SIZE) for defect in defects]
+        return responses.trusted_json_response(rows).body
+
+    body = benchmark(_serialize_before(defects) if path == "before" else trusted)
+    assert len(json.loads(body)) == count
+    benchmark.extra_info["bytes"] = len(body)
+    if benchmark.stats:
+        benchmark.extra_info["ms_per_1000_defects"] = round(benchmark.stats.stats.mean * 1000 * 1000 / count, 3)
+
+
+@pytest.mark.benchmark(group="suppression: 10000 defects")
+@pytest.mark.parametrize("parts", [100, 1000])
+def test_suppression_engine(benchmark, parts):
+    from app.services.suppression_service import SuppressionEngine
+
+    defects = synthetic_defects(10_000, parts=parts)
+
+    # A fresh engine per round, so every round sees the same empty window
+    suppressed = benchmark.pedantic(
+        lambda engine: engine.process(defects),
+        setup=lambda: ((SuppressionEngine(),), {}),
+        rounds=10
+    )
+    benchmark.extra_info["suppressed"] = len(suppressed)
+
+
+@pytest.mark.benchmark(group="heatmap: accumulate 10000 defects")
+@pytest.mark.parametrize("grid_size", [64, 256])
+def test_heatmap_accumulate(benchmark, grid_size):
+    from app.services.heatmap_service import accumulate
+
+    hours = [datetime(2025, 5, 8, hour) for hour in range(24)]
+    defects = [
+        HeatmapRow(defect.id, defect.x, defect.y, defect.width, defect.height, IMAGE_SIZE, IMAGE_SIZE,
+                   defect.camera_id, hours[index % len(hours)])
+        for index, defect in enumerate(synthetic_defects(10_000))
+    ]
+
+    histograms = benchmark(accumulate, defects, grid_size)
+    assert sum(int(histogram.sum()) for histogram in histograms.values()) == len(defects)
+
+
+async def _bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+@pytest.mark.benchmark(group="metrics: request overhead")
+@pytest.mark.parametrize("instrumented", [False, True])
+def test_metrics_middleware(benchmark, instrumented):
+    from starlette.routing import Route
+
+    from app.middleware.metrics import MetricsMiddleware
+
+    routes = [Route(f"/api/route{n}/{{item_id}}", endpoint=lambda request: None) for n in range(20)]
+    app = MetricsMiddleware(_bare_app, routes=routes) if instrumented else _bare_app
+    scope = {"type": "http", "method": "GET", "path": "/api/route19/42", "headers": [], "query_string": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def requests(count):
+        for _ in range(count):
+            await app(scope, receive, send)
+
+    loop = asyncio.new_event_loop()
+    try:
+        benchmark(lambda: loop.run_until_complete(requests(1000)))
+    finally:
+        loop.close()
+
+
+@pytest.mark.benchmark(group="metrics: observe")
+def test_histogram_observe(benchmark):
+    from app.utils.metrics import http_request_duration
+
+    benchmark(http_request_duration.observe, 0.012, route="/api/images/latest", method="GET", status="200")
@@ -0,0 +1,186 @@
+"""
+Database hot paths against the generated data: live-view reads, statistics, trigger
+history depth, per-request statement counts and the disposition click, idle and under
+a simulated insert load.
+"""
+import itertools
+import threading
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+HISTORY_DEPTHS = (0, 1_000, 50_000)
+PAGE_SIZE = 50
+# Simulated vision system for the disposition click benchmarks
+INSERT_WRITERS = 4
+DEFECTS_PER_IMAGE = 4
+
+
+@pytest.mark.benchmark(group="live view: latest image per camera")
+@pytest.mark.parametrize("method", ["per_camera", "one_query"])
+def test_latest_images(benchmark, db, dataset, method):
+    from app.db import crud
+
+    def per_camera():
+        # The request waterfall the live view used to make: one lookup per camera
+        return [crud.get_camera_latest_image(db, camera_id=camera) for camera in dataset["cameras"]]
+
+    def one_query():
+        return crud.get_latest_images_with_defect_counts(db)
+
+    rows = benchmark(per_camera if method == "per_camera" else one_query)
+    assert len(rows) == len(dataset["cameras"])
+
+
+@pytest.mark.benchmark(group="live view: camera snapshot")
+def test_camera_snapshot(benchmark, db, dataset):
+    from app.db import crud
+
+    rows = benchmark(crud.get_camera_snapshot, db)
+    assert len(rows) == len(dataset["cameras"])
+
+
+@pytest.mark.benchmark(group="statistics")
+@pytest.mark.parametrize("source", ["raw", "rollup"])
+@pytest.mark.parametrize("window_hours", [24, 24 * 7, None])
+def test_defect_statistics(benchmark, db, dataset, source, window_hours):
+    from app.db import crud
+
+    start = dataset["end"] - timedelta(hours=window_hours) if window_hours else None
+    statistics = crud.get_defect_statistics if source == "raw" else crud.get_defect_statistics_from_rollup
+
+    result = benchmark(statistics, db, start=start)
+    benchmark.extra_info["total_defects"] = result["total_defects"]
+
+
+@pytest.mark.benchmark(group="trigger history: page at depth")
+@pytest.mark.parametrize("pagination", ["offset", "keyset"])
+@pytest.mark.parametrize("depth", HISTORY_DEPTHS)
+def test_trigger_history_depth(benchmark, db, dataset, pagination, depth):
+    from app.db import crud
+
+    if depth >= dataset["last_trigger_id"] - dataset["first_trigger_id"]:
+        pytest.skip(f"The dataset has fewer than {depth} triggers")
+
+    if pagination == "offset":
+        statement = crud.trigger_history_statement(PAGE_SIZE).offset(depth)
+    else:
+        # The cursor a client would hold after paging down to depth
+        last = db.execute(crud.trigger_history_statement(1).offset(depth - 1)).one() if depth else None
+        before = (last.Trigger.timestamp, last.Trigger.id) if last else None
+        statement = crud.trigger_history_statement(PAGE_SIZE, before=before)
+
+    rows = benchmark(lambda: db.execute(statement).all())
+    assert len(rows) == PAGE_SIZE
+
+
+def test_latest_images_query_budget(client, query_budget):
+    with query_budget(1):
+        response = client.get("/api/images/latest")
+    assert response.status_code == 200
+
+
+def test_trigger_bundle_query_budget(client, db, dataset, query_budget):
+    from sqlalchemy import select
+
+    from app.db import models
+
+    # The bundle costs the same number of statements whatever the trigger's image count.
+    # Ids are read back: the insert load benchmarks leave gaps in the sequence.
+    trigger_ids = db.execute(select(models.Trigger.id).order_by(models.Trigger.id.desc()).limit(5)).scalars().all()
+    db.rollback()
+    counts = set()
+    for trigger_id in trigger_ids:
+        with query_budget(4, max_repeats=1) as profile:
+            response = client.get(f"/api/triggers/{trigger_id}/bundle", params={"analysis": "true"})
+        assert response.status_code == 200
+        counts.add(profile.count)
+    assert len(counts) == 1
+
+
+@pytest.fixture
+def defect_ids(db, dataset):
+    from sqlalchemy import select
+
+    from app.db import models
+
+    ids = db.execute(select(models.Defect.id).order_by(models.Defect.id.desc()).limit(1000)).scalars().all()
+    if not ids:
+        pytest.skip("The benchmark database has no defects")
+    return ids
+
+
+@pytest.fixture(params=["idle", "inserting"])
+def insert_load(request, bench_database, dataset):
+    """
+    With "inserting", INSERT_WRITERS threads add parts back to back while the test runs, as
+    the vision system does: a trigger, an image per camera and DEFECTS_PER_IMAGE defects
+    per transaction, firing the rollup and notification triggers. Yields the counts.
+    """
+    from sqlalchemy import text
+
+    from app.db.database import engine
+
+    inserted = {"parts": 0}
+    if request.param == "idle":
+        yield inserted
+        return
+
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def write():
+        with engine.connect() as connection:
+            while not stop.is_set():
+                with connection.begin():
+                    trigger_id = connection.execute(text(
+                        'INSERT INTO "Triggers" ("timestamp", label, part_instance, belt, part) '
+                        "VALUES (now(), 0, 'LOAD' || nextval('\"Triggers_id_seq\"'), 'trigger', 'RFML3P 7006 MC') RETURNING id"
+                    )).scalar()
+                    image_ids = connection.execute(text(
+                        'INSERT INTO "Images" (trigger, width, height, camera) '
+                        "SELECT :trigger, 5120, 5120, camera FROM unnest(CAST(:cameras AS text[])) camera RETURNING id"
+                    ), {"trigger": trigger_id, "cameras": dataset["cameras"]}).scalars().all()
+                    connection.execute(text(
+                        'INSERT INTO "Defects" (image, x, y, width, height, confidence, type) '
+                        "SELECT image, (random() * 5000)::int, (random() * 5000)::int, 8, 8, 0.9, '0' "
+                        "FROM unnest(CAST(:images AS integer[])) image, generate_series(1, :defects)"
+                    ), {"images": image_ids, "defects": DEFECTS_PER_IMAGE})
+                with lock:
+                    inserted["parts"] += 1
+
+    writers = [threading.Thread(target=write, daemon=True) for _ in range(INSERT_WRITERS)]
+    for writer in writers:
+        writer.start()
+    try:
+        yield inserted
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+
+
+@pytest.mark.benchmark(group="disposition click")
+def test_disposition_commit(benchmark, db, defect_ids, insert_load):
+    from app.db import crud
+
+    clicks = itertools.cycle(defect_ids)
+    benchmark(lambda: crud.update_defect_disposition(db, defect_id=next(clicks), disposition="Part Okay"))
+    benchmark.extra_info["parts_inserted"] = insert_load["parts"]
+
+
+@pytest.mark.benchmark(group="disposition click")
+def test_disposition_journal(benchmark, bench_database, defect_ids, insert_load, tmp_path):
+    from app.db.journal import DispositionJournal
+
+    journal = DispositionJournal(str(tmp_path / "dispositions.jsonl"), enabled=True)
+    journal.start()
+    clicks = itertools.cycle(defect_ids)
+    try:
+        # Acknowledged after the fsync; the flusher writes to Postgres in the background
+        benchmark(lambda: journal.append([{"defect_id": next(clicks), "disposition": "Part Okay"}]))
+    finally:
+        journal.stop()
+    benchmark.extra_info["parts_inserted"] = insert_load["parts"]
@@ -0,0 +1,184 @@
+"""
+Streaming defect export over the generated data: rows/s per format, and the peak memory
+each export adds on top of an idle process, to show it stays flat as the range grows.
+The training set export is timed with one and several fetch workers, against image
+files that take FETCH_LATENCY_SECONDS to arrive, as over FTP.
+
+The memory figure comes from running the export once more in a fresh interpreter, as
+the peak RSS of a process only ever grows and can't be read per export in this one.
+
+With BENCH_LARGE=1, Defects is also padded to BENCH_EXPORT_ROWS rows (10M by default)
+by copying existing defects, and the whole range is exported; like test_scale.py, the
+padding is left in place.
+"""
+import json
+import os
+import subprocess
+import sys
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+EXPORT_ROWS = int(os.environ.get("BENCH_EXPORT_ROWS", "10000000"))
+PAD_BATCH_ROWS = 1_000_000
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a subprocess: prints the export's bytes, the RSS before it and the peak RSS during
+# it, in KiB. On Linux the peak (VmHWM) is reset first, as the child starts out with the
+# high-water mark of the process that launched it; elsewhere ru_maxrss is all there is.
+RSS_SCRIPT = """
+import json, os, resource, sys
+from datetime import datetime
+from app.services import export_service
+from app.db.database import engine
+
+def status(field):
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith(field + ":")).split()[1])
+
+def maxrss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+
+start, end, fmt, compress = datetime.fromisoformat(sys.argv[1]), datetime.fromisoformat(sys.argv[2]), sys.argv[3], sys.argv[4] == "1"
+with engine.connect():
+    pass
+proc = os.path.exists("/proc/self/clear_refs")
+if proc:
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+before = status("VmRSS") if proc else maxrss()
+size = sum(len(chunk) for chunk in export_service.stream_defect_export(start, end, fmt=fmt, compress=compress))
+peak = status("VmHWM") if proc else maxrss()
+print(json.dumps({"bytes": size, "before": before, "peak": peak}))
+"""
+
+
+def _rss_delta_mb(database_url: str, start, end, fmt: str, compress: bool) -> float:
+    """Peak RSS one export adds to a process that has imported the backend and connected."""
+    output = subprocess.run(
+        [sys.executable, "-c", RSS_SCRIPT, start.isoformat(), end.isoformat(), fmt, "1" if compress else "0"],
+        cwd=BACKEND_DIR, env=dict(os.environ, DATABASE_URL=database_url),
+        check=True, capture_output=True, text=True
+    ).stdout
+    usage = json.loads(output.strip().splitlines()[-1])
+    return round((usage["peak"] - usage["before"]) / 1024, 1)
+
+
+def _export_rows(db, start, end) -> int:
+    from sqlalchemy import func, select
+
+    from app.db import crud
+    from app.services import retention_service
+
+    statement = crud.defect_export_statement(start, end, include_archive=retention_service.reaches_archive(start))
+    rows = db.execute(select(func.count()).select_from(statement.order_by(None).subquery())).scalar()
+    db.rollback()
+    return rows
+
+
+def _benchmark_export(benchmark, bench_database, db, start, end, fmt, compress, rounds):
+    from app.services import export_service
+
+    try:
+        export_service.check_format(fmt)
+    except export_service.ExportError as e:
+        pytest.skip(str(e))
+
+    rows = _export_rows(db, start, end)
+
+    def export():
+        return sum(len(chunk) for chunk in export_service.stream_defect_export(start, end, fmt=fmt, compress=compress))
+
+    size = benchmark.pedantic(export, rounds=rounds, warmup_rounds=1 if rounds > 1 else 0)
+    benchmark.extra_info["rows"] = rows
+    benchmark.extra_info["bytes"] = size
+    # No stats under --benchmark-disable, where the export just runs once as a test
+    if benchmark.stats:
+        benchmark.extra_info["rows_per_second"] = round(rows / benchmark.stats.stats.mean)
+    benchmark.extra_info["rss_delta_mb"] = _rss_delta_mb(bench_database, start, end, fmt, compress)
+    return benchmark.extra_info["rss_delta_mb"]
+
+
+FORMATS = [("csv", False), ("csv", True), ("parquet", False), ("parquet", True)]
+
+
+@pytest.mark.benchmark(group="export")
+@pytest.mark.parametrize("fmt,compress", FORMATS)
+@pytest.mark.parametrize("days", [1, 7])
+def test_stream_defect_export(benchmark, bench_database, db, dataset, fmt, compress, days):
+    end = dataset["end"] + timedelta(seconds=1)
+    _benchmark_export(benchmark, bench_database, db, end - timedelta(days=days), end, fmt, compress, rounds=3)
+
+
+def _pad_defects(db, rows: int) -> int:
+    """Copy existing defects (onto the same images) until Defects holds at least rows rows."""
+    from sqlalchemy import text
+
+    count = db.execute(text('SELECT count(*) FROM "Defects"')).scalar()
+    # Bulk history: skip the row triggers (rollups, notifications) the line's inserts fire
+    db.execute(text("SET session_replication_role = replica"))
+    while count < rows:
+        db.execute(text(
+            'INSERT INTO "Defects" (image, x, y, width, height, confidence, type, disposition) '
+            'SELECT image, x, y, width, height, confidence, type, disposition FROM "Defects" ORDER BY id LIMIT :batch'
+        ), {"batch": min(rows - count, PAD_BATCH_ROWS)})
+        db.commit()
+        count = db.execute(text('SELECT count(*) FROM "Defects"')).scalar()
+    db.execute(text("SET session_replication_role = DEFAULT"))
+    db.execute(text('ANALYZE "Defects"'))
+    db.commit()
+    return count
+
+
+@pytest.mark.skipif(os.environ.get("BENCH_LARGE") != "1", reason="Set BENCH_LARGE=1 to pad the benchmark database to millions of defects")
+@pytest.mark.parametrize("fmt,compress", FORMATS)
+def test_stream_defect_export_at_scale(benchmark, bench_database, db, dataset, fmt, compress):
+    padded = _pad_defects(db, EXPORT_ROWS)
+    benchmark.group = f"export: {padded:,} defects"
+
+    start, end = dataset["start"], dataset["end"] + timedelta(seconds=1)
+    rss_delta_mb = _benchmark_export(benchmark, bench_database, db, start, end, fmt, compress, rounds=1)
+    # Bounded by one batch (export.batch_rows), not by the range
+    assert rss_delta_mb < 1024
+
+
+# Simulated FTP round trip per image file for the training set export
+FETCH_LATENCY_SECONDS = 0.005
+TRAINING_HOURS = 2
+
+
+@pytest.mark.benchmark(group="export: training set")
+@pytest.mark.parametrize("fetch_workers", [1, 8])
+def test_training_set_export(benchmark, db, dataset, tmp_path, monkeypatch, fetch_workers):
+    import tarfile
+    import time
+
+    from app.services import image_service, training_export_service
+    from app.services.export_service import ChunkSink
+
+    placeholder = tmp_path / "image.jpg"
+    placeholder.write_bytes(b"\0" * 65536)
+
+    def fetch(image):
+        time.sleep(FETCH_LATENCY_SECONDS)
+        return str(placeholder)
+
+    monkeypatch.setattr(image_service, "get_image_file_path", fetch)
+    end = dataset["end"] + timedelta(seconds=1)
+    start = end - timedelta(hours=TRAINING_HOURS)
+
+    def export():
+        sink = ChunkSink()
+        progress = training_export_service.TrainingExportProgress()
+        with tarfile.open(fileobj=sink, mode="w|") as tar:
+            for _ in training_export_service.write_training_set(tar, start, end, progress=progress, fetch_workers=fetch_workers):
+                sink.drain()
+        return progress
+
+    progress = benchmark.pedantic(export, rounds=3, warmup_rounds=1)
+    assert progress.images == progress.total
+    benchmark.extra_info["images"] = progress.images
+    if benchmark.stats:
+        benchmark.extra_info["images_per_second"] = round(progress.images / benchmark.stats.stats.mean)
@@ -0,0 +1,67 @@
+"""
+Image file access: resolving Images.image paths in local mode, and FTP fetches against
+a local FTP server with the cache warm (hit) and cold (miss).
+"""
+import itertools
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from .generate_data import camera_serials, image_path, part_instance, write_image_files  # noqa: E402
+
+
+@pytest.fixture
+def local_images(tmp_path, monkeypatch):
+    """Images.image paths as stored (E:\\images/...) with placeholder files under a fallback_path."""
+    from app.services import image_service
+
+    started = datetime(2025, 5, 8, 6, 0, 0)
+    paths = [
+        image_path(started + timedelta(minutes=index), camera, camera_index, f"{index:032x}", part_instance(index))
+        for index in range(20)
+        for camera_index, camera in enumerate(camera_serials(9), start=1)
+    ]
+    write_image_files(str(tmp_path), paths, size_bytes=4096)
+    monkeypatch.setattr(image_service, "PROTOCOL", "local")
+    monkeypatch.setattr(image_service, "FALLBACK_PATH", str(tmp_path))
+    return paths
+
+
+@pytest.mark.benchmark(group="images: local path")
+def test_get_local_image_path(benchmark, local_images):
+    from app.services.image_service import get_local_image_path
+
+    paths = itertools.cycle(local_images)
+    resolved = benchmark(lambda: get_local_image_path(next(paths)))
+    assert resolved is not None and os.path.isfile(resolved)
+
+
+@pytest.mark.benchmark(group="images: ftp")
+def test_ftp_cache_hit(benchmark, ftp_image_access):
+    from app.services.image_service import fetch_ftp_image
+
+    paths = ftp_image_access["paths"][:20]
+    for path in paths:
+        fetch_ftp_image(path)
+
+    paths = itertools.cycle(paths)
+    benchmark(lambda: fetch_ftp_image(next(paths)))
+
+
+@pytest.mark.benchmark(group="images: ftp")
+def test_ftp_cache_miss(benchmark, ftp_image_access):
+    from app.services.image_service import evict_cached_images, fetch_ftp_image
+
+    paths = itertools.cycle(ftp_image_access["paths"])
+
+    def evicted():
+        # Every round downloads: drop the image from the cache first
+        path = next(paths)
+        evict_cached_images([path])
+        return (path,), {}
+
+    local_path = benchmark.pedantic(fetch_ftp_image, setup=evicted, rounds=100, warmup_rounds=2)
+    benchmark.extra_info["bytes"] = os.path.getsize(local_path)
@@ -0,0 +1,60 @@
+"""
+Background loaders against the benchmark database: HumanInspect scan file ingest and
+repeat suppression over a range of stored defects.
+"""
+import itertools
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from .generate_data import write_scan_files  # noqa: E402
+
+SCAN_ROWS = 100_000
+SUPPRESSION_DEFECTS = 50_000
+
+
+@pytest.mark.benchmark(group="ingest: 100k scan rows")
+@pytest.mark.parametrize("method", ["copy", "executemany"])
+def test_ingest_scan_files(benchmark, bench_database, tmp_path, method):
+    from app.services.ingest_service import build_ingester
+
+    rounds = itertools.count(1)
+
+    def new_directory():
+        # File names new to processed_files (they carry the seed), or the ingester would skip them
+        directory = tmp_path / f"round{next(rounds)}"
+        write_scan_files(str(directory), SCAN_ROWS, files=50, seed=time.time_ns())
+        ingester = build_ingester(str(directory))
+        ingester.method = method
+        return (ingester,), {}
+
+    def ingest(ingester):
+        try:
+            return ingester.ingest()
+        finally:
+            ingester.close()
+
+    totals = benchmark.pedantic(ingest, setup=new_directory, rounds=3)
+    assert totals["rows"] == SCAN_ROWS
+    if benchmark.stats:
+        benchmark.extra_info["rows_per_second"] = round(SCAN_ROWS / benchmark.stats.stats.mean)
+
+
+@pytest.mark.benchmark(group="suppression: stored defects")
+def test_suppress_range(benchmark, db, dataset):
+    from sqlalchemy import func, select
+
+    from app.db import models
+    from app.services.suppression_service import suppress_range
+
+    last_id = db.execute(select(func.max(models.Defect.id))).scalar()
+    if not last_id:
+        pytest.skip("The benchmark database has no defects")
+    start_id = max(0, last_id - SUPPRESSION_DEFECTS)
+
+    # Rows already in Suppressed_Defects are skipped, so later rounds only pay for the scan
+    written = benchmark.pedantic(suppress_range, args=(start_id, last_id), rounds=3)
+    benchmark.extra_info["defects"] = last_id - start_id
+    benchmark.extra_info["suppressed_last_round"] = written
@@ -0,0 +1,128 @@
+"""
+Concurrent clients against the backend served by uvicorn in a separate process
+(benchmarks/load_app.py), driven by load.py. Each case runs for BENCH_LOAD_SECONDS (10 by
+default) and records requests/s, latency percentiles and errors in extra_info; the timing
+pytest-benchmark reports is just that duration. Only runs with BENCH_LOAD=1.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+if os.environ.get("BENCH_LOAD") != "1":
+    pytest.skip("Set BENCH_LOAD=1 to run load tests against a uvicorn server", allow_module_level=True)
+
+from . import load  # noqa: E402
+
+LOAD_SECONDS = float(os.environ.get("BENCH_LOAD_SECONDS", "10"))
+# The hmi scenario's first poll of every client opens the latest part; not counted
+HMI_WARMUP_SECONDS = 3.0
+HMI_CLIENTS = (1, 5, 10, 20)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _serve(database_url: str, micro_cache: bool = True):
+    """Base URL of a uvicorn process serving load_app (background workers not started)."""
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--lifespan", "off", "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, DATABASE_URL=database_url, BENCH_MICRO_CACHE="1" if micro_cache else "0"),
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(url + "/")
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    pytest.fail("The load test server did not start")
+                time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+@pytest.fixture(scope="module")
+def server(bench_database):
+    with _serve(bench_database) as url:
+        yield url
+
+
+def _record(benchmark, result, name):
+    summary = result["routes"].get(name, {})
+    for key in ("requests_per_second", "p50_ms", "p95_ms", "p99_ms", "errors"):
+        benchmark.extra_info[key] = summary.get(key)
+
+
+@pytest.mark.parametrize("clients", [50, 200, 500])
+@pytest.mark.parametrize("session", ["sync", "async"])
+def test_latest_images_load(benchmark, server, session, clients):
+    # Unique query strings keep the micro cache out of the comparison. Errors are results
+    # here: past the threadpool plus pool size, sync requests time out rather than queue.
+    route = "/bench/sync/images/latest" if session == "sync" else "/api/images/latest"
+    benchmark.group = f"load: latest images, {clients} clients"
+
+    result = benchmark.pedantic(
+        lambda: asyncio.run(load.run(server, clients, LOAD_SECONDS, "route", route, 1.0, bust_cache=True)),
+        rounds=1, iterations=1
+    )
+    _record(benchmark, result, route)
+
+
+async def _hmi_statements(url: str, clients: int):
+    """Run the hmi scenario; returns its result and the statements/s the server ran after warm-up."""
+    import httpx
+
+    async with httpx.AsyncClient(base_url=url) as client:
+        run = asyncio.ensure_future(load.run(url, clients, HMI_WARMUP_SECONDS + LOAD_SECONDS, "hmi", "", 1.0))
+        await asyncio.sleep(HMI_WARMUP_SECONDS)
+        started, first = time.monotonic(), (await client.get("/bench/statements")).json()["statements"]
+        result = await run
+        seconds, last = time.monotonic() - started, (await client.get("/bench/statements")).json()["statements"]
+    return result, round((last - first) / seconds, 1)
+
+
+@pytest.mark.parametrize("micro_cache", ["on", "off"])
+def test_hmi_statements_per_second(benchmark, bench_database, micro_cache):
+    # The line screens poll every second; with the micro cache one computation per TTL
+    # serves all of them, so the database sees the same load however many there are
+    benchmark.group = "load: hmi polling, DB statements/s"
+
+    def scale_clients():
+        rates, errors = {}, {}
+        with _serve(bench_database, micro_cache=micro_cache == "on") as url:
+            for clients in HMI_CLIENTS:
+                result, rates[clients] = asyncio.run(_hmi_statements(url, clients))
+                errors[clients] = sum(route["errors"] for route in result["routes"].values())
+        return rates, errors
+
+    rates, errors = benchmark.pedantic(scale_clients, rounds=1, iterations=1)
+    benchmark.extra_info["statements_per_second"] = {str(clients): rate for clients, rate in rates.items()}
+    benchmark.extra_info["errors"] = {str(clients): count for clients, count in errors.items()}
+    if micro_cache == "on":
+        assert rates[HMI_CLIENTS[-1]] <= 2 * max(rates[HMI_CLIENTS[0]], 1.0)
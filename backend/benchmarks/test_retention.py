@@ -0,0 +1,92 @@
+"""
+Hot-path queries before and after moving old parts to the archive schema.
+
+Archiving changes the benchmark database for good (the older half of the parts is moved),
+so this module only runs with BENCH_ARCHIVE=1, and runs last. Cases are listed in order:
+every query on the full tables, then the archive, then every query again.
+"""
+import os
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+if os.environ.get("BENCH_ARCHIVE") != "1":
+    pytest.skip("Set BENCH_ARCHIVE=1 to archive half of the benchmark database", allow_module_level=True)
+
+
+def _latest_images(db, dataset):
+    from app.db import crud
+    return crud.get_latest_images_with_defect_counts(db)
+
+
+def _camera_snapshot(db, dataset):
+    from app.db import crud
+    return crud.get_camera_snapshot(db)
+
+
+def _history_first_page(db, dataset):
+    from app.db import crud
+    return crud.get_trigger_history(db, 50)
+
+
+def _statistics_last_day(db, dataset):
+    from app.db import crud
+    return crud.get_defect_statistics(db, start=dataset["end"] - timedelta(days=1))
+
+
+def _triggers_last_day(db, dataset):
+    from app.db import crud
+    return crud.get_triggers_between(db, dataset["end"] - timedelta(days=1), dataset["end"])
+
+
+QUERIES = {
+    "latest_images": _latest_images,
+    "camera_snapshot": _camera_snapshot,
+    "history_first_page": _history_first_page,
+    "statistics_last_day": _statistics_last_day,
+    "triggers_last_day": _triggers_last_day,
+}
+CORRELATED_PARTS = 20
+CASES = [(stage, query) for stage in ("hot", "archived") for query in QUERIES]
+
+
+@pytest.fixture(scope="module")
+def archived(dataset):
+    """
+    Archive the parts triggered in the older half of the dataset, after linking a scan to
+    each of the oldest parts: their links to every image must move with them.
+    """
+    from sqlalchemy import func
+
+    from app.db import models
+    from app.db.database import SessionLocal
+    from app.services import correlation_service, retention_service
+
+    db = SessionLocal()
+    try:
+        last_scan = db.query(func.max(models.HumanInspect.id)).scalar() or 0
+        for trigger in db.query(models.Trigger).order_by(models.Trigger.timestamp).limit(CORRELATED_PARTS):
+            # Naive local scan time, as the ingest worker stores it
+            scanned_at = (trigger.timestamp + timedelta(minutes=1)).astimezone().replace(tzinfo=None)
+            db.add(models.HumanInspect(serial_no=trigger.part_instance[:14], pass_fail="PASS", scan_datetime=scanned_at))
+        db.commit()
+    finally:
+        db.close()
+    linked = correlation_service.correlate_range(start_id=last_scan)
+
+    cutoff = dataset["start"] + (dataset["end"] - dataset["start"]) / 2
+    totals = retention_service.archive_before(cutoff, batch_size=5000, prune_cache=False)
+    return dict(totals, links=linked)
+
+
+@pytest.mark.parametrize("stage,query", CASES)
+def test_hot_query(benchmark, request, db, dataset, stage, query):
+    benchmark.group = f"retention: {query}"
+    if stage == "archived":
+        totals = request.getfixturevalue("archived")
+        benchmark.extra_info["archived_parts"] = totals["parts"]
+        benchmark.extra_info["archived_links"] = totals["links"]
+
+    benchmark(QUERIES[query], db, dataset)
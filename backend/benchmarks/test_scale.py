@@ -0,0 +1,108 @@
+"""
+Latest images and history pages against history padded to millions of rows, to show
+their cost does not grow with it. The benchmark database is padded with parts older than
+the generated ones (one image per camera, no defects) up to each size of BENCH_LARGE_ROWS
+in turn (Images rows, default 1M and 10M), so this module only runs with BENCH_LARGE=1
+and leaves the padding in place.
+"""
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+if os.environ.get("BENCH_LARGE") != "1":
+    pytest.skip("Set BENCH_LARGE=1 to pad the benchmark database to millions of images", allow_module_level=True)
+
+IMAGE_ROWS = sorted(int(rows) for rows in os.environ.get("BENCH_LARGE_ROWS", "1000000,10000000").split(","))
+PAD_BATCH_TRIGGERS = 100_000
+HISTORY_DEPTHS = (0, 10_000, 1_000_000)
+PAGE_SIZE = 50
+
+
+def _pad(db, dataset, rows: int) -> int:
+    """Add older parts until Images holds at least rows rows; returns the row count."""
+    from sqlalchemy import text
+
+    cameras = dataset["cameras"]
+    images = db.execute(text('SELECT count(*) FROM "Images"')).scalar()
+    triggers = -(-(rows - images) // len(cameras))
+    # Bulk history: skip the row triggers (rollups, notifications) the line's inserts fire
+    db.execute(text("SET session_replication_role = replica"))
+    while triggers > 0:
+        batch = min(triggers, PAD_BATCH_TRIGGERS)
+        db.execute(text(
+            'WITH bounds AS (SELECT max(id) AS last_id, min("timestamp") AS first_at FROM "Triggers"), '
+            'parts AS ('
+            '  INSERT INTO "Triggers" (id, "timestamp", label, part_instance, belt, part) '
+            "  SELECT last_id + g, first_at - g * interval '1 minute', 0, 'PAD' || (last_id + g), 'trigger', 'RFML3P 7006 MC' "
+            '  FROM bounds, generate_series(1, :batch) g RETURNING id'
+            '), last_image AS (SELECT coalesce(max(id), 0) AS last_id FROM "Images") '
+            'INSERT INTO "Images" (id, trigger, width, height, camera, image) '
+            'SELECT last_image.last_id + row_number() OVER (ORDER BY parts.id, camera.ordinality), parts.id, 5120, 5120, camera.serial, NULL '
+            'FROM last_image, parts, unnest(CAST(:cameras AS text[])) WITH ORDINALITY AS camera(serial, ordinality)'
+        ), {"batch": batch, "cameras": cameras})
+        db.commit()
+        triggers -= batch
+    db.execute(text("SET session_replication_role = DEFAULT"))
+    # Explicit ids: move the sequences past them for later inserts
+    for table in ("Triggers", "Images"):
+        db.execute(text(f"SELECT setval('\"{table}_id_seq\"', (SELECT max(id) FROM \"{table}\"))"))
+    db.execute(text('ANALYZE "Triggers", "Images"'))
+    db.commit()
+    return db.execute(text('SELECT count(*) FROM "Images"')).scalar()
+
+
+@pytest.fixture(scope="module", params=IMAGE_ROWS, ids=lambda rows: f"{rows // 1_000_000}M" if rows >= 1_000_000 else str(rows))
+def padded(request, bench_database, dataset):
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        return _pad(session, dataset, request.param)
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize("method", ["group_by", "one_query"])
+def test_latest_images_at_scale(benchmark, db, dataset, padded, method):
+    from sqlalchemy import func, select
+
+    from app.db import crud, models
+
+    def group_by():
+        # The query /api/images/latest ran before: max(id) per camera over the whole table
+        return db.execute(select(models.Image.camera_id, func.max(models.Image.id)).group_by(models.Image.camera_id)).all()
+
+    def one_query():
+        return crud.get_latest_images_with_defect_counts(db)
+
+    benchmark.group = f"latest images: {padded:,} images"
+    benchmark.extra_info["images"] = padded
+    rows = benchmark.pedantic(group_by if method == "group_by" else one_query, rounds=5 if method == "group_by" else 50)
+    assert len(rows) == len(dataset["cameras"])
+
+
+@pytest.mark.parametrize("depth", HISTORY_DEPTHS)
+@pytest.mark.parametrize("pagination", ["offset", "keyset"])
+def test_trigger_history_at_scale(benchmark, db, dataset, padded, pagination, depth):
+    from sqlalchemy import func, select
+
+    from app.db import crud, models
+
+    triggers = db.execute(select(func.count(models.Trigger.id))).scalar()
+    if depth + PAGE_SIZE > triggers:
+        pytest.skip(f"The padded database has fewer than {depth + PAGE_SIZE} triggers")
+
+    if pagination == "offset":
+        statement = crud.trigger_history_statement(PAGE_SIZE).offset(depth)
+    else:
+        # The cursor a client would hold after paging down to depth
+        last = db.execute(crud.trigger_history_statement(1).offset(depth - 1)).one() if depth else None
+        before = (last.Trigger.timestamp, last.Trigger.id) if last else None
+        statement = crud.trigger_history_statement(PAGE_SIZE, before=before)
+
+    benchmark.group = f"trigger history: page at depth, {triggers:,} triggers"
+    benchmark.extra_info["triggers"] = triggers
+    rows = benchmark.pedantic(lambda: db.execute(statement).all(), rounds=3 if pagination == "offset" and depth else 20)
+    assert len(rows) == PAGE_SIZE
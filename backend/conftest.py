@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from typing import Optional
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """
+    TestClient for the app (startup workers not started) on one event loop for the whole
+    session, so the async engine's pooled connections stay usable between requests. The
+    micro cache is cleared before every request.
+    """
+    from anyio.from_thread import start_blocking_portal
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.middleware.micro_cache import response_cache
+
+    class UncachedClient(TestClient):
+        def request(self, *args, **kwargs):
+            response_cache.clear()
+            return super().request(*args, **kwargs)
+
+    client = UncachedClient(app)
+    with start_blocking_portal(**client.async_backend) as portal:
+        # What TestClient.__enter__ does, without running the startup events
+        client.portal = portal
+        try:
+            yield client
+        finally:
+            portal.call(_dispose_async_engine)
+            client.portal = None
+
+
+async def _dispose_async_engine():
+    from app.db.database import async_engine
+
+    await async_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def reset_connections(app_client):
+    """
+    Returns a function dropping pooled connections and cached reference rows, for tests
+    that recreate the schema: prepared statements and cached rows of the old tables
+    would fail or go stale.
+    """
+    from app.db.cache import reference_cache
+    from app.db.database import engine
+
+    def reset():
+        engine.dispose()
+        app_client.portal.call(_dispose_async_engine)
+        for table in ("Cameras", "Current_Part", "Part_Information", "Regions"):
+            reference_cache.invalidate(table)
+
+    return reset
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when a block runs more SQL statements than its budget, or (with
+    max_repeats) runs any one statement more often than that, the shape of an N+1:
+
+        def test_latest_images(client, query_budget):
+            with query_budget(3, max_repeats=1):
+                client.get("/api/images/latest")
+
+    Counts every statement of the process while the block runs, so it works through a
+    TestClient, whose requests run in another thread.
+    """
+    from app.db.database import async_engine, engine
+    from app.db.profiler import query_profiler
+
+    query_profiler.install(engine, async_engine.sync_engine)
+
+    @contextmanager
+    def budget(max_statements: int, max_repeats: Optional[int] = None):
+        with query_profiler.capture() as profile:
+            yield profile
+
+        problems = []
+        if profile.count > max_statements:
+            problems.append(f"{profile.count} statements, budget is {max_statements}")
+        if max_repeats is not None:
+            problems.extend(
+                f"{count} x {statement}"
+                for statement, count in profile.repeated(max_repeats + 1).items()
+            )
+        if problems:
+            statements = "\n".join(f"  {count} x {statement}" for statement, count in profile.fingerprints.most_common())
+            pytest.fail("Query budget exceeded: " + "; ".join(problems) + f"\nStatements run:\n{statements}", pytrace=False)
+
+    return budget
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Ford Livonia Porosity HMI backend
+Run from the backend directory: python manage.py <command> --help
+"""
+import argparse
+import sys
+from datetime import datetime
+
+import dotenv
+
+# Load environment variables from .env file
+dotenv.load_dotenv()
+
+
+def export_defects(args):
+    from app.services import export_service
+
+    try:
+        chunks = export_service.stream_defect_export(
+            args.start,
+            args.end,
+            fmt=args.format,
+            compress=args.compress,
+            camera_id=args.camera,
+            disposition=args.disposition
+        )
+    except export_service.ExportError as e:
+        sys.exit(str(e))
+
+    output = args.output or export_service.export_filename(args.format, args.start, args.end, args.compress)
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        written = 0
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+    if output != "-":
+        print(f"Wrote {written} bytes to {output}", file=sys.stderr)
+
+
+def export_training(args):
+    from app.services import training_export_service
+
+    def report(progress):
+        status = progress.as_dict()
+        print(
+            f"{status['done']}/{status['total']} images ({status['percent']}%), "
+            f"{status['failed']} failed, {status['elapsed_seconds']}s",
+            file=sys.stderr
+        )
+
+    progress = training_export_service.export_training_set_to_file(
+        args.output,
+        args.start,
+        args.end,
+        camera_id=args.camera,
+        dispositions=args.disposition,
+        resume=args.resume,
+        on_progress=report
+    )
+    print(f"Wrote {progress.images} images ({progress.labels} with labels, {progress.failed} failed) to {args.output}", file=sys.stderr)
+
+
+def suppress_defects(args):
+    from app.services import suppression_service
+
+    def report(last_id, written):
+        print(f"Processed up to defect {last_id}, {written} suppressed", file=sys.stderr)
+
+    written = suppression_service.suppress_range(start_id=args.after_id, end_id=args.until_id, on_batch=report)
+    print(f"Recorded {written} suppressed defects", file=sys.stderr)
+
+
+def ingest_human_inspect(args):
+    from app.services import ingest_service
+
+    def report(totals):
+        print(f"{totals['files']} files, {totals['rows']} rows loaded, {totals['failed']} failed", file=sys.stderr)
+
+    ingester = ingest_service.build_ingester(args.directory)
+    try:
+        totals = ingester.ingest(on_batch=report)
+    finally:
+        ingester.close()
+    print(f"Ingested {totals['rows']} rows from {totals['files']} files ({totals['failed']} failed)", file=sys.stderr)
+
+
+def correlate_inspections(args):
+    from app.services import correlation_service
+
+    def report(last_id, written):
+        print(f"Linked up to HumanInspect row {last_id}, {written} links", file=sys.stderr)
+
+    written = correlation_service.correlate_range(start_id=args.after_id, end_id=args.until_id, on_batch=report)
+    print(f"Wrote {written} inspection links", file=sys.stderr)
+
+
+def rebuild_job_yield(args):
+    from app.db import crud
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        parts = crud.rebuild_job_yield(db, args.start, args.end)
+    finally:
+        db.close()
+    print(f"Rebuilt job yield from {parts} parts", file=sys.stderr)
+
+
+def build_heatmaps(args):
+    from app.services import heatmap_service
+
+    def report(last_id, processed):
+        print(f"Processed up to defect {last_id}, {processed} defects", file=sys.stderr)
+
+    processed = heatmap_service.build_range(start_id=args.after_id, end_id=args.until_id, on_batch=report)
+    print(f"Added {processed} defects to the heatmaps", file=sys.stderr)
+
+
+def archive_parts(args):
+    from app.services import retention_service
+
+    def report(totals):
+        print(f"{totals['parts']} parts, {totals['images']} images archived", file=sys.stderr)
+
+    if args.before:
+        totals = retention_service.archive_before(args.before, on_batch=report)
+    else:
+        totals = retention_service.run_retention(on_batch=report)
+    print(f"Archived {totals['parts']} parts, removed {totals['evicted']} cached images", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Porosity HMI backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export-defects", help="Stream defects with image, trigger and camera to CSV or Parquet")
+    export.add_argument("--start", type=datetime.fromisoformat, required=True, help="Trigger time range start (ISO 8601, inclusive)")
+    export.add_argument("--end", type=datetime.fromisoformat, required=True, help="Trigger time range end (ISO 8601, exclusive)")
+    export.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    export.add_argument("--compress", action="store_true", help="gzip the CSV, or zstd-compress the Parquet column chunks")
+    export.add_argument("--camera", help="Only this camera serial number")
+    export.add_argument("--disposition", help="Only defects with this disposition")
+    export.add_argument("--output", "-o", help="Output file, '-' for stdout (default: derived from the range)")
+    export.set_defaults(handler=export_defects)
+
+    training = commands.add_parser("export-training", help="Write a YOLO training set (images, labels) to a tar file")
+    training.add_argument("--start", type=datetime.fromisoformat, required=True, help="Trigger time range start (ISO 8601, inclusive)")
+    training.add_argument("--end", type=datetime.fromisoformat, required=True, help="Trigger time range end (ISO 8601, exclusive)")
+    training.add_argument("--camera", help="Only this camera serial number")
+    training.add_argument("--disposition", action="append", help="Only defects with this disposition, one class each (repeatable)")
+    training.add_argument("--output", "-o", required=True, help="Output .tar file")
+    training.add_argument("--resume", action="store_true", help="Continue an interrupted export of the same selection")
+    training.set_defaults(handler=export_training)
+
+    suppress = commands.add_parser("suppress-defects", help="Run repeat-defect suppression over existing defects")
+    suppress.add_argument("--after-id", type=int, default=0, help="Start after this defect id")
+    suppress.add_argument("--until-id", type=int, help="Stop at this defect id (default: latest)")
+    suppress.set_defaults(handler=suppress_defects)
+
+    ingest = commands.add_parser("ingest-human-inspect", help="Load HumanInspect scan files not yet in processed_files")
+    ingest.add_argument("--directory", help="Scan file directory (default: human_inspect_ingest.directory)")
+    ingest.set_defaults(handler=ingest_human_inspect)
+
+    correlate = commands.add_parser("correlate-inspections", help="Link HumanInspect rows to parts and update agreement counters")
+    correlate.add_argument("--after-id", type=int, help="Start after this HumanInspect id (default: the stored watermark)")
+    correlate.add_argument("--until-id", type=int, help="Stop at this HumanInspect id (default: latest)")
+    correlate.set_defaults(handler=correlate_inspections)
+
+    job_yield = commands.add_parser("rebuild-job-yield", help="Rebuild the per-job hourly yield rollup from history")
+    job_yield.add_argument("--start", type=datetime.fromisoformat, help="Trigger time range start (ISO 8601; default: all history)")
+    job_yield.add_argument("--end", type=datetime.fromisoformat, help="Trigger time range end (ISO 8601; default: all history)")
+    job_yield.set_defaults(handler=rebuild_job_yield)
+
+    heatmaps = commands.add_parser("build-heatmaps", help="Add existing defects to the hourly per-camera heatmaps")
+    heatmaps.add_argument("--after-id", type=int, help="Start after this defect id (default: the last one added)")
+    heatmaps.add_argument("--until-id", type=int, help="Stop at this defect id (default: latest)")
+    heatmaps.set_defaults(handler=build_heatmaps)
+
+    archive = commands.add_parser("archive-parts", help="Move old parts to the archive schema and expire old archive months")
+    archive.add_argument("--before", type=datetime.fromisoformat, help="Archive parts triggered before this time (default: retention.hot_days ago, then expire per retention.archive_months)")
+    archive.set_defaults(handler=archive_parts)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.handler(args)
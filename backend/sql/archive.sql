@@ -0,0 +1,249 @@
+--
+-- Hot/archive split for "Triggers", "Images", "Defects", "Suppressed_Defects"
+-- and "Inspection_Links" (app/services/retention_service.py,
+-- `manage.py archive-parts`).
+--
+-- The public tables stay as the vision system writes them and only hold the
+-- last retention.hot_days of parts, so their indexes, statistics and
+-- unbounded queries stop growing with the plant's history. Older parts are
+-- moved, a batch of triggers at a time, into tables in the "archive" schema
+-- that are range partitioned by month of trigger time. Every archive table
+-- carries the trigger time (trigger_timestamp), so reads with a time range
+-- prune to the months they need, and whole months can be detached or dropped
+-- once they pass retention.archive_months.
+--
+-- Moving rows sets porosity.archiving for the transaction. The rollup
+-- triggers of sql/defect_rollup.sql and sql/job_yield_rollup.sql check it
+-- and keep their counters, because the parts still happened. Re-running
+-- those files rebuilds their rollups from the public tables only.
+--
+-- A part's inspection links are moved with it, before its images and
+-- trigger are deleted: their ON DELETE SET NULL would otherwise turn the
+-- links of a scan to several images into duplicate (scan, NULL, region) rows
+-- and fail the delete on "Inspection_Links_unique". The agreement counters
+-- are kept. Apply after sql/inspection_correlation.sql.
+--
+-- Requires PostgreSQL 13+.
+--
+
+CREATE SCHEMA IF NOT EXISTS archive;
+
+--
+-- Name: Triggers; Type: TABLE; Schema: archive; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS archive."Triggers" (
+    LIKE public."Triggers"
+) PARTITION BY RANGE ("timestamp");
+
+ALTER TABLE archive."Triggers" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Archive_Triggers_id_idx" ON archive."Triggers" USING btree (id);
+CREATE INDEX IF NOT EXISTS "Archive_Triggers_timestamp_idx" ON archive."Triggers" USING btree ("timestamp");
+
+--
+-- Name: Images; Type: TABLE; Schema: archive; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS archive."Images" (
+    LIKE public."Images",
+    trigger_timestamp timestamp with time zone NOT NULL
+) PARTITION BY RANGE (trigger_timestamp);
+
+ALTER TABLE archive."Images" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Archive_Images_id_idx" ON archive."Images" USING btree (id);
+CREATE INDEX IF NOT EXISTS "Archive_Images_trigger_idx" ON archive."Images" USING btree (trigger);
+
+--
+-- Name: Defects; Type: TABLE; Schema: archive; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS archive."Defects" (
+    LIKE public."Defects",
+    trigger_timestamp timestamp with time zone NOT NULL
+) PARTITION BY RANGE (trigger_timestamp);
+
+ALTER TABLE archive."Defects" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Archive_Defects_id_idx" ON archive."Defects" USING btree (id);
+CREATE INDEX IF NOT EXISTS "Archive_Defects_image_idx" ON archive."Defects" USING btree (image);
+
+--
+-- Name: Suppressed_Defects; Type: TABLE; Schema: archive; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS archive."Suppressed_Defects" (
+    LIKE public."Suppressed_Defects",
+    trigger_timestamp timestamp with time zone NOT NULL
+) PARTITION BY RANGE (trigger_timestamp);
+
+ALTER TABLE archive."Suppressed_Defects" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Archive_Suppressed_Defects_defect_idx" ON archive."Suppressed_Defects" USING btree (defect);
+
+--
+-- Name: Inspection_Links; Type: TABLE; Schema: archive; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS archive."Inspection_Links" (
+    LIKE public."Inspection_Links",
+    trigger_timestamp timestamp with time zone NOT NULL
+) PARTITION BY RANGE (trigger_timestamp);
+
+ALTER TABLE archive."Inspection_Links" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Archive_Inspection_Links_trigger_idx" ON archive."Inspection_Links" USING btree (trigger);
+CREATE INDEX IF NOT EXISTS "Archive_Inspection_Links_human_inspect_idx" ON archive."Inspection_Links" USING btree (human_inspect);
+
+--
+-- Name: ensure_partitions(timestamp with time zone, timestamp with time zone); Type: FUNCTION; Schema: archive; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION archive.ensure_partitions(
+    p_from timestamp with time zone, p_to timestamp with time zone
+) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_month timestamp with time zone := date_trunc('month', p_from);
+    v_table text;
+BEGIN
+    WHILE v_month <= p_to LOOP
+        FOREACH v_table IN ARRAY ARRAY['Triggers', 'Images', 'Defects', 'Suppressed_Defects', 'Inspection_Links'] LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS archive.%I PARTITION OF archive.%I FOR VALUES FROM (%L) TO (%L)',
+                v_table || '_' || to_char(v_month, 'YYYY_MM'), v_table, v_month, v_month + interval '1 month'
+            );
+        END LOOP;
+        v_month := v_month + interval '1 month';
+    END LOOP;
+END;
+$$;
+
+ALTER FUNCTION archive.ensure_partitions(timestamp with time zone, timestamp with time zone) OWNER TO postgres;
+
+--
+-- Name: archive_parts(timestamp with time zone, integer); Type: FUNCTION; Schema: archive; Owner: postgres
+--
+-- Moves up to p_limit of the oldest triggers before p_cutoff, with their
+-- images, defects, suppressions and inspection links, into the archive. Returns the number of
+-- triggers moved and the image paths, so the caller can drop cached files.
+--
+
+CREATE OR REPLACE FUNCTION archive.archive_parts(
+    p_cutoff timestamp with time zone, p_limit integer
+) RETURNS TABLE (trigger_count integer, image_paths text[])
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_ids bigint[];
+    v_from timestamp with time zone;
+    v_to timestamp with time zone;
+BEGIN
+    SELECT array_agg(id), min("timestamp"), max("timestamp")
+    INTO v_ids, v_from, v_to
+    FROM (
+        SELECT id, "timestamp"
+        FROM public."Triggers"
+        WHERE "timestamp" < p_cutoff
+        ORDER BY "timestamp"
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    ) batch;
+
+    IF v_ids IS NULL THEN
+        RETURN QUERY SELECT 0, ARRAY[]::text[];
+        RETURN;
+    END IF;
+
+    PERFORM archive.ensure_partitions(v_from, v_to);
+    PERFORM set_config('porosity.archiving', 'on', true);
+
+    WITH moved AS (
+        DELETE FROM public."Inspection_Links" l
+        USING public."Triggers" t
+        WHERE l.trigger = t.id AND t.id = ANY (v_ids)
+        RETURNING l.*, t."timestamp"
+    )
+    INSERT INTO archive."Inspection_Links" SELECT * FROM moved;
+
+    WITH moved AS (
+        DELETE FROM public."Suppressed_Defects" s
+        USING public."Defects" d, public."Images" i, public."Triggers" t
+        WHERE s.defect = d.id AND d.image = i.id AND i.trigger = t.id AND t.id = ANY (v_ids)
+        RETURNING s.*, t."timestamp"
+    )
+    INSERT INTO archive."Suppressed_Defects" SELECT * FROM moved;
+
+    WITH moved AS (
+        DELETE FROM public."Defects" d
+        USING public."Images" i, public."Triggers" t
+        WHERE d.image = i.id AND i.trigger = t.id AND t.id = ANY (v_ids)
+        RETURNING d.*, t."timestamp"
+    )
+    INSERT INTO archive."Defects" SELECT * FROM moved;
+
+    RETURN QUERY
+    WITH moved AS (
+        DELETE FROM public."Images" i
+        USING public."Triggers" t
+        WHERE i.trigger = t.id AND t.id = ANY (v_ids)
+        RETURNING i.*, t."timestamp"
+    ), archived AS (
+        INSERT INTO archive."Images" SELECT * FROM moved
+    )
+    SELECT cardinality(v_ids), coalesce(array_agg(moved.image) FILTER (WHERE moved.image IS NOT NULL), ARRAY[]::text[])
+    FROM moved;
+
+    WITH moved AS (
+        DELETE FROM public."Triggers" t
+        WHERE t.id = ANY (v_ids)
+        RETURNING t.*
+    )
+    INSERT INTO archive."Triggers" SELECT * FROM moved;
+
+    PERFORM set_config('porosity.archiving', 'off', true);
+END;
+$$;
+
+ALTER FUNCTION archive.archive_parts(timestamp with time zone, integer) OWNER TO postgres;
+
+--
+-- Name: drop_partitions(timestamp with time zone, boolean); Type: FUNCTION; Schema: archive; Owner: postgres
+--
+-- Detaches the archive months that end on or before p_before, and drops them
+-- unless p_detach_only (detached tables stay in the archive schema for pg_dump).
+-- Returns the partitions handled.
+--
+
+CREATE OR REPLACE FUNCTION archive.drop_partitions(
+    p_before timestamp with time zone, p_detach_only boolean
+) RETURNS SETOF text
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_parent text;
+    v_child text;
+BEGIN
+    FOR v_parent, v_child IN
+        SELECT parent.relname, child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'archive'
+          AND child.relname ~ '_[0-9]{4}_[0-9]{2}$'
+          AND to_date(right(child.relname, 7), 'YYYY_MM') + interval '1 month' <= p_before
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE archive.%I DETACH PARTITION archive.%I', v_parent, v_child);
+        IF NOT p_detach_only THEN
+            EXECUTE format('DROP TABLE archive.%I', v_child);
+        END IF;
+        RETURN NEXT v_child;
+    END LOOP;
+END;
+$$;
+
+ALTER FUNCTION archive.drop_partitions(timestamp with time zone, boolean) OWNER TO postgres;
@@ -0,0 +1,39 @@
+--
+-- Hourly defect-location histograms behind /api/cameras/{serial}/heatmap
+-- (app/services/heatmap_service.py).
+--
+-- One row per (camera, trigger hour, grid size) holds a grid_size x grid_size
+-- histogram of defect centers in normalized image coordinates, stored as a
+-- zlib-compressed .npy. The heatmap worker adds new defects after the highest
+-- last_defect_id, so a window of N hours is answered by summing N small
+-- arrays instead of scanning "Defects". Changing heatmap.grid_size starts a
+-- new set of rows; `manage.py build-heatmaps` fills them from history.
+-- Writers take an advisory lock per grid size (crud.lock_heatmaps) from
+-- reading the watermark to their commit, so the two never count a defect twice.
+--
+
+--
+-- Name: Defect_Heatmap_Hourly; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Defect_Heatmap_Hourly" (
+    id bigserial PRIMARY KEY,
+    camera text NOT NULL,
+    hour timestamp with time zone NOT NULL,
+    grid_size integer NOT NULL,
+    histogram bytea NOT NULL,
+    defect_count integer NOT NULL DEFAULT 0,
+    last_defect_id integer NOT NULL,
+    CONSTRAINT "Defect_Heatmap_Hourly_bucket_unique" UNIQUE (camera, hour, grid_size)
+);
+
+ALTER TABLE public."Defect_Heatmap_Hourly" OWNER TO postgres;
+
+--
+-- Name: Defect_Heatmap_Hourly_grid_last_defect_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+-- The worker's resume point is max(last_defect_id) for the configured grid.
+--
+
+CREATE INDEX IF NOT EXISTS "Defect_Heatmap_Hourly_grid_last_defect_idx"
+    ON public."Defect_Heatmap_Hourly" USING btree (grid_size, last_defect_id DESC);
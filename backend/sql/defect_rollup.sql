@@ -0,0 +1,127 @@
+--
+-- Hourly defect rollup behind /api/defects/statistics/summary.
+--
+-- "Defect_Rollup_Hourly" holds one counter per (trigger hour, camera, type,
+-- disposition). Row triggers on "Defects" move counters as defects are
+-- inserted, re-dispositioned or deleted, so statistics for any window are a
+-- sum over at most (hours x cameras x types x dispositions) rows no matter how
+-- large "Defects" grows. Defects whose image has no trigger timestamp are not
+-- counted.
+--
+-- Requires PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT).
+--
+
+--
+-- Name: Defect_Rollup_Hourly; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Defect_Rollup_Hourly" (
+    id bigserial PRIMARY KEY,
+    hour timestamp with time zone NOT NULL,
+    camera text,
+    type text,
+    disposition text,
+    defect_count integer NOT NULL DEFAULT 0,
+    CONSTRAINT "Defect_Rollup_Hourly_bucket_unique"
+        UNIQUE NULLS NOT DISTINCT (hour, camera, type, disposition)
+);
+
+ALTER TABLE public."Defect_Rollup_Hourly" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Defect_Rollup_Hourly_hour_idx"
+    ON public."Defect_Rollup_Hourly" USING btree (hour);
+
+--
+-- Name: defect_rollup_apply(bigint, text, text, integer); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.defect_rollup_apply(
+    p_image bigint, p_type text, p_disposition text, p_delta integer
+) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_hour timestamp with time zone;
+    v_camera text;
+BEGIN
+    SELECT date_trunc('hour', t."timestamp"), i.camera
+    INTO v_hour, v_camera
+    FROM public."Images" i
+    JOIN public."Triggers" t ON t.id = i.trigger
+    WHERE i.id = p_image;
+
+    IF v_hour IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public."Defect_Rollup_Hourly" AS r (hour, camera, type, disposition, defect_count)
+    VALUES (v_hour, v_camera, p_type, p_disposition, p_delta)
+    ON CONFLICT (hour, camera, type, disposition)
+    DO UPDATE SET defect_count = r.defect_count + EXCLUDED.defect_count;
+END;
+$$;
+
+ALTER FUNCTION public.defect_rollup_apply(bigint, text, text, integer) OWNER TO postgres;
+
+--
+-- Name: defect_rollup_trigger(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.defect_rollup_trigger() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    -- Parts moved to the archive (sql/archive.sql) still count
+    IF current_setting('porosity.archiving', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.defect_rollup_apply(OLD.image, OLD.type, OLD.disposition, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.defect_rollup_apply(NEW.image, NEW.type, NEW.disposition, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+ALTER FUNCTION public.defect_rollup_trigger() OWNER TO postgres;
+
+--
+-- Name: Defects defects_rollup; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS defects_rollup ON public."Defects";
+CREATE TRIGGER defects_rollup
+    AFTER INSERT OR DELETE ON public."Defects"
+    FOR EACH ROW EXECUTE FUNCTION public.defect_rollup_trigger();
+
+--
+-- Name: Defects defects_rollup_update; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS defects_rollup_update ON public."Defects";
+CREATE TRIGGER defects_rollup_update
+    AFTER UPDATE OF image, type, disposition ON public."Defects"
+    FOR EACH ROW
+    WHEN (OLD.image IS DISTINCT FROM NEW.image
+          OR OLD.type IS DISTINCT FROM NEW.type
+          OR OLD.disposition IS DISTINCT FROM NEW.disposition)
+    EXECUTE FUNCTION public.defect_rollup_trigger();
+
+--
+-- Backfill from history. Holds a SHARE lock on "Defects" for the duration so
+-- no insert slips between the snapshot and the triggers taking over.
+--
+
+BEGIN;
+LOCK TABLE public."Defects" IN SHARE MODE;
+TRUNCATE public."Defect_Rollup_Hourly";
+INSERT INTO public."Defect_Rollup_Hourly" (hour, camera, type, disposition, defect_count)
+SELECT date_trunc('hour', t."timestamp"), i.camera, d.type, d.disposition, count(*)
+FROM public."Defects" d
+JOIN public."Images" i ON i.id = d.image
+JOIN public."Triggers" t ON t.id = i.trigger
+WHERE t."timestamp" IS NOT NULL
+GROUP BY 1, 2, 3, 4;
+COMMIT;
@@ -0,0 +1,88 @@
+--
+-- Machine vs. human inspection correlation (app/services/correlation_service.py).
+--
+-- "Inspection_Links" matches every "HumanInspect" row to the trigger of its
+-- part (part_instance starting with the serial number, nearest in time) and
+-- holds one row per image and per active region of the image's camera.
+-- Unmatched scans get a single row with NULL trigger/image/camera.
+--
+-- "Inspection_Agreement_Daily" holds the confusion counters per scan day,
+-- camera and region. The correlation job inserts links with ON CONFLICT DO
+-- NOTHING and adds only the links it actually inserted to the counters, in the
+-- same transaction, so counters stay exact when a batch is retried and the
+-- summary endpoint never rescans the links.
+--
+-- "Correlation_Watermark" holds the last HumanInspect id the job has passed,
+-- advanced in the same transaction as the links. Archiving links can't move it
+-- back (as it would a max() over the links); scans committed out of id order
+-- are found by the worker's re-scan of the ids just below it that have no link.
+--
+-- Candidate parts are read by trigger time range, which uses
+-- "Triggers_timestamp_id_desc_idx" from sql/trigger_history_indexes.sql.
+--
+-- Requires PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT).
+--
+
+--
+-- Name: Inspection_Links; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Inspection_Links" (
+    id bigserial PRIMARY KEY,
+    human_inspect integer NOT NULL REFERENCES public."HumanInspect"(id) ON DELETE CASCADE,
+    trigger integer REFERENCES public."Triggers"(id) ON DELETE SET NULL,
+    image integer REFERENCES public."Images"(id) ON DELETE SET NULL,
+    camera text,
+    region integer REFERENCES public."Regions"(id) ON DELETE SET NULL,
+    scanned_at timestamp without time zone,
+    human_fail boolean,
+    machine_fail boolean,
+    machine_defects integer,
+    linked_at timestamp with time zone,
+    CONSTRAINT "Inspection_Links_unique"
+        UNIQUE NULLS NOT DISTINCT (human_inspect, image, region)
+);
+
+ALTER TABLE public."Inspection_Links" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Inspection_Links_trigger_idx"
+    ON public."Inspection_Links" USING btree (trigger);
+
+--
+-- Name: Inspection_Agreement_Daily; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Inspection_Agreement_Daily" (
+    id bigserial PRIMARY KEY,
+    day date,
+    camera text,
+    region integer,
+    both_fail integer NOT NULL DEFAULT 0,
+    machine_only integer NOT NULL DEFAULT 0,
+    human_only integer NOT NULL DEFAULT 0,
+    both_pass integer NOT NULL DEFAULT 0,
+    unmatched integer NOT NULL DEFAULT 0,
+    CONSTRAINT "Inspection_Agreement_Daily_bucket_unique"
+        UNIQUE NULLS NOT DISTINCT (day, camera, region)
+);
+
+ALTER TABLE public."Inspection_Agreement_Daily" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Inspection_Agreement_Daily_day_idx"
+    ON public."Inspection_Agreement_Daily" USING btree (day);
+
+--
+-- Name: Correlation_Watermark; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Correlation_Watermark" (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_human_inspect_id bigint NOT NULL
+);
+
+ALTER TABLE public."Correlation_Watermark" OWNER TO postgres;
+
+-- Databases correlated before the table existed continue after their last link
+INSERT INTO public."Correlation_Watermark" (id, last_human_inspect_id)
+SELECT 1, coalesce(max(human_inspect), 0) FROM public."Inspection_Links"
+ON CONFLICT (id) DO NOTHING;
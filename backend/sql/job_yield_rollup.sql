@@ -0,0 +1,441 @@
+--
+-- Per-job yield rollup behind /api/jobs (app/api/endpoints/jobs.py).
+--
+-- A part (trigger) belongs to the "Outflow" job running at its timestamp
+-- (job_start <= timestamp < job_end, job_end NULL while running). Parts outside
+-- any job are counted under a NULL job.
+--
+-- "Part_Yield" keeps one narrow row per part with its defect and scrap counts,
+-- so row triggers can tell when a part becomes flagged (first defect) or
+-- scrapped (first 'Scrap' disposition) no matter how many defects one
+-- statement inserts. "Job_Yield_Hourly" holds the counters per (job, hour):
+-- parts, flagged parts, scrap parts and scrap defects. Yield for a job is a sum
+-- over its hours, independent of how many parts it ran.
+--
+-- Changing an "Outflow" row re-keys only the parts whose job it can change
+-- (between the old and new job_end when only the end moved, else the old and
+-- new windows): their counters move from the old job's buckets to the new
+-- one's with additive upserts, so defect writers updating the same parts and
+-- buckets are never overwritten. Outflow changes and rebuilds take the
+-- exclusive "job_yield" advisory lock, part inserts its shared form, so a part
+-- is never keyed against a job window that is being changed.
+-- job_yield_rebuild() also backs `manage.py rebuild-job-yield`; callers take
+-- the advisory lock before the SHARE table locks (see the backfill below).
+--
+-- Outflow times are naive plant-local times while trigger times are
+-- timestamptz. They are converted explicitly in the zone named by the
+-- porosity.plant_timezone setting, the session time zone when unset:
+--
+--     ALTER DATABASE "Porosity_System" SET porosity.plant_timezone = 'America/Detroit';
+--
+-- Requires PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT).
+--
+
+--
+-- Name: Part_Yield; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Part_Yield" (
+    trigger integer PRIMARY KEY,
+    job_num integer,
+    hour timestamp with time zone NOT NULL,
+    defects integer NOT NULL DEFAULT 0,
+    scrap_defects integer NOT NULL DEFAULT 0,
+    "timestamp" timestamp with time zone
+);
+
+ALTER TABLE public."Part_Yield" OWNER TO postgres;
+
+-- Installations from before "timestamp" was kept; the backfill below fills it
+ALTER TABLE public."Part_Yield" ADD COLUMN IF NOT EXISTS "timestamp" timestamp with time zone;
+
+CREATE INDEX IF NOT EXISTS "Part_Yield_hour_idx"
+    ON public."Part_Yield" USING btree (hour);
+
+--
+-- Name: Job_Yield_Hourly; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE IF NOT EXISTS public."Job_Yield_Hourly" (
+    id bigserial PRIMARY KEY,
+    job_num integer,
+    hour timestamp with time zone NOT NULL,
+    parts integer NOT NULL DEFAULT 0,
+    flagged_parts integer NOT NULL DEFAULT 0,
+    scrap_parts integer NOT NULL DEFAULT 0,
+    scrap_defects integer NOT NULL DEFAULT 0,
+    CONSTRAINT "Job_Yield_Hourly_bucket_unique"
+        UNIQUE NULLS NOT DISTINCT (job_num, hour)
+);
+
+ALTER TABLE public."Job_Yield_Hourly" OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS "Job_Yield_Hourly_hour_idx"
+    ON public."Job_Yield_Hourly" USING btree (hour);
+
+--
+-- Name: Outflow_job_start_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX IF NOT EXISTS "Outflow_job_start_idx"
+    ON public."Outflow" USING btree (job_start DESC);
+
+CREATE INDEX IF NOT EXISTS "Outflow_job_num_idx"
+    ON public."Outflow" USING btree (job_num);
+
+--
+-- Name: plant_timezone(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.plant_timezone() RETURNS text
+    LANGUAGE sql STABLE
+    AS $$
+    SELECT coalesce(nullif(current_setting('porosity.plant_timezone', true), ''), current_setting('TimeZone'))
+$$;
+
+ALTER FUNCTION public.plant_timezone() OWNER TO postgres;
+
+--
+-- Name: job_yield_job_at(timestamp with time zone); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_job_at(p_at timestamp with time zone) RETURNS integer
+    LANGUAGE sql STABLE
+    AS $$
+    -- Compared as plant-local times, so "Outflow_job_start_idx" still serves the lookup
+    SELECT o.job_num
+    FROM public."Outflow" o
+    WHERE o.job_start <= (p_at AT TIME ZONE public.plant_timezone())
+      AND (o.job_end IS NULL OR (p_at AT TIME ZONE public.plant_timezone()) < o.job_end)
+    ORDER BY o.job_start DESC
+    LIMIT 1
+$$;
+
+ALTER FUNCTION public.job_yield_job_at(timestamp with time zone) OWNER TO postgres;
+
+--
+-- Name: job_yield_add(integer, timestamp with time zone, integer, integer, integer, integer); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_add(
+    p_job integer, p_hour timestamp with time zone,
+    p_parts integer, p_flagged integer, p_scrap_parts integer, p_scrap_defects integer
+) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF p_parts = 0 AND p_flagged = 0 AND p_scrap_parts = 0 AND p_scrap_defects = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public."Job_Yield_Hourly" AS r (job_num, hour, parts, flagged_parts, scrap_parts, scrap_defects)
+    VALUES (p_job, p_hour, p_parts, p_flagged, p_scrap_parts, p_scrap_defects)
+    ON CONFLICT (job_num, hour)
+    DO UPDATE SET parts = r.parts + EXCLUDED.parts,
+                  flagged_parts = r.flagged_parts + EXCLUDED.flagged_parts,
+                  scrap_parts = r.scrap_parts + EXCLUDED.scrap_parts,
+                  scrap_defects = r.scrap_defects + EXCLUDED.scrap_defects;
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_add(integer, timestamp with time zone, integer, integer, integer, integer) OWNER TO postgres;
+
+--
+-- Name: job_yield_defect_apply(bigint, text, integer); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_defect_apply(
+    p_image bigint, p_disposition text, p_delta integer
+) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_scrap integer := CASE WHEN p_disposition = 'Scrap' THEN p_delta ELSE 0 END;
+    v_part public."Part_Yield"%ROWTYPE;
+BEGIN
+    UPDATE public."Part_Yield" p
+    SET defects = p.defects + p_delta,
+        scrap_defects = p.scrap_defects + v_scrap
+    FROM public."Images" i
+    WHERE i.id = p_image AND p.trigger = i.trigger
+    RETURNING p.* INTO v_part;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    -- A part is flagged/scrapped while its count is above zero; count the crossings
+    PERFORM public.job_yield_add(
+        v_part.job_num, v_part.hour, 0,
+        CASE WHEN p_delta > 0 AND v_part.defects = p_delta THEN 1
+             WHEN p_delta < 0 AND v_part.defects = 0 THEN -1 ELSE 0 END,
+        CASE WHEN v_scrap > 0 AND v_part.scrap_defects = v_scrap THEN 1
+             WHEN v_scrap < 0 AND v_part.scrap_defects = 0 THEN -1 ELSE 0 END,
+        v_scrap
+    );
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_defect_apply(bigint, text, integer) OWNER TO postgres;
+
+--
+-- Name: job_yield_defect_trigger(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_defect_trigger() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    -- Parts moved to the archive (sql/archive.sql) still count
+    IF current_setting('porosity.archiving', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.job_yield_defect_apply(OLD.image, OLD.disposition, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.job_yield_defect_apply(NEW.image, NEW.disposition, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_defect_trigger() OWNER TO postgres;
+
+--
+-- Name: job_yield_part_trigger(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_part_trigger() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_job integer;
+    v_hour timestamp with time zone;
+BEGIN
+    IF NEW."timestamp" IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- Waits while an Outflow change re-keys parts, and holds it off until this part commits
+    PERFORM pg_advisory_xact_lock_shared(hashtext('job_yield'));
+    v_job := public.job_yield_job_at(NEW."timestamp");
+    v_hour := date_trunc('hour', NEW."timestamp");
+
+    INSERT INTO public."Part_Yield" (trigger, job_num, hour, "timestamp")
+    VALUES (NEW.id, v_job, v_hour, NEW."timestamp")
+    ON CONFLICT (trigger) DO NOTHING;
+
+    IF FOUND THEN
+        PERFORM public.job_yield_add(v_job, v_hour, 1, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_part_trigger() OWNER TO postgres;
+
+--
+-- Name: job_yield_rebuild(timestamp with time zone, timestamp with time zone); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_rebuild(
+    p_start timestamp with time zone, p_end timestamp with time zone
+) RETURNS integer
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    -- Whole hours, so every bucket touched is rebuilt completely; NULL means unbounded
+    v_start timestamp with time zone := coalesce(date_trunc('hour', p_start), '-infinity');
+    v_end timestamp with time zone := coalesce(date_trunc('hour', p_end) + interval '1 hour', 'infinity');
+    v_parts integer;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('job_yield'));
+
+    DELETE FROM public."Part_Yield" WHERE hour >= v_start AND hour < v_end;
+
+    INSERT INTO public."Part_Yield" (trigger, job_num, hour, defects, scrap_defects, "timestamp")
+    SELECT t.id,
+           public.job_yield_job_at(t."timestamp"),
+           date_trunc('hour', t."timestamp"),
+           count(d.id),
+           count(d.id) FILTER (WHERE d.disposition = 'Scrap'),
+           t."timestamp"
+    FROM public."Triggers" t
+    LEFT JOIN public."Images" i ON i.trigger = t.id
+    LEFT JOIN public."Defects" d ON d.image = i.id
+    WHERE t."timestamp" >= v_start AND t."timestamp" < v_end
+    GROUP BY t.id;
+    GET DIAGNOSTICS v_parts = ROW_COUNT;
+
+    DELETE FROM public."Job_Yield_Hourly" WHERE hour >= v_start AND hour < v_end;
+
+    INSERT INTO public."Job_Yield_Hourly" (job_num, hour, parts, flagged_parts, scrap_parts, scrap_defects)
+    SELECT job_num,
+           hour,
+           count(*),
+           count(*) FILTER (WHERE defects > 0),
+           count(*) FILTER (WHERE scrap_defects > 0),
+           sum(scrap_defects)
+    FROM public."Part_Yield"
+    WHERE hour >= v_start AND hour < v_end
+    GROUP BY job_num, hour;
+
+    RETURN v_parts;
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_rebuild(timestamp with time zone, timestamp with time zone) OWNER TO postgres;
+
+--
+-- Name: job_yield_rekey(timestamp with time zone, timestamp with time zone); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_rekey(
+    p_start timestamp with time zone, p_end timestamp with time zone
+) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    -- Parts in [p_start, p_end) whose job changed move, with their counters, to
+    -- the new job's buckets. RETURNING reads each part row as locked, so defects
+    -- committed meanwhile move with it.
+    WITH candidates AS (
+        SELECT p.trigger, p.job_num AS old_job, public.job_yield_job_at(p."timestamp") AS new_job
+        FROM public."Part_Yield" p
+        WHERE p.hour >= date_trunc('hour', p_start) AND p.hour < p_end
+          AND p."timestamp" >= p_start AND p."timestamp" < p_end
+    ), moved AS (
+        UPDATE public."Part_Yield" p
+        SET job_num = c.new_job
+        FROM candidates c
+        WHERE p.trigger = c.trigger AND c.old_job IS DISTINCT FROM c.new_job
+        RETURNING c.old_job, c.new_job, p.hour, p.defects, p.scrap_defects
+    ), deltas AS (
+        SELECT old_job AS job_num, hour, -1 AS sign, defects, scrap_defects FROM moved
+        UNION ALL
+        SELECT new_job, hour, 1, defects, scrap_defects FROM moved
+    )
+    INSERT INTO public."Job_Yield_Hourly" AS r (job_num, hour, parts, flagged_parts, scrap_parts, scrap_defects)
+    SELECT job_num,
+           hour,
+           sum(sign),
+           coalesce(sum(sign) FILTER (WHERE defects > 0), 0),
+           coalesce(sum(sign) FILTER (WHERE scrap_defects > 0), 0),
+           sum(sign * scrap_defects)
+    FROM deltas
+    GROUP BY job_num, hour
+    ON CONFLICT (job_num, hour)
+    DO UPDATE SET parts = r.parts + EXCLUDED.parts,
+                  flagged_parts = r.flagged_parts + EXCLUDED.flagged_parts,
+                  scrap_parts = r.scrap_parts + EXCLUDED.scrap_parts,
+                  scrap_defects = r.scrap_defects + EXCLUDED.scrap_defects;
+
+    -- Buckets a job no longer has any part in
+    DELETE FROM public."Job_Yield_Hourly"
+    WHERE hour >= date_trunc('hour', p_start) AND hour < p_end
+      AND parts = 0 AND flagged_parts = 0 AND scrap_parts = 0 AND scrap_defects = 0;
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_rekey(timestamp with time zone, timestamp with time zone) OWNER TO postgres;
+
+--
+-- Name: job_yield_outflow_trigger(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.job_yield_outflow_trigger() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    v_zone text := public.plant_timezone();
+    -- Job windows as timestamptz; a running job (job_end NULL) is open ended
+    v_old_start timestamp with time zone;
+    v_old_end timestamp with time zone;
+    v_new_start timestamp with time zone;
+    v_new_end timestamp with time zone;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('job_yield'));
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.job_start IS NOT NULL THEN
+        v_old_start := OLD.job_start AT TIME ZONE v_zone;
+        v_old_end := coalesce(OLD.job_end AT TIME ZONE v_zone, 'infinity');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.job_start IS NOT NULL THEN
+        v_new_start := NEW.job_start AT TIME ZONE v_zone;
+        v_new_end := coalesce(NEW.job_end AT TIME ZONE v_zone, 'infinity');
+    END IF;
+
+    IF TG_OP = 'UPDATE' AND OLD.job_num IS NOT DISTINCT FROM NEW.job_num
+            AND v_old_start IS NOT NULL AND v_old_start = v_new_start THEN
+        -- Only the end moved (a job being closed): just the parts between the two ends change job
+        IF v_old_end <> v_new_end THEN
+            PERFORM public.job_yield_rekey(least(v_old_end, v_new_end), greatest(v_old_end, v_new_end));
+        END IF;
+    ELSIF v_old_start IS NOT NULL AND v_new_start IS NOT NULL
+            AND v_old_start < v_new_end AND v_new_start < v_old_end THEN
+        PERFORM public.job_yield_rekey(least(v_old_start, v_new_start), greatest(v_old_end, v_new_end));
+    ELSE
+        IF v_old_start IS NOT NULL THEN
+            PERFORM public.job_yield_rekey(v_old_start, v_old_end);
+        END IF;
+        IF v_new_start IS NOT NULL THEN
+            PERFORM public.job_yield_rekey(v_new_start, v_new_end);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+ALTER FUNCTION public.job_yield_outflow_trigger() OWNER TO postgres;
+
+--
+-- Name: Triggers job_yield_parts; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS job_yield_parts ON public."Triggers";
+CREATE TRIGGER job_yield_parts
+    AFTER INSERT ON public."Triggers"
+    FOR EACH ROW EXECUTE FUNCTION public.job_yield_part_trigger();
+
+--
+-- Name: Defects job_yield_defects; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS job_yield_defects ON public."Defects";
+CREATE TRIGGER job_yield_defects
+    AFTER INSERT OR DELETE ON public."Defects"
+    FOR EACH ROW EXECUTE FUNCTION public.job_yield_defect_trigger();
+
+--
+-- Name: Defects job_yield_defects_update; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS job_yield_defects_update ON public."Defects";
+CREATE TRIGGER job_yield_defects_update
+    AFTER UPDATE OF image, disposition ON public."Defects"
+    FOR EACH ROW
+    WHEN (OLD.image IS DISTINCT FROM NEW.image
+          OR OLD.disposition IS DISTINCT FROM NEW.disposition)
+    EXECUTE FUNCTION public.job_yield_defect_trigger();
+
+--
+-- Name: Outflow job_yield_jobs; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS job_yield_jobs ON public."Outflow";
+CREATE TRIGGER job_yield_jobs
+    AFTER INSERT OR DELETE OR UPDATE OF job_num, job_start, job_end ON public."Outflow"
+    FOR EACH ROW EXECUTE FUNCTION public.job_yield_outflow_trigger();
+
+--
+-- Backfill from history. Holds SHARE locks so no part or defect slips between
+-- the snapshot and the triggers taking over. For large histories, build range
+-- by range with `manage.py rebuild-job-yield --start ... --end ...` instead.
+--
+
+BEGIN;
+SELECT pg_advisory_xact_lock(hashtext('job_yield'));
+LOCK TABLE public."Triggers", public."Images", public."Defects" IN SHARE MODE;
+SELECT public.job_yield_rebuild(NULL, NULL);
+COMMIT;
@@ -0,0 +1,26 @@
+--
+-- Indexes backing the latest-image-per-camera lookups in app/db/crud.py.
+--
+-- The latest image of a camera is found with one backward index probe on
+-- ("camera", id DESC) per camera, so the cost of /api/images/latest and
+-- /api/cameras/snapshot depends on the number of cameras, not on how many
+-- rows "Images" has accumulated. The "Defects" index turns the defect count
+-- of those images into index lookups as well.
+--
+-- CONCURRENTLY avoids blocking the vision system's inserts while building;
+-- run this file outside a transaction block (psql -f works).
+--
+
+--
+-- Name: Images_camera_id_desc_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Images_camera_id_desc_idx"
+    ON public."Images" USING btree (camera, id DESC);
+
+--
+-- Name: Defects_image_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Defects_image_idx"
+    ON public."Defects" USING btree (image);
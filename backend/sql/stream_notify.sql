@@ -0,0 +1,121 @@
+--
+-- Change notifications for /api/stream (app/services/event_service.py).
+--
+-- Every inserted image, and every defect inserted for an image, sends a
+-- NOTIFY on the "porosity_events" channel with the image, trigger and camera
+-- it belongs to. Notifications are delivered when the inserting transaction
+-- commits, and identical payloads within one transaction are collapsed by
+-- Postgres, so a part with many defects produces one notification per image.
+-- The channel name must match stream.channel in config/config.yaml. Writes to
+-- the cached reference tables are announced on a second channel (below).
+--
+
+--
+-- Name: notify_image_change(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+
+CREATE OR REPLACE FUNCTION public.notify_image_change() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    payload json;
+BEGIN
+    IF TG_TABLE_NAME = 'Images' THEN
+        payload := json_build_object(
+            'image_id', NEW.id,
+            'trigger_id', NEW.trigger,
+            'camera', NEW.camera
+        );
+    ELSE
+        SELECT json_build_object(
+            'image_id', i.id,
+            'trigger_id', i.trigger,
+            'camera', i.camera
+        )
+        INTO payload
+        FROM public."Images" i
+        WHERE i.id = NEW.image;
+    END IF;
+
+    IF payload IS NOT NULL THEN
+        PERFORM pg_notify('porosity_events', payload::text);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+ALTER FUNCTION public.notify_image_change() OWNER TO postgres;
+
+--
+-- Name: Images images_notify; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS images_notify ON public."Images";
+CREATE TRIGGER images_notify
+    AFTER INSERT ON public."Images"
+    FOR EACH ROW EXECUTE FUNCTION public.notify_image_change();
+
+--
+-- Name: Defects defects_notify; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS defects_notify ON public."Defects";
+CREATE TRIGGER defects_notify
+    AFTER INSERT ON public."Defects"
+    FOR EACH ROW EXECUTE FUNCTION public.notify_image_change();
+
+--
+-- Name: notify_reference_change(); Type: FUNCTION; Schema: public; Owner: postgres
+--
+-- Writes to the reference tables the backend caches (app/db/cache.py) send
+-- the table name on the "porosity_reference" channel, once per statement, so
+-- every API process drops its cached rows for that table; the channel name
+-- must match stream.reference_channel.
+--
+
+CREATE OR REPLACE FUNCTION public.notify_reference_change() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    PERFORM pg_notify('porosity_reference', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
+
+ALTER FUNCTION public.notify_reference_change() OWNER TO postgres;
+
+--
+-- Name: Cameras cameras_reference_notify; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS cameras_reference_notify ON public."Cameras";
+CREATE TRIGGER cameras_reference_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public."Cameras"
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_reference_change();
+
+--
+-- Name: Part_Information part_information_reference_notify; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS part_information_reference_notify ON public."Part_Information";
+CREATE TRIGGER part_information_reference_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public."Part_Information"
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_reference_change();
+
+--
+-- Name: Regions regions_reference_notify; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS regions_reference_notify ON public."Regions";
+CREATE TRIGGER regions_reference_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public."Regions"
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_reference_change();
+
+--
+-- Name: Current_Part current_part_reference_notify; Type: TRIGGER; Schema: public; Owner: postgres
+--
+
+DROP TRIGGER IF EXISTS current_part_reference_notify ON public."Current_Part";
+CREATE TRIGGER current_part_reference_notify
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public."Current_Part"
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_reference_change();
@@ -0,0 +1,49 @@
+--
+-- Objects backing repeat-defect suppression (app/services/suppression_service.py).
+--
+-- Suppressed_Defects is checked per defect before writing, so re-running a
+-- backfill over the same range doesn't record a suppression twice. The dump
+-- gives its id no default; the worker inserts without one.
+--
+-- CONCURRENTLY avoids blocking the vision system's inserts while building;
+-- run this file outside a transaction block (psql -f works). Statements must
+-- stay free of semicolons other than their terminators.
+--
+
+--
+-- Name: Suppressed_Defects_id_seq; Type: SEQUENCE; Schema: public; Owner: postgres
+--
+
+CREATE SEQUENCE IF NOT EXISTS public."Suppressed_Defects_id_seq"
+    OWNED BY public."Suppressed_Defects".id;
+
+ALTER SEQUENCE public."Suppressed_Defects_id_seq" OWNER TO postgres;
+
+SELECT setval('public."Suppressed_Defects_id_seq"', coalesce(max(id), 0) + 1, false)
+    FROM public."Suppressed_Defects";
+
+ALTER TABLE public."Suppressed_Defects"
+    ALTER COLUMN id SET DEFAULT nextval('public."Suppressed_Defects_id_seq"'::regclass);
+
+--
+-- Name: Suppression_Watermark; Type: TABLE; Schema: public; Owner: postgres
+--
+-- The last defect id the suppression worker has processed (one row), advanced
+-- in the transaction that writes the suppressions, so a restart resumes there
+-- instead of at the head and defects that arrived while it was down are
+-- still checked.
+--
+
+CREATE TABLE IF NOT EXISTS public."Suppression_Watermark" (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_defect_id bigint NOT NULL
+);
+
+ALTER TABLE public."Suppression_Watermark" OWNER TO postgres;
+
+--
+-- Name: Suppressed_Defects_defect_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Suppressed_Defects_defect_idx"
+    ON public."Suppressed_Defects" USING btree (defect);
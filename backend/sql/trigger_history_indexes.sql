@@ -0,0 +1,35 @@
+--
+-- Indexes backing the keyset paginated trigger history in app/db/crud.py
+-- (GET /api/triggers).
+--
+-- Pages are read with a row comparison on ("timestamp", id) below the last row
+-- of the previous page, which is one index range scan on
+-- ("timestamp" DESC, id DESC) however far back the page is. Filtering by part
+-- uses its own index so a rare part doesn't walk the whole history. The
+-- "Images" ("trigger") index serves the per-trigger image lookups, counts and
+-- the camera/defect EXISTS filters.
+--
+-- CONCURRENTLY avoids blocking the vision system's inserts while building;
+-- run this file outside a transaction block (psql -f works).
+--
+
+--
+-- Name: Triggers_timestamp_id_desc_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Triggers_timestamp_id_desc_idx"
+    ON public."Triggers" USING btree ("timestamp" DESC, id DESC);
+
+--
+-- Name: Triggers_part_timestamp_id_desc_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Triggers_part_timestamp_id_desc_idx"
+    ON public."Triggers" USING btree (part, "timestamp" DESC, id DESC);
+
+--
+-- Name: Images_trigger_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "Images_trigger_idx"
+    ON public."Images" USING btree ("trigger");
@@ -0,0 +1,63 @@
+"""
+Tests that need PostgreSQL run against $TEST_DATABASE_URL, which the backend also uses
+(as DATABASE_URL) for the whole session; without it they are skipped. Every `seed` drops
+and recreates that database's schema, so never point it at plant data.
+
+Run them apart from the benchmarks (`pytest tests`, then `pytest benchmarks`), which
+use their own database.
+"""
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # Must be set before app.db.database is first imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return TEST_DATABASE_URL
+
+
+@pytest.fixture
+def seed(database_url, reset_connections):
+    """
+    Returns a function recreating the database with generated data; its keyword arguments
+    are generate_data.Scale fields (20 triggers of 5 cameras by default).
+    """
+    from sqlalchemy.orm import close_all_sessions
+
+    from app.db.cache import reference_cache
+    from benchmarks.generate_data import Scale, generate
+
+    def seed(**fields):
+        scale = Scale(**{"triggers": 20, **fields})
+        # Open transactions (e.g. the db fixture's) would block dropping the schema
+        close_all_sessions()
+        generate(database_url, scale)
+        reset_connections()
+        # Loaded before sql/stream_notify.sql, so no reference notifications were sent
+        reference_cache.invalidate_all()
+        return scale
+
+    return seed
+
+
+@pytest.fixture
+def client(database_url, app_client):
+    return app_client
+
+
+@pytest.fixture
+def db(database_url):
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.db import crud, models
+from app.services import correlation_service, retention_service
+
+
+def _scan(db, serial_no, scanned_at, **fields):
+    scan = models.HumanInspect(serial_no=serial_no, pass_fail="FAIL", scan_datetime=scanned_at, **fields)
+    db.add(scan)
+    db.commit()
+    return scan.id
+
+
+def test_camera_filter_keeps_unmatched_scans(seed, db, client):
+    seed(triggers=10, cameras=2, human_inspect_share=1.0)
+    _scan(db, "NO SUCH PART", datetime.now())
+    correlation_service.correlate_range()
+    camera = db.query(models.Camera.serial_number).order_by(models.Camera.serial_number).first()[0]
+
+    everything = client.get("/api/inspection/agreement").json()
+    filtered = client.get("/api/inspection/agreement", params={"camera": camera}).json()
+
+    assert everything["unmatched_scans"] >= 1
+    assert filtered["unmatched_scans"] == everything["unmatched_scans"]
+    assert {matrix["camera_id"] for matrix in filtered["matrices"]} == {camera}
+
+
+def test_watermark_survives_archiving_and_rescans_late_rows(seed, db):
+    scale = seed(triggers=10, cameras=2, regions_per_camera=0, human_inspect_share=1.0)
+    assert correlation_service.correlate_range() > 0
+    watermark = crud.get_correlation_watermark(db)
+    assert watermark == db.query(func.max(models.HumanInspect.id)).scalar()
+
+    # Every matched link moves to the archive; the scans must not be correlated again
+    retention_service.archive_before(scale.end + timedelta(seconds=1), batch_size=100, prune_cache=False)
+    db.expire_all()
+    assert correlation_service.correlate_range(rescan_ids=1000) == 0
+    assert crud.get_correlation_watermark(db) == watermark
+
+    # A row committed after the worker passed its id (an ingest running alongside another)
+    _scan(db, "NO SUCH PART", datetime.now(), id=watermark + 2)
+    assert correlation_service.correlate_range() == 1
+    _scan(db, "NO SUCH PART", datetime.now(), id=watermark + 1)
+
+    assert correlation_service.correlate_range() == 0
+    assert correlation_service.correlate_range(rescan_ids=1000) == 1
+    assert db.query(models.InspectionLink).filter(models.InspectionLink.human_inspect_id == watermark + 1).count() == 1
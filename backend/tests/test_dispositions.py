@@ -0,0 +1,56 @@
+import pytest
+
+from app.api.endpoints import defects as defects_endpoint
+from app.db import crud, models
+from app.db.journal import DispositionJournal
+
+
+@pytest.fixture
+def direct(monkeypatch, tmp_path):
+    # Batches go straight to crud.update_defect_dispositions, whatever the config says
+    monkeypatch.setattr(defects_endpoint, "disposition_journal", DispositionJournal(str(tmp_path / "unused.log"), enabled=False))
+
+
+def test_update_defect_dispositions_returns_only_existing_rows(seed, db):
+    seed(triggers=5)
+    first, second = [defect_id for defect_id, in db.query(models.Defect.id).order_by(models.Defect.id).limit(2)]
+
+    rows = crud.update_defect_dispositions(db, [
+        {"defect_id": first, "disposition": "Rework", "notes": "porosity on boss"},
+        {"defect_id": 999_999_999, "disposition": "Scrap"},
+        {"defect_id": second, "disposition": "Rework"},
+        # Repeated ids: the last entry wins
+        {"defect_id": second, "disposition": "Scrap"},
+    ])
+
+    assert sorted((row.id, row.disposition) for row in rows) == [(first, "Rework"), (second, "Scrap")]
+    db.expire_all()
+    defect = db.query(models.Defect).filter(models.Defect.id == first).one()
+    assert defect.disposition == "Rework" and defect.dispositioned_at is not None
+    assert defect._metadata["disposition_notes"] == "porosity on boss"
+    assert crud.update_defect_dispositions(db, []) == []
+
+
+def test_batch_reports_updated_and_missing_defects(seed, db, client, direct):
+    seed(triggers=5)
+    defect_id = db.query(models.Defect.id).order_by(models.Defect.id).first()[0]
+
+    response = client.post("/api/defects/dispositions", json={"items": [
+        {"defect_id": 999_999_998, "disposition": "Scrap"},
+        {"defect_id": defect_id, "disposition": "Scrap"},
+        {"defect_id": 999_999_999, "disposition": "Scrap"},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 1
+    assert [(r["defect_id"], r["status"]) for r in body["results"]] == [
+        (999_999_998, "not_found"), (defect_id, "updated"), (999_999_999, "not_found")
+    ]
+    assert body["results"][1]["disposition"] == "Scrap"
+
+
+@pytest.mark.parametrize("count", [0, 1001])
+def test_batch_size_is_limited(client, database_url, direct, count):
+    items = [{"defect_id": index + 1, "disposition": "Scrap"} for index in range(count)]
+    assert client.post("/api/defects/dispositions", json={"items": items}).status_code == 422
@@ -0,0 +1,37 @@
+import json
+import time
+
+import psycopg2
+import pytest
+
+from app.services import event_service
+from app.services.event_service import COALESCE_SECONDS, EventBroadcaster, TriggerListener
+
+
+@pytest.mark.skipif(event_service.MODE != "listen", reason="stream.mode is not listen")
+def test_steady_notifications_are_published_within_the_window(database_url):
+    broadcaster = EventBroadcaster()
+    published = []
+    broadcaster.add_callback(lambda event: published.append((time.monotonic(), event["trigger_id"])))
+    listener = TriggerListener(broadcaster)
+    listener.start()
+
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    try:
+        time.sleep(1.0)
+        # Images of a new part every 50 ms: never quiet for a whole window
+        started = time.monotonic()
+        with conn.cursor() as cursor:
+            for image_id in range(1, 41):
+                payload = json.dumps({"image_id": 10_000_000 + image_id, "trigger_id": image_id // 4, "camera": "cam"})
+                cursor.execute("SELECT pg_notify(%s, %s)", (event_service.CHANNEL, payload))
+                time.sleep(0.05)
+        time.sleep(2 * COALESCE_SECONDS)
+    finally:
+        conn.close()
+        listener.stop()
+        listener.join(timeout=5)
+
+    assert published and published[0][0] - started < 2 * COALESCE_SECONDS + 0.1
+    assert sorted({trigger_id for _, trigger_id in published}) == list(range(11))
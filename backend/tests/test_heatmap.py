@@ -0,0 +1,54 @@
+import threading
+
+from sqlalchemy import func, text
+
+from app.db import models
+from app.services import heatmap_service
+
+GRID_SIZE = 16
+USABLE_DEFECTS = (
+    'SELECT count(*) FROM "Defects" d JOIN "Images" i ON i.id = d.image JOIN "Triggers" t ON t.id = i.trigger '
+    'WHERE d.x IS NOT NULL AND d.y IS NOT NULL AND d.width IS NOT NULL AND d.height IS NOT NULL'
+)
+
+
+def _counted(db):
+    db.commit()
+    return db.query(func.sum(models.DefectHeatmapHourly.defect_count)).filter(
+        models.DefectHeatmapHourly.grid_size == GRID_SIZE
+    ).scalar() or 0
+
+
+def test_concurrent_builds_count_every_defect_once(seed, db):
+    seed(triggers=60, cameras=3)
+    builders = [
+        threading.Thread(target=heatmap_service.build_range, kwargs={"grid_size": GRID_SIZE, "batch_size": 50})
+        for _ in range(3)
+    ]
+    for builder in builders:
+        builder.start()
+    for builder in builders:
+        builder.join()
+
+    assert _counted(db) == db.execute(text(USABLE_DEFECTS)).scalar()
+
+
+def test_defects_committed_behind_the_watermark_are_added(seed, db):
+    seed(triggers=20, cameras=2)
+    heatmap_service.build_range(grid_size=GRID_SIZE)
+    image_id = db.query(func.max(models.Image.id)).scalar()
+
+    # A slow writer takes an id, then a faster one commits a higher id first
+    late_id = db.execute(text("SELECT nextval('\"Defects_id_seq\"')")).scalar()
+    db.add(models.Defect(image_id=image_id, x=30, y=30, width=20, height=20))
+    db.commit()
+
+    gaps = set()
+    heatmap_service.build_range(grid_size=GRID_SIZE, gaps=gaps)
+    assert gaps == {late_id}
+    db.add(models.Defect(id=late_id, image_id=image_id, x=10, y=10, width=20, height=20))
+    db.commit()
+
+    assert heatmap_service.rescan_gaps(gaps, grid_size=GRID_SIZE) == 1
+    assert not gaps
+    assert _counted(db) == db.execute(text(USABLE_DEFECTS)).scalar()
@@ -0,0 +1,26 @@
+from app.db import models
+
+
+def _statement_counts(client, db, query_budget):
+    latest_image = db.query(models.Image.id).order_by(models.Image.id.desc()).first().id
+    paths = {"latest": "/api/images/latest", "detail": f"/api/images/{latest_image}"}
+    # Reference data caches load on first use; measure warm requests
+    for path in paths.values():
+        assert client.get(path).status_code == 200
+
+    counts = {}
+    for name, path in paths.items():
+        with query_budget(1, max_repeats=1) as profile:
+            response = client.get(path)
+        assert response.status_code == 200
+        counts[name] = profile.count
+    return counts
+
+
+def test_image_details_cost_the_same_statements_whatever_the_camera_count(seed, client, db, query_budget):
+    seed(cameras=2)
+    with_two = _statement_counts(client, db, query_budget)
+    seed(cameras=6)
+    with_six = _statement_counts(client, db, query_budget)
+
+    assert with_two == with_six
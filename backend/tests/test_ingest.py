@@ -0,0 +1,40 @@
+import os
+import time
+
+import pytest
+
+from app.services import ingest_service
+from app.services.ingest_service import HumanInspectIngester, IngestWorker
+
+HEADER = "Serial No,Pass Fail,Scan Datetime\n"
+
+
+def test_unsettled_files_wait_unless_announced_complete(tmp_path):
+    (tmp_path / "2025").mkdir()
+    (tmp_path / "2025" / "new.csv").write_text(HEADER)
+    ingester = HumanInspectIngester(str(tmp_path))
+
+    assert ingester.candidate_files(settle_seconds=60) == []
+    assert ingester.candidate_files(settle_seconds=60, complete={os.path.join("2025", "new.csv")}) == [os.path.join("2025", "new.csv")]
+
+
+@pytest.mark.skipif(ingest_service.INotify is None, reason="inotify_simple is not installed")
+def test_watch_announces_files_closed_in_new_subdirectories(tmp_path, monkeypatch):
+    worker = IngestWorker(HumanInspectIngester(str(tmp_path)))
+    announced = []
+    monkeypatch.setattr(worker, "run_once", lambda: announced.append(set(worker._complete)))
+    worker.start()
+    try:
+        time.sleep(0.5)
+        (tmp_path / "2025").mkdir()
+        time.sleep(0.5)
+        (tmp_path / "2025" / "new.csv").write_text(HEADER)
+        deadline = time.time() + 5
+        while time.time() < deadline and not any(announced):
+            time.sleep(0.1)
+    finally:
+        worker.stop(timeout=5)
+
+    assert {os.path.join("2025", "new.csv")} in announced
+    # The poll keeps its settle window once the watch is up
+    assert worker.settle_seconds > 0
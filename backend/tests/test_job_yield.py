@@ -0,0 +1,89 @@
+import threading
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.db import crud, models
+from app.db.database import SessionLocal
+
+COUNTERS = "job_num, hour, parts, flagged_parts, scrap_parts, scrap_defects"
+
+
+def _buckets(db):
+    return db.execute(text(f'SELECT {COUNTERS} FROM "Job_Yield_Hourly" ORDER BY job_num NULLS FIRST, hour')).all()
+
+
+def _assert_matches_rebuild(db):
+    kept = _buckets(db)
+    assert db.execute(text(
+        'SELECT count(*) FROM "Part_Yield" WHERE job_num IS DISTINCT FROM job_yield_job_at("timestamp")'
+    )).scalar() == 0
+    crud.rebuild_job_yield(db)
+    assert kept == _buckets(db)
+
+
+def test_closing_a_job_early_moves_only_its_late_parts(seed, db):
+    # 10 hours of parts over two 8 hour jobs
+    seed(triggers=600, cameras=2)
+    job = db.query(models.Outflow).order_by(models.Outflow.job_start).first()
+    before = _buckets(db)
+
+    job.job_end = job.job_end - timedelta(hours=2, minutes=30)
+    db.commit()
+
+    assert _buckets(db) != before
+    _assert_matches_rebuild(db)
+
+
+def test_moving_a_job_start_keeps_dispositions_written_meanwhile(seed, db):
+    seed(triggers=600, cameras=2)
+    second = db.query(models.Outflow).order_by(models.Outflow.job_start).offset(1).first()
+    # A defect of a part from the hour the second job is about to take over
+    defect_id = db.execute(text(
+        'SELECT d.id FROM "Defects" d JOIN "Images" i ON i.id = d.image JOIN "Triggers" t ON t.id = i.trigger '
+        "WHERE t.\"timestamp\" >= (CAST(:start AS timestamp) - interval '1 hour') AT TIME ZONE plant_timezone() "
+        'AND t."timestamp" < CAST(:start AS timestamp) AT TIME ZONE plant_timezone() '
+        "AND d.disposition IS DISTINCT FROM 'Scrap' LIMIT 1"
+    ), {"start": second.job_start}).scalar()
+    db.commit()
+
+    # The Outflow change holds the re-keyed part rows while the HMI scraps the defect
+    outflow = SessionLocal()
+    outflow.execute(text('UPDATE "Outflow" SET job_start = job_start - interval \'1 hour\' WHERE id = :id'), {"id": second.id})
+
+    def disposition():
+        writer = SessionLocal()
+        try:
+            writer.execute(text('UPDATE "Defects" SET disposition = \'Scrap\' WHERE id = :id'), {"id": defect_id})
+            writer.commit()
+        finally:
+            writer.close()
+
+    writer = threading.Thread(target=disposition)
+    writer.start()
+    writer.join(timeout=1)
+    assert writer.is_alive()
+    outflow.commit()
+    outflow.close()
+    writer.join(timeout=10)
+
+    assert db.execute(text('SELECT job_num FROM "Part_Yield" p JOIN "Images" i ON i.trigger = p.trigger JOIN "Defects" d ON d.image = i.id WHERE d.id = :id'), {"id": defect_id}).scalar() == second.job_num
+    _assert_matches_rebuild(db)
+
+
+def test_yield_of_a_repeated_job_counts_only_its_latest_run(seed, db, client):
+    seed(triggers=600, cameras=2)
+    jobs = db.query(models.Outflow).order_by(models.Outflow.job_start).all()
+    first, last = jobs[0], jobs[-1]
+    latest_run = client.get(f"/api/jobs/{last.job_num}/yield").json()
+    first_run = client.get(f"/api/jobs/{first.job_num}/yield").json()
+    assert latest_run["parts"] and first_run["parts"]
+
+    # The line runs the first job number again
+    last.job_num = first.job_num
+    db.commit()
+
+    repeated = client.get(f"/api/jobs/{first.job_num}/yield").json()
+    for name in ("parts", "flagged_parts", "scrap_parts", "scrap_defects", "parts_per_hour"):
+        assert repeated[name] == latest_run[name]
+    assert [hour["hour"] for hour in repeated["hours"]] == [hour["hour"] for hour in latest_run["hours"]]
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import DataError, OperationalError
+
+from app.api.endpoints import defects as defects_endpoint
+from app.db import journal as journal_module, models
+from app.db.journal import DispositionJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = DispositionJournal(str(tmp_path / "dispositions.log"), enabled=True, flush_interval=60, max_attempts=2)
+    journal.start()
+    yield journal
+    journal.stop()
+
+
+def test_batch_reports_unknown_defects_instead_of_queueing_them(seed, db, client, journal, monkeypatch):
+    seed(triggers=5)
+    monkeypatch.setattr(defects_endpoint, "disposition_journal", journal)
+    defect_id = db.query(func.min(models.Defect.id)).scalar()
+
+    response = client.post("/api/defects/dispositions", json={"items": [
+        {"defect_id": defect_id, "disposition": "Scrap"},
+        {"defect_id": 999_999_999, "disposition": "Scrap"}
+    ]})
+
+    assert response.status_code == 200
+    assert [(r["defect_id"], r["status"]) for r in response.json()["results"]] == [(defect_id, "queued"), (999_999_999, "not_found")]
+    assert journal.pending_count == 1
+
+
+def test_rejected_entries_are_dead_lettered_after_max_attempts(journal, monkeypatch):
+    applied = []
+
+    def apply(entries):
+        if any(entry["defect_id"] == 2 for entry in entries):
+            raise DataError("UPDATE", {}, Exception("value out of range"))
+        applied.extend(entry["defect_id"] for entry in entries)
+        return entries
+
+    monkeypatch.setattr(journal_module, "_apply", apply)
+    journal.append([{"defect_id": defect_id, "disposition": "Scrap"} for defect_id in (1, 2, 3)])
+
+    with pytest.raises(DataError):
+        journal.flush()
+    assert journal.flush() == 3
+
+    assert applied == [1, 3] and journal.pending_count == 0
+    with open(journal.dead_letter_path) as f:
+        assert [json.loads(line)["defect_id"] for line in f] == [2]
+    assert journal.stats()["checkpoint"] == 3
+
+
+def test_unreachable_database_is_never_dead_lettered(journal, monkeypatch):
+    def apply(entries):
+        raise OperationalError("UPDATE", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(journal_module, "_apply", apply)
+    journal.append([{"defect_id": 1, "disposition": "Scrap"}])
+
+    for _ in range(journal.max_attempts + 1):
+        with pytest.raises(OperationalError):
+            journal.flush()
+    assert journal.pending_count == 1 and journal.stats()["dead_lettered"] == 0
@@ -0,0 +1,86 @@
+import asyncio
+
+from app.middleware.micro_cache import MicroCacheMiddleware, ResponseCache
+
+
+def _snapshot_app(calls):
+    async def app(scope, receive, send):
+        calls.append(dict(scope["headers"]))
+        if dict(scope["headers"]).get(b"if-none-match") == b'"1"':
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", b'"1"')]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"etag", b'"1"')]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+def _get(middleware, headers):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/cameras/snapshot", "query_string": b"", "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(messages[0]["headers"]), messages[0]["status"]
+
+
+def test_conditional_polls_refill_the_cache_after_it_expires():
+    calls = []
+    cache = ResponseCache()
+    middleware = MicroCacheMiddleware(_snapshot_app(calls), routes=[{"pattern": "^/api/cameras/snapshot$", "ttl_seconds": 60}], cache=cache)
+    polling = [(b"if-none-match", b'"1"')]
+
+    # Every poller already holds the ETag when the entry expires
+    headers, status = _get(middleware, polling)
+    assert (status, headers[b"x-micro-cache"]) == (304, b"MISS")
+    assert b"if-none-match" not in calls[0]
+
+    headers, status = _get(middleware, polling)
+    assert (status, headers[b"x-micro-cache"]) == (304, b"HIT")
+    headers, status = _get(middleware, [])
+    assert (status, headers[b"x-micro-cache"]) == (200, b"HIT")
+    assert len(calls) == 1
+
+
+def test_cached_responses_carry_the_requesting_origin(seed, client, monkeypatch):
+    from app.main import config
+    from app.middleware import micro_cache
+
+    seed(cameras=2)
+    # The client fixture empties the cache before every request
+    monkeypatch.setattr(micro_cache.response_cache, "clear", lambda: None)
+    first, second = config["api"]["cors_origins"][:2]
+
+    response = client.get("/api/cameras/snapshot", headers={"Origin": first})
+    assert response.headers["access-control-allow-origin"] == first
+    response = client.get("/api/cameras/snapshot", headers={"Origin": second})
+    assert response.headers["x-micro-cache"] == "HIT"
+    assert response.headers["access-control-allow-origin"] == second
+
+
+def test_snapshot_answers_matching_etag_lists_with_not_modified(seed, client):
+    seed(cameras=2)
+    etag = client.get("/api/cameras/snapshot").headers["etag"]
+
+    for if_none_match in (etag, f'"other", {etag}', f"W/{etag}", "*"):
+        response = client.get("/api/cameras/snapshot", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+        assert response.headers["etag"] == etag
+    assert client.get("/api/cameras/snapshot", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_cached_entries_answer_etag_lists_with_not_modified():
+    calls = []
+    middleware = MicroCacheMiddleware(_snapshot_app(calls), routes=[{"pattern": "^/api/cameras/snapshot$", "ttl_seconds": 60}], cache=ResponseCache())
+
+    assert _get(middleware, [])[1] == 200
+    for if_none_match in (b'"1"', b'"0", "1"', b'W/"1"', b"*"):
+        assert _get(middleware, [(b"if-none-match", if_none_match)])[1] == 304
+    assert _get(middleware, [(b"if-none-match", b'"0"')])[1] == 200
+    assert len(calls) == 1
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.db import crud
+from app.db.cache import ReferenceRow, reference_cache
+from app.db.database import SessionLocal
+from app.services import event_service
+from app.services.event_service import TriggerListener
+
+pytestmark = pytest.mark.skipif(not reference_cache.enabled, reason="reference_cache is disabled")
+
+
+def _camera_with_regions(db):
+    return db.execute(text('SELECT camera_id FROM "Regions" ORDER BY id LIMIT 1')).scalar()
+
+
+def test_cached_rows_are_read_only_copies(seed, db):
+    seed(cameras=2, regions_per_camera=2)
+    camera_id = _camera_with_regions(db)
+
+    loader = SessionLocal()
+    loaded = crud.get_regions_by_camera(loader, camera_id)
+    loader.close()
+    # A miss hands out copies too, not the loading session's ORM objects
+    assert loaded and all(isinstance(region, ReferenceRow) for region in loaded)
+
+    # Served after the loading session is gone, without touching its ORM objects
+    cached = crud.get_regions_by_camera(db, camera_id)
+    assert all(isinstance(region, ReferenceRow) for region in cached)
+    assert [region.polygon for region in cached] == [region.polygon for region in loaded]
+    with pytest.raises(AttributeError):
+        cached[0].size_threshold = 0
+    cached[0].polygon.append({"x": 0, "y": 0})
+    assert crud.get_regions_by_camera(db, camera_id)[0].polygon == loaded[0].polygon
+
+
+@pytest.mark.skipif(event_service.MODE != "listen", reason="stream.mode is not listen")
+def test_writes_from_other_processes_invalidate(seed, db):
+    seed(cameras=2, regions_per_camera=1)
+    camera_id = _camera_with_regions(db)
+    listener = TriggerListener(event_service.EventBroadcaster())
+    listener.start()
+    try:
+        time.sleep(1.0)
+        assert crud.get_regions_by_camera(db, camera_id)[0].description != "moved"
+        db.commit()
+
+        # Not through crud.update_region, as another API process or a SQL client would
+        writer = SessionLocal()
+        writer.execute(text('UPDATE "Regions" SET description = \'moved\' WHERE camera_id = :camera'), {"camera": camera_id})
+        writer.commit()
+        writer.close()
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and crud.get_regions_by_camera(db, camera_id)[0].description != "moved":
+            db.commit()
+            time.sleep(0.05)
+        assert crud.get_regions_by_camera(db, camera_id)[0].description == "moved"
+    finally:
+        listener.stop()
+        listener.join(timeout=5)
+
+
+def test_misses_return_copies_when_the_cache_is_disabled(seed, db, monkeypatch):
+    seed(cameras=2)
+    monkeypatch.setattr(reference_cache, "enabled", False)
+
+    camera = crud.get_camera(db, crud.get_cameras(db)[0].serial_number)
+    assert isinstance(camera, ReferenceRow)
+    assert crud.get_camera(db, "missing") is None
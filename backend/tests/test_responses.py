@@ -0,0 +1,13 @@
+import json
+from datetime import datetime, timezone
+
+from app.utils import responses
+
+
+def test_trusted_response_without_orjson_encodes_like_jsonable_encoder(monkeypatch):
+    content = [{"id": 1, "normalized": {"x_center": 0.5}, "type": "é", "at": datetime(2025, 5, 1, 6, tzinfo=timezone.utc)}]
+    monkeypatch.setattr(responses, "FAST_JSON", False)
+
+    body = responses.trusted_json_response(content).body
+
+    assert json.loads(body) == responses.jsonable_encoder(content)
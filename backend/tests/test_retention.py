@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from sqlalchemy import func, text
+
+from app.db import models
+from app.services import correlation_service, retention_service
+
+
+def test_archive_moves_inspection_links_of_multi_image_parts(seed, db):
+    # Every scan links to each of its part's 4 images, as whole-image and region rows
+    scale = seed(triggers=12, cameras=4, regions_per_camera=1, human_inspect_share=1.0)
+    assert correlation_service.correlate_range(start_id=0) > 0
+    linked = db.query(func.count(models.InspectionLink.id)).filter(models.InspectionLink.trigger_id.isnot(None)).scalar()
+    assert linked >= 12 * 4 * 2
+
+    totals = retention_service.archive_before(scale.end + timedelta(seconds=1), batch_size=5, prune_cache=False)
+
+    assert totals["parts"] == 12
+    assert db.query(func.count(models.Trigger.id)).scalar() == 0
+    assert db.query(func.count(models.InspectionLink.id)).filter(models.InspectionLink.trigger_id.isnot(None)).scalar() == 0
+    assert db.execute(text('SELECT count(*) FROM archive."Inspection_Links"')).scalar() == linked
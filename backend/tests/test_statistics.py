@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.db import crud, models
+from app.services import retention_service
+
+
+def test_rollup_statistics_match_live_counts_for_unaligned_windows(seed, db):
+    # 5 hours of parts, one a minute
+    scale = seed(triggers=300, cameras=2)
+
+    windows = [
+        (scale.start + timedelta(minutes=37, seconds=13), scale.end - timedelta(minutes=71)),
+        (scale.start + timedelta(minutes=5), scale.start + timedelta(minutes=50)),
+        (scale.start + timedelta(minutes=90), None),
+        (None, scale.end - timedelta(minutes=20)),
+    ]
+    for start, end in windows:
+        assert crud.get_defect_statistics_from_rollup(db, start=start, end=end) == crud.get_defect_statistics(db, start=start, end=end)
+
+
+def test_unbounded_rollup_statistics_keep_archived_parts_and_skip_untimed_triggers(seed, db):
+    scale = seed(triggers=60, cameras=2)
+    retention_service.archive_before(scale.start + timedelta(minutes=20), batch_size=10, prune_cache=False)
+    archived = db.execute(text('SELECT count(*) FROM archive."Defects"')).scalar()
+    assert archived
+
+    # A part the line wrote without a trigger time
+    trigger = models.Trigger(timestamp=None, part_instance="UNTIMED")
+    db.add(trigger)
+    db.flush()
+    camera_id = db.query(models.Camera.serial_number).first()[0]
+    image = models.Image(trigger_id=trigger.id, camera_id=camera_id)
+    db.add(image)
+    db.flush()
+    db.add_all([models.Defect(image_id=image.id, x=10, y=10, width=5, height=5, type="0") for _ in range(3)])
+    db.commit()
+
+    live = crud.get_defect_statistics(db)
+    rollup = crud.get_defect_statistics_from_rollup(db)
+    assert rollup["total_defects"] == live["total_defects"] - 3 + archived
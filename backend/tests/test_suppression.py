@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+from sqlalchemy import func, text
+
+from app.db import crud, models
+from app.services.suppression_service import SpatialHash, SuppressionEngine, SuppressionWorker, _entry
+
+Row = namedtuple("Row", "id x y width height camera_id trigger_id")
+
+
+def _rows(first_id, trigger_id, boxes, camera_id="cam"):
+    return [Row(first_id + i, x, y, w, h, camera_id, trigger_id) for i, (x, y, w, h) in enumerate(boxes)]
+
+
+def test_part_split_across_batches_counts_once():
+    engine = SuppressionEngine(window_parts=3, min_repeats=2)
+    # Part 1's defects arrive in two fetch batches
+    engine.process(_rows(1, 1, [(100, 100, 10, 10)]))
+    engine.process(_rows(2, 1, [(400, 400, 10, 10)]) + _rows(3, 2, [(800, 800, 10, 10)]))
+    assert engine.process(_rows(4, 3, [(100, 100, 10, 10)])) == []
+
+    # Parts 1 to 3 fill the window; counted twice, part 1 would already have been dropped
+    assert engine.process(_rows(5, 4, [(100, 100, 10, 10)])) == [(5, 4, 1.0)]
+
+
+def test_large_boxes_match_beyond_neighbouring_cells():
+    spatial_hash = SpatialHash(cell_size=16, window_parts=5)
+    big = _entry(Row(1, 0, 0, 200, 200, "cam", 1))
+    spatial_hash.add_part(1, [big])
+
+    # Overlaps most of the big box; its center is three cells from the big box's center
+    probe = _entry(Row(2, 0, 0, 120, 200, "cam", 2))
+    assert [candidate[0] for candidate in spatial_hash.candidates(probe, reach=16)] == [1]
+
+    engine = SuppressionEngine(cell_size=16, min_repeats=2)
+    engine.process(_rows(1, 1, [(0, 0, 200, 200)]) + _rows(2, 2, [(4, 0, 200, 200)]))
+    assert engine.process(_rows(3, 3, [(0, 0, 120, 200)])) == [(3, 2, 0.5686)]
+
+
+def test_worker_resumes_from_the_stored_watermark(seed, db):
+    seed(triggers=40, cameras=2)
+    head = db.query(func.max(models.Defect.id)).scalar()
+
+    worker = SuppressionWorker(SuppressionEngine())
+    worker.run_once()
+    assert crud.get_suppression_watermark(db) == head
+
+    # Defects written while no worker runs: a repeat of one that was already there
+    defect = db.query(models.Defect).filter(models.Defect.id == head).one()
+    image_ids = [image.id for image in db.query(models.Image).filter(models.Image.camera_id == defect.image.camera_id).order_by(models.Image.id.desc()).limit(3)]
+    for image_id in image_ids[:2]:
+        db.add(models.Defect(image_id=image_id, x=defect.x, y=defect.y, width=defect.width, height=defect.height))
+    db.commit()
+    db.add(models.Defect(image_id=image_ids[2], x=defect.x, y=defect.y, width=defect.width, height=defect.height))
+    db.commit()
+
+    restarted = SuppressionWorker(SuppressionEngine())
+    restarted.run_once()
+    db.expire_all()
+
+    last = db.query(func.max(models.Defect.id)).scalar()
+    assert crud.get_suppression_watermark(db) == last
+    # Suppressed_Defects ids come from the sequence default
+    assert db.query(models.SuppressedDefect).filter(models.SuppressedDefect.defect == last).one().id is not None
+
+
+def test_worker_scores_defects_committed_out_of_id_order(seed, db):
+    seed(triggers=40, cameras=2)
+    worker = SuppressionWorker(SuppressionEngine())
+    worker.run_once()
+
+    defect = db.query(models.Defect).filter(models.Defect.id == crud.get_suppression_watermark(db)).one()
+    image_ids = [
+        image.id for image in db.query(models.Image).filter(
+            models.Image.camera_id == defect.image.camera_id, models.Image.trigger_id != defect.image.trigger_id
+        ).order_by(models.Image.id.desc()).limit(3)
+    ]
+    box = dict(x=defect.x, y=defect.y, width=defect.width, height=defect.height)
+
+    # The vision system takes an id, but commits it after the two repeats that follow it
+    late_id = db.execute(text('SELECT nextval(\'"Defects_id_seq"\')')).scalar()
+    db.add_all([models.Defect(image_id=image_id, **box) for image_id in image_ids[:2]])
+    db.commit()
+    worker.run_once()
+    assert crud.get_suppression_watermark(db) > late_id
+
+    db.add(models.Defect(id=late_id, image_id=image_ids[2], **box))
+    db.commit()
+    worker.run_once()
+    db.expire_all()
+
+    assert db.query(models.SuppressedDefect).filter(models.SuppressedDefect.defect == late_id).count() == 1
+    assert not worker._gaps
@@ -0,0 +1,61 @@
+import os
+import tarfile
+from datetime import timedelta
+
+import pytest
+
+from app.db import models
+from app.services import image_service, training_export_service
+
+
+class Interrupted(BaseException):
+    """Stands in for the process being killed: not caught like a failed fetch."""
+
+
+def test_resumed_export_writes_every_image_once(seed, db, tmp_path, monkeypatch):
+    scale = seed(triggers=20, cameras=2)
+    start, end = scale.start, scale.end + timedelta(seconds=1)
+    image_ids = sorted(image_id for image_id, in db.query(models.Image.id))
+    crash_at = {image_ids[len(image_ids) // 2]}
+
+    def fetch(image):
+        if image.id in crash_at:
+            crash_at.clear()
+            raise Interrupted()
+        path = tmp_path / "files" / f"{image.id}.jpg"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(str(image.id).encode())
+        return str(path)
+
+    monkeypatch.setattr(image_service, "get_image_file_path", fetch)
+    output = str(tmp_path / "training.tar")
+    state_path = output + ".state.json"
+
+    # Killed in the middle of a batch, after some images of it were written
+    with pytest.raises(Interrupted):
+        training_export_service.export_training_set_to_file(output, start, end, batch_images=8)
+    assert os.path.exists(state_path)
+
+    # Killed again once every batch is written, before the state file is removed
+    remove = os.remove
+
+    def interrupted_remove(path):
+        if path == state_path:
+            raise Interrupted()
+        remove(path)
+
+    monkeypatch.setattr(training_export_service.os, "remove", interrupted_remove)
+    with pytest.raises(Interrupted):
+        training_export_service.export_training_set_to_file(output, start, end, resume=True, batch_images=8)
+    monkeypatch.setattr(training_export_service.os, "remove", remove)
+
+    progress = training_export_service.export_training_set_to_file(output, start, end, resume=True, batch_images=8)
+    assert not os.path.exists(state_path)
+    assert progress.images == progress.total == len(image_ids)
+
+    with tarfile.open(output) as tar:
+        names = tar.getnames()
+        assert tar.extractfile(f"images/{image_ids[0]}.jpg").read() == str(image_ids[0]).encode()
+    expected = [f"images/{image_id}.jpg" for image_id in image_ids] + [f"labels/{image_id}.txt" for image_id in image_ids]
+    assert sorted(name for name in names if name != "classes.txt") == sorted(expected)
+    assert names.count("classes.txt") == 1
@@ -0,0 +1,29 @@
+from sqlalchemy import text
+
+from app.db import models
+
+
+def test_trigger_bundle_costs_the_same_statements_whatever_its_image_count(seed, client, db, query_budget):
+    seed(cameras=6)
+    triggers = [row.id for row in db.query(models.Trigger.id).order_by(models.Trigger.id.desc()).limit(4)]
+    # Leave the triggers 6, 3, 1 and 0 images
+    for trigger_id, keep in zip(triggers, (6, 3, 1, 0)):
+        db.execute(text(
+            'WITH dropped AS (SELECT id FROM "Images" WHERE trigger = :trigger ORDER BY id OFFSET :keep), '
+            'defects AS (DELETE FROM "Defects" WHERE image IN (SELECT id FROM dropped)) '
+            'DELETE FROM "Images" WHERE id IN (SELECT id FROM dropped)'
+        ), {"trigger": trigger_id, "keep": keep})
+    db.commit()
+    # Reference data caches load on first use
+    assert client.get(f"/api/triggers/{triggers[0]}/bundle", params={"analysis": "true"}).status_code == 200
+
+    counts = {}
+    for trigger_id, images in zip(triggers, (6, 3, 1, 0)):
+        with query_budget(4, max_repeats=1) as profile:
+            response = client.get(f"/api/triggers/{trigger_id}/bundle", params={"analysis": "true"})
+        assert response.status_code == 200
+        assert len(response.json()["images"]) == images
+        counts[images] = profile.count
+    # Without images there are no defects or regions to load
+    assert counts.pop(0) <= 2
+    assert len(set(counts.values())) == 1
@@ -65,6 +65,49 @@ export const ApiService = {
    */
   get: (endpoint) => fetchWithError(`${API_BASE_URL}${endpoint}`),
   
+  /**
+   * Make a conditional GET request using an ETag from a previous response
+   * @param {string} endpoint - API endpoint
+   * @param {string|null} etag - ETag returned by the previous response
+   * @returns {Promise<{notModified: boolean, etag: string|null, data: any}>} - Response data, or notModified on 304
+   */
+  getConditional: async (endpoint, etag = null) => {
+    const url = `${API_BASE_URL}${endpoint}`;
+    if (config.debug.logApiCalls) {
+      console.log(`API GET request to ${url} (If-None-Match: ${etag})`);
+    }
+    
+    let response;
+    try {
+      response = await fetch(url, etag ? { headers: { 'If-None-Match': etag } } : {});
+    } catch (error) {
+      throw new ApiError(
+        `Network error: ${error.message}`,
+        0,
+        { originalError: error.message }
+      );
+    }
+    
+    if (response.status === 304) {
+      return { notModified: true, etag, data: null };
+    }
+    
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new ApiError(
+        errorData.detail || `API Error: ${response.status}`,
+        response.status,
+        errorData
+      );
+    }
+    
+    return {
+      notModified: false,
+      etag: response.headers.get('ETag'),
+      data: await response.json(),
+    };
+  },
+  
   /**
    * Make a POST request
    * @param {string} endpoint - API endpoint
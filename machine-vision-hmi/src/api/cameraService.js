@@ -25,6 +25,63 @@ export const CameraService = {
    */
   getCameraLatest: (serialNumber) => ApiService.get(`/cameras/${serialNumber}/latest`),
   
+  /**
+   * URL of a camera's defect-location heatmap, a transparent PNG to lay over its images
+   * @param {string} serialNumber - Camera serial number
+   * @param {Object} params - { start, end, width, height }; start/end are ISO 8601 strings
+   * @returns {string} - Image URL
+   */
+  getHeatmapUrl: (serialNumber, params = {}) => {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') {
+        query.append(key, value);
+      }
+    });
+    const queryString = query.toString();
+    return `${config.api.baseUrl}/cameras/${serialNumber}/heatmap${queryString ? `?${queryString}` : ''}`;
+  },
+  
+  /**
+   * Get the latest status of every camera in one request
+   * @param {string|null} etag - ETag of the previous snapshot, if any
+   * @returns {Promise<Object>} - { notModified, etag, data } where data is { version, cameras }
+   */
+  getSnapshot: (etag = null) => ApiService.getConditional('/cameras/snapshot', etag),
+  
+  /**
+   * Create a poller for the fleet snapshot; the callback only fires when the snapshot changed
+   * @param {Function} callback - Callback receiving the snapshot { version, cameras }
+   * @param {number} interval - Polling interval in milliseconds
+   * @returns {Object} - { refresh, start, stop } controls; start() also fetches immediately if not already running
+   */
+  createSnapshotPoller: (callback, interval = config.api.pollingInterval) => {
+    let etag = null;
+    let intervalId = null;
+    
+    const refresh = () => CameraService.getSnapshot(etag)
+      .then(result => {
+        if (result.notModified) return;
+        etag = result.etag;
+        callback(result.data);
+      })
+      .catch(error => console.error('Error polling camera snapshot:', error));
+    
+    return {
+      refresh,
+      start: () => {
+        if (!intervalId) {
+          refresh();
+          intervalId = setInterval(refresh, interval);
+        }
+      },
+      stop: () => {
+        CameraService.stopPolling(intervalId);
+        intervalId = null;
+      }
+    };
+  },
+  
   /**
    * Start polling for camera updates
    * @param {string} serialNumber - Camera serial number
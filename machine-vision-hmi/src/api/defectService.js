@@ -1,5 +1,39 @@
 import { ApiService } from './api';
 
+/**
+ * Expand a columnar overlay payload ({ count, columns: { field: [...] } }) into
+ * one object per defect, the shape the overlay components render.
+ * @param {Object} payload - Response of /defects/image/{id}?format=columnar
+ * @returns {Array} - List of defects with normalized coordinates
+ */
+const expandColumnarDefects = (payload) => {
+  const { count, image_id, columns } = payload;
+  const defects = new Array(count);
+  
+  for (let i = 0; i < count; i++) {
+    defects[i] = {
+      id: columns.id[i],
+      image_id,
+      x: columns.x[i],
+      y: columns.y[i],
+      width: columns.width[i],
+      height: columns.height[i],
+      confidence: columns.confidence[i],
+      type: columns.type[i],
+      disposition: columns.disposition[i],
+      normalized: {
+        x_center: columns.x_center[i],
+        y_center: columns.y_center[i],
+        width: columns.width_norm[i],
+        height: columns.height_norm[i]
+      },
+      metadata: null
+    };
+  }
+  
+  return defects;
+};
+
 /**
  * Service for defect-related API operations
  */
@@ -9,7 +43,11 @@ export const DefectService = {
    * @param {number} imageId - Image ID
    * @returns {Promise<Array>} - List of defects with normalized coordinates
    */
-  getDefectsForImage: (imageId) => ApiService.get(`/defects/image/${imageId}`),
+  getDefectsForImage: async (imageId) => {
+    // Normalization happens on the server; the columnar payload is much smaller than one object per defect
+    const payload = await ApiService.get(`/defects/image/${imageId}?format=columnar`);
+    return expandColumnarDefects(payload);
+  },
   
   /**
    * Get details for a specific defect
@@ -32,52 +70,17 @@ export const DefectService = {
     }),
   
   /**
-   * Get defect statistics
-   * @returns {Promise<Object>} - Defect statistics
+   * Update the disposition of many defects in one request (one transaction on the server)
+   * @param {Array<Object>} items - [{ defect_id, disposition, notes }]
+   * @returns {Promise<Object>} - { updated, results: [{ defect_id, status, disposition, dispositioned_at }] }
    */
-  getDefectStatistics: () => ApiService.get('/defects/statistics/summary'),
+  updateDefectDispositions: (items) => ApiService.post('/defects/dispositions', { items }),
   
   /**
-   * Convert YOLO format text to defect objects with normalized coordinates
-   * @param {string} yoloText - YOLO format defect data
-   * @param {number} imageWidth - Image width in pixels
-   * @param {number} imageHeight - Image height in pixels
-   * @returns {Array} - Array of defect objects with normalized coordinates
+   * Get defect statistics
+   * @returns {Promise<Object>} - Defect statistics
    */
-  parseYoloDetections: (yoloText, imageWidth, imageHeight) => {
-    if (!yoloText || yoloText.trim() === '') return [];
-    
-    return yoloText.trim().split('\n').map((line, index) => {
-      const parts = line.trim().split(' ').map(Number);
-      const classId = parts[0]; 
-      const x_center_norm = parts[1];
-      const y_center_norm = parts[2];
-      const width_norm = parts[3];
-      const height_norm = parts[4];
-      
-      // Calculate absolute coordinates for legacy compatibility
-      const x_abs = (x_center_norm - width_norm/2) * imageWidth;
-      const y_abs = (y_center_norm - height_norm/2) * imageHeight;
-      const width_abs = width_norm * imageWidth;
-      const height_abs = height_norm * imageHeight;
-      
-      return { 
-        id: `defect-${index}-${Date.now()}`, 
-        classId, 
-        normalized: { 
-          x_center: x_center_norm, 
-          y_center: y_center_norm, 
-          width: width_norm, 
-          height: height_norm 
-        }, 
-        x: x_abs, 
-        y: y_abs, 
-        width: width_abs, 
-        height: height_abs, 
-        label: `Defect ${classId}` 
-      };
-    });
-  },
+  getDefectStatistics: () => ApiService.get('/defects/statistics/summary'),
   
   /**
    * Calculate if a defect is a failure based on region criteria
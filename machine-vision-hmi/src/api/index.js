@@ -8,11 +8,17 @@ import { CameraService } from './cameraService';
 import { ImageService } from './imageService';
 import { DefectService } from './defectService';
 import { RegionService } from './regionService';
+import { TriggerService } from './triggerService';
+import { JobService } from './jobService';
+import { StreamService } from './streamService';
 
 export {
   ApiService,
   CameraService,
   ImageService,
   DefectService,
-  RegionService
+  RegionService,
+  TriggerService,
+  JobService,
+  StreamService
 };
\ No newline at end of file
@@ -0,0 +1,19 @@
+import { ApiService } from './api';
+
+/**
+ * Service for production job (Outflow) related API operations
+ */
+export const JobService = {
+  /**
+   * Get yield and throughput of the running job
+   * @returns {Promise<Object>} - { job_num, parts, scrap_parts, yield_rate, parts_per_hour, hours, ... }
+   */
+  getCurrentYield: () => ApiService.get('/jobs/current/yield'),
+  
+  /**
+   * Get yield and throughput of a job
+   * @param {number} jobNum - Job number
+   * @returns {Promise<Object>} - Same shape as getCurrentYield
+   */
+  getYield: (jobNum) => ApiService.get(`/jobs/${jobNum}/yield`)
+};
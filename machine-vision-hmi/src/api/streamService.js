@@ -0,0 +1,49 @@
+import config from '../config/config';
+
+const API_BASE_URL = config.api.baseUrl;
+
+/**
+ * Service for the server-sent event stream of new triggers
+ */
+export const StreamService = {
+  /**
+   * Subscribe to the backend event stream
+   * @param {Object} handlers - { onTrigger, onOpen, onError } callbacks
+   * @returns {EventSource} - The event source; pass it to unsubscribe to close it
+   */
+  subscribe: ({ onTrigger, onOpen, onError }) => {
+    const source = new EventSource(`${API_BASE_URL}/stream`);
+    
+    source.addEventListener('ready', () => {
+      if (config.debug.logApiCalls) {
+        console.log('Event stream connected');
+      }
+      if (onOpen) onOpen();
+    });
+    
+    source.addEventListener('new_trigger', (message) => {
+      try {
+        if (onTrigger) onTrigger(JSON.parse(message.data));
+      } catch (error) {
+        console.error('Error handling stream event:', error);
+      }
+    });
+    
+    // EventSource reconnects on its own; callers fall back to polling meanwhile
+    source.onerror = (error) => {
+      if (onError) onError(error);
+    };
+    
+    return source;
+  },
+  
+  /**
+   * Close an event stream subscription
+   * @param {EventSource} source - Event source returned from subscribe
+   */
+  unsubscribe: (source) => {
+    if (source) {
+      source.close();
+    }
+  }
+};
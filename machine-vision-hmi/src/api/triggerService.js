@@ -0,0 +1,31 @@
+import { ApiService } from './api';
+
+/**
+ * Service for trigger (part) related API operations
+ */
+export const TriggerService = {
+  /**
+   * Get one page of trigger history, newest first
+   * @param {Object} params - { cursor, limit, camera_id, part, belt, has_defects, disposition }
+   * @returns {Promise<Object>} - { items, next_cursor }; next_cursor is null on the last page
+   */
+  getHistory: (params = {}) => {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') {
+        query.append(key, value);
+      }
+    });
+    const queryString = query.toString();
+    return ApiService.get(`/triggers/${queryString ? `?${queryString}` : ''}`);
+  },
+  
+  /**
+   * Get a trigger with all its images, their defects and the regions of their cameras
+   * @param {number} triggerId - Trigger ID
+   * @param {boolean} withAnalysis - Include the region analysis verdict
+   * @returns {Promise<Object>} - { trigger, images, regions, has_failures }
+   */
+  getBundle: (triggerId, withAnalysis = false) =>
+    ApiService.get(`/triggers/${triggerId}/bundle${withAnalysis ? '?analysis=true' : ''}`)
+};
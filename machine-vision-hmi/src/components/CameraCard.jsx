@@ -1,25 +1,10 @@
 // CameraCard.jsx
 import React, { useState, useEffect, useRef } from 'react';
 import { CheckCircle, X } from 'lucide-react';
-import { CameraService } from '../api/cameraService';
 import { ImageService } from '../api/imageService';
 import { DefectService } from '../api/defectService';
 
-// TODO: Consider moving utility functions to a separate file
-const parseYoloDetections = (fileContent, imageWidth, imageHeight) => {
-  if (!fileContent || fileContent.trim() === '') return [];
-  return fileContent.trim().split('\n').map((line, index) => {
-    const parts = line.trim().split(' ').map(Number);
-    const classId = parts[0]; const x_center_norm = parts[1]; const y_center_norm = parts[2];
-    const width_norm = parts[3]; const height_norm = parts[4];
-    const x_abs = (x_center_norm - width_norm/2) * imageWidth;
-    const y_abs = (y_center_norm - height_norm/2) * imageHeight;
-    const width_abs = width_norm * imageWidth; const height_abs = height_norm * imageHeight;
-    return { id: `defect-${index}-${Date.now()}`, classId, normalized: { x_center: x_center_norm, y_center: y_center_norm, width: width_norm, height: height_norm }, x: x_abs, y: y_abs, width: width_abs, height: height_abs, label: `Defect ${classId}` };
-  });
-};
-
-const CameraCard = ({ camera, onSelect }) => {
+const CameraCard = ({ camera, cameraStatus, onSelect }) => {
   const [status, setStatus] = useState({ failed: false, timestamp: new Date(), imageType: 'good' });
   const [detections, setDetections] = useState([]);
   const [imageDimensions, setImageDimensions] = useState({ width: 0, height: 0, offsetLeft: 0, offsetTop: 0 });
@@ -28,7 +13,6 @@ const CameraCard = ({ camera, onSelect }) => {
   const [imageUrl, setImageUrl] = useState('');
   const [latestImageId, setLatestImageId] = useState(null);
   const imageRef = useRef(null);
-  const pollingIntervalRef = useRef(null); // Changed name to avoid conflict if not already changed
 
   const updateImageDimensions = () => {
     if (imageRef.current) {
@@ -60,7 +44,7 @@ const CameraCard = ({ camera, onSelect }) => {
     }
   };
 
-  const fetchCameraStatus = async () => {
+  const applyCameraStatus = async (cameraStatus) => {
     if (!camera || !camera.serial_number) {
       setError("Camera data is missing.");
       setLoading(false);
@@ -70,8 +54,6 @@ const CameraCard = ({ camera, onSelect }) => {
     // setError(null); // Clear previous error before new fetch
 
     try {
-      const cameraStatus = await CameraService.getCameraLatest(camera.serial_number);
-
       if (cameraStatus.latest_image_id) {
         if (latestImageId !== cameraStatus.latest_image_id) {
           setLatestImageId(cameraStatus.latest_image_id);
@@ -115,20 +97,12 @@ const CameraCard = ({ camera, onSelect }) => {
     }
   };
 
-  // Initial fetch and setup polling
+  // Status comes from the shared snapshot poll in CameraGrid instead of a per-card poll
   useEffect(() => {
-    setLoading(true); // Set loading true for the very first fetch
-    fetchCameraStatus();
-
-    // Polling interval from plan is 30 seconds
-    pollingIntervalRef.current = setInterval(fetchCameraStatus, 30000);
-
-    return () => {
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current);
-      }
-    };
-  }, [camera.serial_number]); // Re-run if camera serial number changes
+    if (cameraStatus) {
+      applyCameraStatus(cameraStatus);
+    }
+  }, [camera.serial_number, cameraStatus]); // Re-run when the snapshot for this camera changes
 
   // Handle image dimensions - this effect is from the plan
   useEffect(() => {
@@ -1,8 +1,39 @@
 // CameraGrid.jsx
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import CameraCard from './CameraCard';
+import { CameraService } from '../api/cameraService';
+import { StreamService } from '../api/streamService';
 
 const CameraGrid = ({ cameras, onSelect }) => {
+  // Latest status per camera serial number, from one shared snapshot
+  const [cameraStatuses, setCameraStatuses] = useState({});
+
+  useEffect(() => {
+    const poller = CameraService.createSnapshotPoller((snapshot) => {
+      const statuses = {};
+      snapshot.cameras.forEach((cameraStatus) => {
+        statuses[cameraStatus.serial_number] = cameraStatus;
+      });
+      setCameraStatuses(statuses);
+    });
+
+    // Poll until the event stream is up, then refresh only when a new trigger is pushed
+    poller.start();
+    const source = StreamService.subscribe({
+      onOpen: () => {
+        poller.stop();
+        poller.refresh(); // Catch anything that arrived while disconnected
+      },
+      onTrigger: () => poller.refresh(),
+      onError: () => poller.start(),
+    });
+
+    return () => {
+      StreamService.unsubscribe(source);
+      poller.stop();
+    };
+  }, []);
+
   if (!cameras || cameras.length === 0) {
     return (
       <div className="flex-grow mx-auto p-0.5 w-full max-w-[98vw] overflow-auto">
@@ -20,6 +51,7 @@ const CameraGrid = ({ cameras, onSelect }) => {
           <CameraCard
             key={camera.serial_number}
             camera={camera}
+            cameraStatus={cameraStatuses[camera.serial_number]}
             onSelect={onSelect}
           />
         ))}